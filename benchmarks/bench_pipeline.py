@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.self_automation import SelfAutomation  # noqa: E402
+from src.rule_emitter import RuleEmitter  # noqa: E402
+from src.rule_sink import FileSink  # noqa: E402
+
+# configuration every sweep starts from
+BASE = {'logs': 10000, 'neighbors': 2, 'attributes': 2, 'commands': 2}
+
+# values of each parameter swept while others are kept as BASE
+SWEEP = {
+    'logs': [1000, 10000, 100000, 1000000, 10000000],
+    'neighbors': [0, 1, 4, 16],
+    'attributes': [1, 2, 4, 8],
+    'commands': [1, 2, 4, 8],
+}
+
+# stages of run(), each stage is timed separately so that their sum is time of the pipeline
+STAGES = ['read_log', 'cls_log', 'prune', 'get_dense_region', 'count_candidates', 'format_clusters', 'generate_rule',
+          'write_rules']
+
+
+# write synthetic log file of a device and return its path
+# neighbors: number of neighbor devices, attributes: number of attributes of each neighbor
+def make_log_file(path, logs, neighbors, attributes, commands, seed=0):
+    rnd = random.Random(seed)
+    cmds = ['cmd%d' % i for i in range(commands)]
+    hours = [rnd.randrange(24) for _ in cmds]  # routine hour of each command
+
+    neigh = []
+    for n in range(neighbors):
+        values = []
+        for a in range(attributes):
+            values.append({'attribute': 'attr%d' % a, 'type': 'integer' if a % 2 == 0 else 'string'})
+        neigh.append({'device': 'neighbor-%d' % n, 'capability': 'sensor', 'value': values})
+
+    with open(path, 'w') as f:
+        f.write('{"device": "bench-device", "capability": "switch", "history": [\n')
+        for i in range(logs):
+            c = rnd.randrange(commands)
+            # most logs follow the routine of the command, others are noise
+            hour = hours[c] if rnd.random() < 0.7 else rnd.randrange(24)
+            log = {'timestamp': '2022-%02d-%02dT%02d:%02d:00.000Z' % (1 + i % 12, 1 + i % 28, hour, rnd.randrange(60)),
+                   'command': cmds[c]}
+            for n in range(neighbors):
+                log['neighbor-%d' % n] = [rnd.choice([20, 21, 22, 40, 41, 80]) if a % 2 == 0
+                                          else rnd.choice(['active', 'inactive', 'unknown'])
+                                          for a in range(attributes)]
+            f.write(('' if i == 0 else ',\n') + json.dumps(log))
+        f.write('\n], "neighbors": %s}\n' % json.dumps(neigh))
+
+    return path
+
+
+# return seconds spent on each stage of SelfAutomation pipeline for a log file
+def time_stages(path, dir_out):
+    automation = SelfAutomation()
+    sink = FileSink(os.path.join(dir_out, ''))
+    elapsed = dict.fromkeys(STAGES, 0.0)
+
+    t = time.perf_counter()
+    data = automation.read_log(path)
+    elapsed['read_log'] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    tables = automation.cls_log_table(data['history'])
+    elapsed['cls_log'] = time.perf_counter() - t
+
+    num_rules = 0
+    # same as mine_command() and write_rules() of run()
+    for cmd, table in tables.items():
+        if table.num_logs() < automation.min_sup:
+            continue
+
+        t = time.perf_counter()
+        table, _ = automation.prune_columns(table)
+        elapsed['prune'] += time.perf_counter() - t
+
+        t = time.perf_counter()
+        regions = automation.get_dense_region(table)
+        elapsed['get_dense_region'] += time.perf_counter() - t
+
+        t = time.perf_counter()
+        table, _ = automation.prune_columns(table, regions)
+        elapsed['prune'] += time.perf_counter() - t
+
+        t = time.perf_counter()
+        cand_dict = automation.count_candidates(regions, table)
+        elapsed['count_candidates'] += time.perf_counter() - t
+
+        t = time.perf_counter()
+        clusters = automation.format_clusters(cand_dict, regions, info=True)
+        elapsed['format_clusters'] += time.perf_counter() - t
+
+        t = time.perf_counter()
+        emitter = RuleEmitter(automation, data, cmd)
+        rules = [emitter.emit(cluster) for cluster in clusters]
+        elapsed['generate_rule'] += time.perf_counter() - t
+
+        t = time.perf_counter()
+        for idx, rule in enumerate(rules):
+            sink.write(automation.rule_file_name('bench.json', cmd, idx, len(rules)), rule)
+        elapsed['write_rules'] += time.perf_counter() - t
+        num_rules += len(rules)
+
+    return elapsed, num_rules
+
+
+# return list of configurations changing one parameter of BASE at a time
+def configurations(sweep, max_logs):
+    configs = []
+    for param, values in sweep.items():
+        for v in values:
+            config = dict(BASE, **{param: v})
+            if config['logs'] <= max_logs and config not in configs:
+                configs.append(config)
+    return configs
+
+
+def run_benchmark(sweep, max_logs, repeat):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for config in configurations(sweep, max_logs):
+            path = make_log_file(os.path.join(tmp, 'bench.json'), **config)
+            size = os.path.getsize(path)
+
+            # keep the fastest of repeated measurements of each stage
+            best = None
+            for _ in range(repeat):
+                elapsed, num_rules = time_stages(path, tmp)
+                best = elapsed if best is None else {k: min(best[k], v) for k, v in elapsed.items()}
+
+            results.append({'config': config, 'file_size': size, 'rules': num_rules, 'seconds': best})
+            print(json.dumps(results[-1]), flush=True)
+            os.remove(path)
+
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}
+
+
+# print ratio of time of each stage between two result files
+def compare(file_old, file_new):
+    with open(file_old) as f:
+        old = {json.dumps(r['config'], sort_keys=True): r for r in json.load(f)['results']}
+    with open(file_new) as f:
+        new = json.load(f)['results']
+
+    print('%-60s %-18s %10s %10s %8s' % ('config', 'stage', 'old(s)', 'new(s)', 'new/old'))
+    for r in new:
+        key = json.dumps(r['config'], sort_keys=True)
+        if key not in old:
+            continue
+        for stage in STAGES:
+            if stage not in old[key]['seconds']:  # result of earlier stages
+                continue
+            t_old = old[key]['seconds'][stage]
+            t_new = r['seconds'][stage]
+            ratio = t_new / t_old if t_old > 0 else float('inf')
+            print('%-60s %-18s %10.4f %10.4f %8.2f' % (key, stage, t_old, t_new, ratio))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark each stage of SelfAutomation pipeline')
+    parser.add_argument('--output', default='bench_results.json', help='file to save results')
+    parser.add_argument('--max-logs', type=int, default=max(SWEEP['logs']), help='skip longer histories')
+    parser.add_argument('--repeat', type=int, default=3, help='number of measurements of each configuration')
+    for param in SWEEP.keys():
+        parser.add_argument('--' + param, type=int, nargs='+', help='values of %s to sweep' % param)
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    sweep = {param: getattr(args, param) or values for param, values in SWEEP.items()}
+    report = run_benchmark(sweep, args.max_logs, args.repeat)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+import json
+from datetime import datetime
+
+
+# hyperparameters of SelfAutomation and building rules from clusters
+# kept apart from clustering, this module doesn't import NumPy so that rules of small histories are built quickly
+class AutomationBase:
+    BACKENDS = ('exact', 'fp_tree')  # ways of finding clusters among candidates
+
+    def __init__(self, input_dir='./logs/', param=None):
+        # set directory and hyperparameters
+        self.input_dir = input_dir
+        if param is None:
+            self.min_sup = 5  # minimum support
+            self.time_err = 3.75  # acceptable error of time component as an angle, equivalent to 15 minutes
+            self.num_err = 5  # acceptable error of integer component
+        else:
+            self.min_sup = param['min_sup']
+            self.time_err = param['time_err']
+            self.num_err = param['int_err']
+        # exact: clusters are logs sharing every dense region
+        # fp_tree: clusters are maximal combinations of dense regions shared by min_sup logs
+        self.backend = 'exact' if param is None else param.get('backend', 'exact')
+        if self.backend not in AutomationBase.BACKENDS:
+            raise ValueError('unknown backend: %s' % self.backend)
+
+    # write rules of each command to sink and return file names of rules as a list
+    def write_rules(self, data, cmd_rules, file_in, stats, sink):
+        file_names = []
+
+        # generate rules for each device command
+        for cmd, rules in cmd_rules.items():
+            with stats.stage('write_rules'):
+                sink.begin_command(data['device'], cmd)
+                for idx, rule in enumerate(rules):
+                    file_out = self.rule_file_name(file_in, cmd, idx, len(rules))
+                    file_names.append(file_out)
+                    stats.add_bytes(sink.write(file_out, rule))
+
+        return file_names
+
+    # return file name of idx-th rule among num_rules rules of a command
+    @staticmethod
+    def rule_file_name(file_in, cmd, idx, num_rules):
+        if num_rules == 1:
+            return file_in.split('.')[0] + '_' + cmd + '_rule.json'
+        return file_in.split('.')[0] + '_' + cmd + str(idx) + '_rule.json'
+
+    # Rule Generating
+    # return rule built from data and cluster
+    def generate_rule(self, data, cluster, cmd):
+        neigh_dict = {n['device']: n for n in data['neighbors']}
+
+        rule_name = self.construct_name(data['device'], neigh_dict.keys(), cmd)
+
+        # create rule
+        result = self.construct_result(data['device'], data['capability'], cmd)
+
+        if len(cluster) == 1 and cluster[0][0] == 'time':
+            # construct EveryAction if there's only time query
+            action = self.construct_EveryAction(cluster[0], result)
+        else:
+            action = self.construct_IfAction(cluster, neigh_dict, result)
+
+        return {'name': rule_name, 'actions': [action]}
+
+    # return name of rule
+    @staticmethod
+    def construct_name(device, neighbors, cmd):
+        name = device
+        for n in neighbors:
+            name = name + '-' + n
+        return name + '-' + cmd
+
+    # return result of rule ('then' part)
+    @staticmethod
+    def construct_result(device, cap, cmd):
+        action = [{'command': {"devices": [device], 'commands': [{'capability': cap, 'command': cmd}]}}]
+        return action
+
+    # return time operation with 'between'
+    # query given with form ('time', (mode, (min, max)))
+    @staticmethod
+    def time_operation(query):
+        start = query[1][1][0]
+        end = query[1][1][1]
+        return {'between': {'value': {'time': {'reference': 'Now'}},
+                            'start': {'time': {'hour': int(start[0:2]), 'minute': int(start[3:5])}},
+                            'end': {'time': {'hour': int(end[0:2]), 'minute': int(end[3:5])}}}}
+
+    # return numerical related operation
+    # query given with ({neighbor_device}, (mode, mean))
+    @staticmethod
+    def numeric_operation(query, attr):
+        if query[1][0] < query[1][1]:
+            # use 'greater_than' syntax if center <= mean
+            op = 'greater_than'
+        else:
+            # use 'less_than' syntax if center > mean
+            op = 'less_than'
+        return {op: {"left": {"device": {"devices": [query[0].split(':')[0]], "attribute": attr}},
+                     "right": {"integer": query[1][0]}}}
+
+    # return string related operation
+    # query given with ({neighbor_device}, value)
+    @staticmethod
+    def string_operation(query, attr):
+        operation = {"equals": {"left": {"device": {"devices": [query[0].split(':')[0]], "attribute": attr}},
+                                "right": {"string": query[1]}}}
+        return operation
+
+    # return condition in EveryAction format
+    @staticmethod
+    def construct_EveryAction(time_query, result):
+        hour = int(time_query[1][0][0:2])
+        minute = int(time_query[1][0][3:5])
+        operation = {'time': {'hour': hour, 'minute': minute}}
+
+        return {'every': {'specific': operation, 'actions': result}}
+
+    # return condition in IfAction format
+    def construct_IfAction(self, queries, devices, result):
+        operations = []
+        for q in queries:
+            if self.is_time(q):
+                operations.append(self.time_operation(q))
+            else:
+                info = q[0].split(':')
+                attr = devices[info[0]]['value'][int(info[1])]['attribute'] # retrieve device information
+                if self.is_numeric(q):
+                    operations.append(self.numeric_operation(q, attr))
+                else:
+                    operations.append(self.string_operation(q, attr))
+
+        # merge operations
+        if len(operations) == 1:
+            operations[0]['then'] = result
+            action = {'if': operations[0]}
+        else:
+            action = {'if': {'and': []}}
+            for op in operations:
+                action['if']['and'].append(op)
+            action['if']['then'] = result
+
+        return action
+
+    # Helper Functions
+    # return device usage logs as a dictionary
+    @staticmethod
+    def read_log(file_name):
+        try:
+            with open(file_name, "r") as f:
+                data = json.load(f)
+            return data
+        except FileNotFoundError as e:
+            print(e)
+            return None
+
+    # return log as a list of (name of component, value)
+    # angles: iterator of angles of time components already converted
+    @staticmethod
+    def format_log(log, angles=None):
+        new_log = []
+        for k, v in log.items():
+            # convert time component to angle representation
+            if AutomationBase.is_time([k, v]):
+                new_log.append(('time', AutomationBase.time_to_ang(v) if angles is None else next(angles)))
+            # split the list and name each component as "device_name:index"
+            elif type(v) is list:
+                for idx, elem in enumerate(v):
+                    new_log.append((k + ":" + str(idx), elem))
+            # remove command component
+            elif k != 'command':
+                new_log.append((k, v))
+
+        return new_log
+
+    # return true if point represents time component
+    @staticmethod
+    def is_time(point):
+        return (point[0] == 'timestamp') or (point[0] == 'time')
+
+    # return true if point represents numerical component
+    @staticmethod
+    def is_numeric(point):
+        return isinstance(point[1], (int, float, complex)) or isinstance(point[1][0], (int, float, complex))
+
+    # convert string representation of time to angle
+    @staticmethod
+    def time_to_ang(str_time):
+        frmt = '%H:%M'
+        dt = datetime.strptime(str_time[11:16], frmt)
+
+        return (dt.hour * 60 + dt.minute) / 4
+
+    # convert angle to string representation of time
+    @staticmethod
+    def ang_to_time(angle):
+        minute = angle * 4
+        if minute >= 1440:
+            minute -= 1440
+        return '%02i:%02i' % divmod(minute, 60)
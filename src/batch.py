@@ -0,0 +1,88 @@
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .rule_sink import ListSink
+from .self_automation import SelfAutomation
+
+
+# export rules of every log file in source using a pool of worker processes
+# source: directory of log files or glob pattern, workers: number of processes (None: number of CPUs)
+# sink: RuleSink receiving rules of every file in order of files instead of dir_out
+# return manifest as a dictionary, key: path of log file, value: {'rules': list of file names} or {'error': message}
+# when a worker process dies, files not finished are run again one at a time, so only the file killing its
+# worker is reported as an error
+def run_batch(source, dir_out='./output/', param=None, workers=None, sink=None):
+    files = list_log_files(source)
+    collect = sink is not None
+
+    manifest = {}
+    if workers == 1:    # serial execution
+        for file in files:
+            manifest[file] = run_file(file, dir_out, param, collect)
+    else:
+        unfinished = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_file, file, dir_out, param, collect) for file in files]
+            for file, future in zip(files, futures):
+                try:
+                    manifest[file] = future.result()
+                except BrokenProcessPool:  # a worker process died, every pending file fails
+                    unfinished.append(file)
+                except Exception as e:
+                    manifest[file] = {'error': repr(e)}
+
+        manifest.update(run_isolated(unfinished, dir_out, param, collect))
+        manifest = {file: manifest[file] for file in files}
+
+    # rules collected by workers are written by this process
+    if collect:
+        for entry in manifest.values():
+            if 'collected' in entry:
+                entry.pop('collected').replay(sink)
+
+    return manifest
+
+
+# run files one at a time in a worker process and return their entries of manifest
+# pool is created again after a file kills its worker
+def run_isolated(files, dir_out, param=None, collect=False):
+    manifest = {}
+    executor = None
+    try:
+        for file in files:
+            if executor is None:
+                executor = ProcessPoolExecutor(max_workers=1)
+            try:
+                manifest[file] = executor.submit(run_file, file, dir_out, param, collect).result()
+            except BrokenProcessPool as e:
+                manifest[file] = {'error': repr(e)}
+                executor.shutdown()
+                executor = None
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return manifest
+
+
+# return sorted list of log files in directory or matching glob pattern
+def list_log_files(source):
+    if os.path.isdir(source):
+        source = os.path.join(source, '*.json')
+    return sorted(f for f in glob.glob(source) if os.path.isfile(f))
+
+
+# export rules of one log file and return entry of manifest
+# collect: return rules as 'collected' of entry instead of writing them
+def run_file(file, dir_out, param=None, collect=False):
+    automation = SelfAutomation(os.path.join(os.path.dirname(file), ''), param)
+    sink = ListSink() if collect else None
+    try:
+        names = automation.run(os.path.basename(file), dir_out, sink=sink)
+    except Exception as e:
+        return {'error': repr(e)}
+
+    if collect:
+        return {'rules': names, 'collected': sink}
+    return {'rules': names}
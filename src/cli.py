@@ -0,0 +1,54 @@
+import os
+import sys
+import argparse
+
+# log files up to this size(bytes) are mined without NumPy, importing NumPy takes longer than mining them
+FAST_PATH_SIZE = 256 * 1024
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='generate rules of a log file')
+    parser.add_argument('log_file', help='log file of a device')
+    parser.add_argument('-o', '--output', default='./output/', help='directory to write rule files')
+    parser.add_argument('--ndjson', help='file to write every rule as a line instead of output directory')
+    parser.add_argument('--min-sup', type=int, default=5)
+    parser.add_argument('--time-err', type=float, default=3.75)
+    parser.add_argument('--int-err', type=float, default=5)
+    parser.add_argument('--backend', choices=('exact', 'fp_tree'), default='exact')
+    parser.add_argument('--fast-path-size', type=int, default=FAST_PATH_SIZE,
+                        help='log files up to this size(bytes) are mined in pure python, 0 to always use NumPy')
+    return parser, parser.parse_args(argv)
+
+
+# export rules of log file and print their names, modules of mining are imported only when needed
+def main(argv=None):
+    parser, args = parse_args(argv)
+    if not os.path.isfile(args.log_file):
+        parser.error('no such log file: %s' % args.log_file)
+
+    input_dir, file_in = os.path.split(args.log_file)
+    input_dir = os.path.join(input_dir, '')
+    dir_out = os.path.join(args.output, '')
+    param = {'min_sup': args.min_sup, 'time_err': args.time_err, 'int_err': args.int_err, 'backend': args.backend}
+
+    if args.backend == 'exact' and os.path.getsize(args.log_file) <= args.fast_path_size:
+        from .small import SmallAutomation as Automation
+    else:
+        from .self_automation import SelfAutomation as Automation
+    automation = Automation(input_dir, param)
+
+    if args.ndjson is None:
+        os.makedirs(dir_out, exist_ok=True)
+        names = automation.run(file_in, dir_out)
+    else:
+        from .rule_sink import NDJSONSink
+        with NDJSONSink(args.ndjson) as sink:
+            names = automation.run(file_in, sink=sink)
+
+    for name in names:
+        print(name)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
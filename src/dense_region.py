@@ -0,0 +1,25 @@
+# summary of a dense 1-region of time or numeric component
+class DenseRegion:
+    __slots__ = ('start', 'end', 'count', 'mode', 'total')
+
+    # start, end: smallest and largest value, start > end for date changing interval of time component
+    # count: number of values, mode: most frequent value, total: sum of values
+    def __init__(self, start, end, count, mode, total):
+        self.start = start
+        self.end = end
+        self.count = count
+        self.mode = mode
+        self.total = total
+
+    # return mean of values in region
+    def mean(self):
+        return self.total / self.count
+
+    def __eq__(self, other):
+        if not isinstance(other, DenseRegion):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in DenseRegion.__slots__)
+
+    def __repr__(self):
+        return 'DenseRegion(%r, %r, count=%r, mode=%r, total=%r)' % (self.start, self.end, self.count, self.mode,
+                                                                      self.total)
@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import mmap
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from .rule_sink import ListSink
+from .self_automation import SelfAutomation
+
+# record written with 'device' as its first member, group 1 is device as JSON string content
+RECORD_PATTERN = re.compile(rb'^[ \t]*\{[ \t]*"device"[ \t]*:[ \t]*"((?:[^"\\\n]|\\.)*)"[^\n]*', re.MULTILINE)
+
+
+# index of records of each device in a newline-delimited export of every device
+# each line of export is a JSON object with 'device', a record with 'timestamp' is a log of history of the device,
+# members of other records such as 'capability' and 'neighbors' are information of the device
+# ex) {"device": "light", "capability": "switch", "neighbors": [...]}
+#     {"device": "light", "timestamp": "2022-01-01T04:00:00.000Z", "command": "on", "sensor": ["active"]}
+# lines that are not a JSON object with 'device' are skipped instead of failing whole export
+class FleetIndex:
+    # offsets: dictionary of key: device, value: array of start and end offset of each record
+    # skipped: array of start and end offset of each skipped line
+    def __init__(self, path, offsets, skipped=None):
+        self.path = path
+        self.offsets = offsets
+        self.skipped = array('q') if skipped is None else skipped
+
+    # scan export once and return index of its records, devices are kept in order of appearance
+    @classmethod
+    def build(cls, path):
+        offsets = {}
+        skipped = array('q')
+        if os.path.getsize(path) == 0:  # empty file can't be mapped
+            return cls(path, offsets, skipped)
+
+        raw = {}  # key: device as in export, value: array of offsets
+        with open(path, 'rb') as f, _map(f) as mm:
+            start = 0
+            for match in RECORD_PATTERN.finditer(mm):
+                # records between matched records, device is not the first member
+                if match.start() > start:
+                    cls.scan_lines(mm, start, match.start(), raw, skipped)
+
+                device = match.group(1)
+                if device not in raw:
+                    raw[device] = array('q')
+                raw[device].extend(match.span())
+                start = match.end() + 1
+            cls.scan_lines(mm, start, len(mm), raw, skipped)
+
+        for device, device_offsets in raw.items():
+            if isinstance(device, bytes):
+                device = json.loads(b'"' + device + b'"')
+            if device in offsets:  # same device written with different escapes
+                offsets[device] = array('q', sorted_pairs(offsets[device] + device_offsets))
+            else:
+                offsets[device] = device_offsets
+        return cls(path, offsets, skipped)
+
+    # add offsets of records in [start, end) of export to raw, parsing each record
+    # offsets of lines that are not a record of a device are added to skipped
+    @staticmethod
+    def scan_lines(mm, start, end, raw, skipped):
+        while start < end:
+            line_end = mm.find(b'\n', start, end)
+            if line_end < 0:
+                line_end = end
+
+            if mm[start:line_end].strip():
+                try:
+                    device = json.loads(mm[start:line_end])['device']
+                except (ValueError, KeyError, TypeError):  # invalid JSON, or not an object with device
+                    device = None
+                if not isinstance(device, str):
+                    skipped.extend((start, line_end))
+                    start = line_end + 1
+                    continue
+
+                if device not in raw:
+                    raw[device] = array('q')
+                raw[device].extend((start, line_end))
+            start = line_end + 1
+
+    def devices(self):
+        return list(self.offsets.keys())
+
+    # return number of records of device
+    def num_records(self, device):
+        return len(self.offsets[device]) // 2
+
+    # return number of skipped lines
+    def num_skipped(self):
+        return len(self.skipped) // 2
+
+    # return data of device in format of log file
+    def load(self, device):
+        with open(self.path, 'rb') as f, _map(f) as mm:
+            return read_device(mm, device, self.offsets[device])
+
+
+# return offsets of pairs in order of start offset
+def sorted_pairs(offsets):
+    pairs = sorted(zip(offsets[::2], offsets[1::2]))
+    return [offset for pair in pairs for offset in pair]
+
+
+# return data of device in format of log file from its records in mapped export
+# records that are not valid JSON, such as truncated lines, are skipped and their offsets added to skipped
+def read_device(mm, device, offsets, skipped=None):
+    data = {'device': device}
+    history = []
+    for i in range(0, len(offsets), 2):
+        try:
+            record = json.loads(mm[offsets[i]:offsets[i + 1]])
+        except ValueError:
+            if skipped is not None:
+                skipped.extend((offsets[i], offsets[i + 1]))
+            continue
+        del record['device']
+        if 'timestamp' in record:
+            history.append(record)
+        else:
+            data.update(record)
+
+    data.setdefault('capability', None)
+    data.setdefault('neighbors', [])
+    data['history'] = history
+    return data
+
+
+# export rules of every device in export using a pool of worker processes
+# devices are split into shards, each worker maps export itself and receives only offsets of records of its devices
+# rules of device are named after '<device>.json' as a log file, other arguments are same as run_batch()
+# return manifest as a dictionary, key: device, value: {'rules': list of file names} or {'error': message}
+# entry of device with malformed records has 'skipped': number of skipped records
+def run_fleet(path, dir_out='./output/', param=None, workers=None, sink=None, index=None, shards=None):
+    index = FleetIndex.build(path) if index is None else index
+    collect = sink is not None
+
+    manifest = {}
+    if workers == 1:    # serial execution
+        manifest.update(run_shard(path, list(index.offsets.items()), dir_out, param, collect))
+    else:
+        shards = split_shards(index, shards or 4 * (workers or os.cpu_count() or 1))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_shard, path, shard, dir_out, param, collect) for shard in shards]
+            for shard, future in zip(shards, futures):
+                try:
+                    manifest.update(future.result())
+                except Exception as e:  # worker process died
+                    manifest.update({device: {'error': repr(e)} for device, _ in shard})
+
+        manifest = {device: manifest[device] for device in index.offsets}
+
+    # rules collected by workers are written by this process
+    if collect:
+        for entry in manifest.values():
+            if 'collected' in entry:
+                entry.pop('collected').replay(sink)
+
+    return manifest
+
+
+# split devices of index into at most num_shards lists of (device, offsets) with similar number of records
+# devices are kept in order of appearance in each shard
+def split_shards(index, num_shards):
+    shards = [[] for _ in range(max(1, min(num_shards, len(index.offsets))))]
+    sizes = [0] * len(shards)
+
+    # largest devices first, each to the smallest shard
+    for device in sorted(index.offsets, key=lambda d: -len(index.offsets[d])):
+        i = sizes.index(min(sizes))
+        shards[i].append(device)
+        sizes[i] += len(index.offsets[device])
+
+    order = {device: i for i, device in enumerate(index.offsets)}
+    return [[(device, index.offsets[device]) for device in sorted(shard, key=order.get)] for shard in shards if shard]
+
+
+# export rules of devices of a shard and return entries of manifest
+def run_shard(path, shard, dir_out, param=None, collect=False):
+    automation = SelfAutomation(param=param)
+    manifest = {}
+    if len(shard) == 0:
+        return manifest
+
+    with open(path, 'rb') as f, _map(f) as mm:
+        for device, offsets in shard:
+            sink = ListSink() if collect else None
+            skipped = []
+            try:
+                data = read_device(mm, device, offsets, skipped)
+                names = automation.run_data(data, device + '.json', dir_out, sink=sink)
+            except Exception as e:
+                manifest[device] = {'error': repr(e)}
+                continue
+
+            manifest[device] = {'rules': names, 'collected': sink} if collect else {'rules': names}
+            if len(skipped) > 0:
+                manifest[device]['skipped'] = len(skipped) // 2
+    return manifest
+
+
+# return read-only memory map of whole file
+def _map(f):
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
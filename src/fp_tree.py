@@ -0,0 +1,134 @@
+from collections import Counter
+
+
+# node of FPTree, count is number of transactions sharing path from root to node
+class FPNode:
+    __slots__ = ('item', 'count', 'parent', 'children')
+
+    def __init__(self, item, parent):
+        self.item = item
+        self.count = 0
+        self.parent = parent
+        self.children = {}
+
+
+# prefix tree of weighted transactions keeping only items satisfying minimum support
+# items of each transaction are inserted in order of decreasing support
+# items included in every transaction are kept in common instead of tree
+class FPTree:
+    def __init__(self, transactions, counts, min_sup):
+        transactions = list(transactions)
+        counts = list(counts)
+        total = sum(counts)
+        support = Counter()
+        for trans, cnt in zip(transactions, counts):
+            for item in trans:
+                support[item] += cnt
+
+        self.common = [item for item, cnt in support.items() if cnt == total and cnt >= min_sup]
+        # other frequent items in order of decreasing support, ties in order of appearance
+        self.items = sorted([item for item, cnt in support.items() if min_sup <= cnt < total],
+                            key=lambda i: -support[i])
+        self.support = {item: support[item] for item in self.items}
+        self.min_sup = min_sup
+        self.total = total
+
+        rank = {item: r for r, item in enumerate(self.items)}
+        self.root = FPNode(None, None)
+        self.header = {item: [] for item in self.items}  # key: item, value: nodes of item
+        for trans, cnt in zip(transactions, counts):
+            self.insert(sorted([item for item in trans if item in rank], key=rank.get), cnt)
+
+    def insert(self, items, count):
+        node = self.root
+        for item in items:
+            child = node.children.get(item)
+            if child is None:
+                child = FPNode(item, node)
+                node.children[item] = child
+                self.header[item].append(child)
+            child.count += count
+            node = child
+
+    # return nodes of tree from root if tree is a single path, None otherwise
+    def single_path(self):
+        path = []
+        node = self.root
+        while len(node.children) > 0:
+            if len(node.children) > 1:
+                return None
+            node = next(iter(node.children.values()))
+            path.append(node)
+        return path
+
+    # return tree of transactions including item, without item and less frequent items
+    def conditional(self, item):
+        paths = []
+        counts = []
+        for node in self.header[item]:
+            path = []
+            parent = node.parent
+            while parent.item is not None:
+                path.append(parent.item)
+                parent = parent.parent
+            paths.append(path[::-1])
+            counts.append(node.count)
+        return FPTree(paths, counts, self.min_sup)
+
+
+# itemsets with their supports, indexed by items to find itemsets including another
+class ItemsetIndex:
+    def __init__(self):
+        self.itemsets = {}  # key: frozenset of items, value: support
+        self.postings = {}  # key: item, value: itemsets including item
+
+    def add(self, itemset, support):
+        if itemset in self.itemsets:
+            return
+        self.itemsets[itemset] = support
+        for item in itemset:
+            self.postings.setdefault(item, []).append(itemset)
+
+    # return true if an itemset other than itemset includes it
+    def covers(self, itemset):
+        shortest = min((self.postings.get(item, ()) for item in itemset), key=len)
+        return any(itemset <= other and itemset != other for other in shortest)
+
+
+# return dictionary of maximal frequent itemsets
+# key: frozenset of items, value: number of transactions including itemset
+# transactions: iterables of items, counts: number of occurrences of each transaction
+def maximal_itemsets(transactions, counts, min_sup):
+    found = ItemsetIndex()
+    _mine_maximal(FPTree(transactions, counts, min_sup), (), found)
+
+    # remove itemsets included in larger ones
+    maximal = ItemsetIndex()
+    for itemset in sorted(found.itemsets.keys(), key=len, reverse=True):
+        if not maximal.covers(itemset):
+            maximal.add(itemset, found.itemsets[itemset])
+    return maximal.itemsets
+
+
+# add itemsets extending suffix with items of tree, skipping those included in found itemsets
+# support of suffix is total count of transactions of tree
+def _mine_maximal(tree, suffix, found):
+    suffix = suffix + tuple(tree.common)
+    if len(tree.items) == 0:
+        if len(suffix) > 0:
+            found.add(frozenset(suffix), tree.total)
+        return
+
+    # every extension of suffix is included in an itemset already found
+    head = frozenset(suffix).union(tree.items)
+    if head in found.itemsets or found.covers(head):
+        return
+
+    path = tree.single_path()
+    if path is not None:    # only extension with whole path can be maximal
+        found.add(head, path[-1].count)
+        return
+
+    # least frequent items first
+    for item in reversed(tree.items):
+        _mine_maximal(tree.conditional(item), suffix + (item,), found)
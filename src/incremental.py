@@ -0,0 +1,109 @@
+from collections import Counter
+
+from .self_automation import SelfAutomation
+from .rule_emitter import RuleEmitter
+from .dense_region import DenseRegion
+
+
+# mine rules from logs given in several parts without clustering whole history again
+# rules are the same as SelfAutomation on history of every log given so far
+class IncrementalMiner(SelfAutomation):
+    def __init__(self, data, input_dir='./logs/', param=None):
+        super().__init__(input_dir, param)
+
+        # device information except history
+        self.data = {k: v for k, v in data.items() if k != 'history'}
+        self.num_logs = 0
+
+        # state of each command
+        self.logs = {}  # key: command, value: Counter of distinct logs
+        self.values = {}  # key: command, value: dictionary of key: name of component, value: Counter of values
+        self.new_logs = {}  # key: command, value: logs added after last clustering
+        self.regions = {}  # key: command, value: dense 1-regions of last clustering
+        self.candidates = {}  # key: command, value: number of logs of each candidate cluster
+        self.clusters = {}  # key: command, value: clusters of last clustering
+
+        if 'history' in data:
+            self.update(data['history'])
+
+    # add new logs to state
+    def update(self, new_records):
+        for cmd, logs in self.cls_log(new_records).items():
+            for log in logs:
+                self.add_log(cmd, tuple(log))
+
+    # add formatted log of command to state
+    def add_log(self, cmd, log):
+        if cmd not in self.logs:
+            self.logs[cmd] = Counter()
+            self.values[cmd] = {}
+            self.new_logs[cmd] = []
+
+        values = self.values[cmd]
+        self.logs[cmd][log] += 1
+        for key, val in log:
+            if key not in values:
+                values[key] = Counter()
+            values[key][val] += 1
+
+        self.new_logs[cmd].append(log)
+        self.num_logs += 1
+
+    # return current rules as a dictionary, key: command, value: list of rules
+    def rules(self):
+        if self.num_logs < self.min_sup:
+            return {}
+
+        rules = {}
+        for cmd in self.commands():
+            emitter = RuleEmitter(self, self.data, cmd)
+            rules[cmd] = [emitter.emit(log) for log in self.cluster_command(cmd)]
+        return rules
+
+    # return commands in order of appearance
+    def commands(self):
+        return list(self.logs.keys())
+
+    # return clusters of command, clustering only new logs if dense 1-regions are unchanged
+    def cluster_command(self, cmd):
+        if len(self.new_logs[cmd]) == 0:
+            return self.clusters[cmd]
+
+        dense_regions = self.value_regions(cmd)
+
+        # candidates depend only on boundaries of dense 1-regions
+        if cmd in self.regions and self.region_bounds(self.regions[cmd]) == self.region_bounds(dense_regions):
+            # count candidates of new logs only
+            cand_dict = self.candidates[cmd]
+            for cand, cnt in self.count_candidates(dense_regions, self.new_logs[cmd]).items():
+                cand_dict[cand] = cand_dict.get(cand, 0) + cnt
+        else:
+            logs, counts = self.split_counts(self.logs[cmd])
+            cand_dict = self.count_candidates(dense_regions, logs, counts)
+
+        self.regions[cmd] = dense_regions
+        self.candidates[cmd] = cand_dict
+        selected = self.select_candidates(cand_dict, dense_regions)
+        self.clusters[cmd] = self.format_clusters(selected, dense_regions, info=True)
+        self.new_logs[cmd] = []
+
+        return self.clusters[cmd]
+
+    # return dense 1-regions of command from counts of values
+    def value_regions(self, cmd):
+        dense_regions = {}
+        for key, counter in self.values[cmd].items():
+            category, regions = self.get_component_regions(key, list(counter.keys()), list(counter.values()))
+            if len(regions) > 0:
+                dense_regions[category] = regions
+        return dense_regions
+
+    # return boundaries of time and numeric regions and values of string regions
+    def region_bounds(self, dense_regions):
+        bounds = {}
+        for key, regions in dense_regions.items():
+            if isinstance(regions[0], DenseRegion):
+                bounds[key] = [(r.start, r.end) for r in regions]
+            else:
+                bounds[key] = regions
+        return bounds
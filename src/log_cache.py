@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import hashlib
+
+import numpy as np
+
+from .log_table import Column, LogTable
+
+VERSION = 1  # version of cache format, entries of other versions are ignored
+
+
+# on-disk cache of formatted logs of log files
+# entries are .npz files named after content hash of log file, index.json keeps
+# path, size, mtime of each log file and last access time of each entry
+# least recently used entries are removed when total size exceeds max_bytes
+class LogCache:
+    def __init__(self, cache_dir, max_bytes=1 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.index = self.read_index()
+
+    # return device information and dictionary of key: command, value: LogTable, None if not cached
+    def load(self, file_name):
+        digest = self.digest(file_name)
+        entry = self.index['entries'].get(digest)
+        if entry is None:
+            return None
+
+        try:
+            with np.load(self.entry_path(digest)) as npz:
+                cached = self.from_arrays(npz)
+        except (OSError, ValueError, KeyError):  # entry removed or broken
+            self.remove(digest)
+            self.write_index()
+            return None
+
+        entry['used'] = time.time()
+        self.write_index()
+        return cached
+
+    # save formatted logs of log file
+    def store(self, file_name, data, tables):
+        digest = self.digest(file_name)
+        path = self.entry_path(digest)
+
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, **self.to_arrays(data, tables))
+        os.replace(tmp, path)
+
+        self.index['entries'][digest] = {'size': os.path.getsize(path), 'used': time.time()}
+        self.evict()
+        self.write_index()
+
+    # return content hash of log file, reusing hash recorded with same path, size and mtime
+    def digest(self, file_name):
+        st = os.stat(file_name)
+        key = os.path.abspath(file_name)
+        recorded = self.index['files'].get(key)
+        if recorded is not None and recorded['size'] == st.st_size and recorded['mtime'] == st.st_mtime_ns:
+            return recorded['digest']
+
+        h = hashlib.sha256()
+        with open(file_name, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+
+        self.index['files'][key] = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'digest': digest}
+        return digest
+
+    # remove least recently used entries until total size fits in max_bytes
+    def evict(self):
+        entries = self.index['entries']
+        total = sum(e['size'] for e in entries.values())
+        for digest in sorted(entries.keys(), key=lambda d: entries[d]['used']):
+            if total <= self.max_bytes:
+                break
+            total -= entries[digest]['size']
+            self.remove(digest)
+
+    def remove(self, digest):
+        self.index['entries'].pop(digest, None)
+        try:
+            os.remove(self.entry_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def entry_path(self, digest):
+        return os.path.join(self.cache_dir, digest + '.npz')
+
+    def read_index(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if index.get('version') == VERSION:
+                return index
+        except (FileNotFoundError, ValueError):
+            pass
+        return {'version': VERSION, 'files': {}, 'entries': {}}
+
+    def write_index(self):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
+
+    # return arrays of tables with header describing device and columns
+    @staticmethod
+    def to_arrays(data, tables):
+        arrays = {}
+        commands = []
+        for i, (cmd, table) in enumerate(tables.items()):
+            columns = []
+            for j, (key, column) in enumerate(table.columns.items()):
+                arrays['%d_%d_values' % (i, j)] = column.values
+                if column.rows is not None:
+                    arrays['%d_%d_rows' % (i, j)] = column.rows
+                columns.append({'key': key, 'kind': column.kind, 'categories': column.categories})
+            if table.counts is not None:
+                arrays['%d_counts' % i] = table.counts
+            commands.append({'command': cmd, 'size': table.size, 'columns': columns})
+
+        header = {'data': data, 'commands': commands}
+        arrays['header'] = np.array(json.dumps(header))
+        return arrays
+
+    # return device information and tables from arrays of to_arrays()
+    @staticmethod
+    def from_arrays(arrays):
+        header = json.loads(arrays['header'].item())
+
+        tables = {}
+        for i, cmd in enumerate(header['commands']):
+            columns = {}
+            for j, col in enumerate(cmd['columns']):
+                rows_name = '%d_%d_rows' % (i, j)
+                rows = arrays[rows_name] if rows_name in arrays else None
+                columns[col['key']] = Column(col['kind'], arrays['%d_%d_values' % (i, j)], rows, col['categories'])
+            counts = arrays['%d_counts' % i] if '%d_counts' % i in arrays else None
+            tables[cmd['command']] = LogTable(columns, cmd['size'], counts)
+
+        return header['data'], tables
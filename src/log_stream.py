@@ -0,0 +1,91 @@
+import json
+
+
+# read members of a json log file one at a time without loading whole file
+# yields (key, value) for each top-level member of the file
+# elements of 'history' are yielded one by one as ('history', log)
+def iter_log(file_name, chunk_size=1 << 20):
+    with open(file_name, 'r') as f:
+        reader = _ChunkReader(f, chunk_size)
+
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+
+        while True:
+            key = reader.decode()
+            reader.expect(':')
+
+            if key == 'history':
+                reader.expect('[')
+                if reader.peek() == ']':
+                    reader.expect(']')
+                else:
+                    while True:
+                        yield key, reader.decode()
+                        if reader.expect(',]') == ']':
+                            break
+            else:
+                yield key, reader.decode()
+
+            if reader.expect(',}') == '}':
+                return
+
+
+# buffered reader decoding json values from a text file
+class _ChunkReader:
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    # read next chunk and drop consumed part of buffer, return false at the end of file
+    def fill(self, size=None):
+        if self.eof:
+            return False
+        chunk = self.f.read(size or self.chunk_size)
+        if chunk == '':
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    # return next non-whitespace character without consuming it
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\n\r':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError('unexpected end of log file')
+
+    # consume one of the expected characters and return it
+    def expect(self, chars):
+        c = self.peek()
+        if c not in chars:
+            raise ValueError('expected one of %r but found %r' % (chars, c))
+        self.pos += 1
+        return c
+
+    # decode next json value
+    def decode(self):
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # a number may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # value is longer than buffer, read more
+            self.fill(size)
+            size *= 2
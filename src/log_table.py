@@ -0,0 +1,117 @@
+import numpy as np
+from array import array
+
+# kinds of column
+TIME = 'time'
+NUMERIC = 'numeric'
+STRING = 'string'
+
+
+# values of one component of logs
+class Column:
+    __slots__ = ('kind', 'values', 'rows', 'categories')
+
+    # values: angles of time, numbers, or codes of string values in categories
+    # rows: indices of logs holding the component, None if every log holds it
+    def __init__(self, kind, values, rows=None, categories=None):
+        self.kind = kind
+        self.values = values
+        self.rows = rows
+        self.categories = categories
+
+    # return values of the column as python objects
+    def decode(self):
+        if self.kind == STRING:
+            return [self.categories[c] for c in self.values.tolist()]
+        return self.values.tolist()
+
+
+# logs of a command stored as a column for each component
+class LogTable:
+    __slots__ = ('columns', 'counts', 'size')
+
+    # columns: dictionary of key: name of component, value: Column
+    # counts: number of occurrences of each log, None if every log occurs once
+    def __init__(self, columns, size, counts=None):
+        self.columns = columns
+        self.size = size
+        self.counts = counts
+
+    # return number of occurrences of logs holding the column, None if every log occurs once
+    def column_counts(self, column):
+        if self.counts is None or column.rows is None:
+            return self.counts
+        return self.counts[column.rows]
+
+    # return total number of logs
+    def num_logs(self):
+        if self.counts is None:
+            return self.size
+        return int(self.counts.sum())
+
+    # return table built from logs given as lists of (name of component, value)
+    @staticmethod
+    def from_logs(logs, counts=None):
+        builder = TableBuilder()
+        for log in logs:
+            builder.add(log)
+        return builder.build(counts)
+
+
+# build LogTable by adding logs one by one
+class TableBuilder:
+    def __init__(self):
+        self.size = 0
+        self.columns = {}  # key: name of component, value: _ColumnBuilder
+
+    # add log given as an iterable of (name of component, value)
+    def add(self, log):
+        for key, val in log:
+            if key not in self.columns:
+                self.columns[key] = _ColumnBuilder(key, val)
+            self.columns[key].append(self.size, val)
+        self.size += 1
+
+    def build(self, counts=None):
+        if counts is not None:
+            counts = np.asarray(counts, dtype=np.int64)
+        columns = {key: col.build(self.size) for key, col in self.columns.items()}
+        return LogTable(columns, self.size, counts)
+
+
+# values of a column collected in typed arrays
+class _ColumnBuilder:
+    def __init__(self, key, val):
+        if key == 'time' or key == 'timestamp':
+            self.kind = TIME
+            self.values = array('d')
+        elif isinstance(val, (int, float)):
+            self.kind = NUMERIC
+            # converted to floating point if a float value comes in, values of rules are then floats as well
+            self.values = array('q')
+        else:
+            self.kind = STRING
+            self.values = array('i')
+            self.categories = {}  # key: string value, value: code in order of appearance
+        self.rows = array('q')
+
+    def append(self, row, val):
+        if self.kind == STRING:
+            code = self.categories.get(val)
+            if code is None:
+                code = len(self.categories)
+                self.categories[val] = code
+            val = code
+        elif self.values.typecode == 'q' and not isinstance(val, int):
+            self.values = array('d', self.values)
+
+        self.values.append(val)
+        self.rows.append(row)
+
+    def build(self, size):
+        rows = None if len(self.rows) == size else np.frombuffer(self.rows, dtype=np.int64)
+        values = np.array(self.values)
+
+        if self.kind == STRING:
+            return Column(STRING, values, rows, list(self.categories.keys()))
+        return Column(self.kind, values, rows)
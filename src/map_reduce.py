@@ -0,0 +1,210 @@
+import os
+import numpy as np
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .self_automation import SelfAutomation
+from .rule_sink import FileSink
+from .rule_emitter import RuleEmitter
+from .run_stats import NULL_STATS
+from .log_table import TIME, NUMERIC, STRING
+
+_shared = {}  # histories read by forked workers instead of receiving chunks, key: id of history, value: history
+_tables = {}  # formatted logs of shared chunks kept by worker between phases, key: (id of history, start, end)
+
+
+# SelfAutomation clustering history of one device in chunks over a pool of processes
+# map phase formats each chunk of history and summarizes values of each component, then counts candidates of the
+# chunk, reduce phase merges them into the same dense 1-regions and candidates as clustering whole history
+# only summaries and candidates are sent back, formatted logs stay in workers
+# pool: Executor running map phase, a process pool of workers is created for each run if not given
+class MapReduceAutomation(SelfAutomation):
+    def __init__(self, input_dir='./logs/', param=None, pool=None, workers=None, chunk_size=None):
+        super().__init__(input_dir, param)
+        self.pool = pool
+        self.workers = workers
+        self.chunk_size = chunk_size or SelfAutomation.CHUNK_SIZE
+
+    # pool is not sent to workers
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['pool'] = None
+        return state
+
+    # export self-generated rules and return file names of exported rules as a list, same as run() of SelfAutomation
+    def run(self, file_in, dir_out='./output/', stats=None, sink=None):
+        stats = NULL_STATS if stats is None else stats
+        sink = FileSink(dir_out) if sink is None else sink
+
+        with stats.stage('read_log'):
+            data = self.read_log(self.input_dir + file_in)
+        stats.record_read(len(data['history']))
+        sink.begin_device(data['device'])
+
+        if len(data['history']) < self.min_sup:
+            print("No rule is detected")
+            return []
+
+        return self.write_rules(data, self.mine_history(data, stats), file_in, stats, sink)
+
+    # return rules of each command of history of data as generate_rules()
+    def mine_history(self, data, stats=NULL_STATS):
+        history = data['history']
+        bounds = [(i, min(i + self.chunk_size, len(history))) for i in range(0, len(history), self.chunk_size)]
+        if self.pool is not None:
+            return self.mine_chunks(data, self.pool, [history[start:end] for start, end in bounds], stats)
+
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            with ProcessPoolExecutor(self.workers) as pool:
+                return self.mine_chunks(data, pool, [history[start:end] for start, end in bounds], stats)
+
+        # workers forked after history is shared take their chunks from it, logs are not sent to workers
+        key = id(history)
+        _shared[key] = history
+        try:
+            workers = min(self.workers or os.cpu_count() or 1, len(bounds))
+            with PinnedPool(workers, multiprocessing.get_context('fork')) as pool:
+                return self.mine_chunks(data, pool, [SharedChunk(key, start, end) for start, end in bounds], stats)
+        finally:
+            del _shared[key]
+
+    # chunks: lists of logs or SharedChunk of history
+    def mine_chunks(self, data, pool, chunks, stats):
+        with stats.stage('map_values'):
+            summaries = list(pool.map(map_values, chunks))
+        with stats.stage('reduce_values'):
+            dense_regions = self.reduce_values(summaries)
+
+        with stats.stage('map_candidates'):
+            cand_dicts = list(pool.map(map_candidates, [self] * len(chunks), [dense_regions] * len(chunks), chunks))
+        with stats.stage('reduce_candidates'):
+            cand_dicts = self.reduce_candidates(cand_dicts)
+
+        rules = {}
+        for cmd, dense in dense_regions.items():
+            cand_dict = self.select_candidates(cand_dicts.get(cmd, {}), dense)
+            clusters = self.format_clusters(cand_dict, dense, info=True)
+            stats.record_clusters(cmd, len(cand_dict), len(clusters))
+
+            emitter = RuleEmitter(self, data, cmd)
+            rules[cmd] = [emitter.emit(log) for log in clusters]
+        return rules
+
+    # return dense 1-regions of each command from summaries of values of chunks
+    def reduce_values(self, summaries):
+        merged = {}  # key: command, value: dictionary of key: name of component, value: (kind, list of summaries)
+        for summary in summaries:
+            for cmd, columns in summary.items():
+                cmd_columns = merged.setdefault(cmd, {})
+                for key, (kind, values, counts) in columns.items():
+                    cmd_columns.setdefault(key, (kind, []))[1].append((values, counts))
+
+        dense_regions = {}
+        for cmd, columns in merged.items():
+            dense_regions[cmd] = {}
+            for key, (kind, parts) in columns.items():
+                if kind == STRING:
+                    # string values in order of first appearance as categories of a column
+                    counts = {}
+                    for values, cnts in parts:
+                        for v, c in zip(values, cnts):
+                            counts[v] = counts.get(v, 0) + c
+                    category, regions = key, [v for v, c in counts.items() if c >= self.min_sup]
+                else:
+                    values, inverse = np.unique(np.concatenate([v for v, _ in parts]), return_inverse=True)
+                    counts = np.bincount(inverse, np.concatenate([c for _, c in parts]), minlength=len(values))
+                    counts = counts.astype(np.int64)
+                    if kind == TIME:
+                        category, regions = 'time', self.get_time_regions(values, counts)
+                    else:
+                        category, regions = key, self.get_numeric_regions(values, counts)
+
+                if len(regions) > 0:
+                    dense_regions[cmd][category] = regions
+        return dense_regions
+
+    # return candidates of each command from candidates of chunks, in order of first appearance
+    @staticmethod
+    def reduce_candidates(cand_dicts):
+        merged = {}
+        for chunk in cand_dicts:
+            for cmd, cand_dict in chunk.items():
+                cmd_cands = merged.setdefault(cmd, {})
+                for cand, cnt in cand_dict.items():
+                    cmd_cands[cand] = cmd_cands.get(cand, 0) + cnt
+        return merged
+
+
+# pool of single process executors running i-th item of every map() on the same process
+# so that a worker keeps formatted logs of its chunks from map_values() to map_candidates()
+class PinnedPool:
+    def __init__(self, workers, context=None):
+        self.executors = [ProcessPoolExecutor(1, context) for _ in range(max(1, workers))]
+
+    # return list of results of fn over items of iterables, in order of items
+    def map(self, fn, *iterables):
+        futures = [self.executors[i % len(self.executors)].submit(fn, *args) for i, args in enumerate(zip(*iterables))]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        for executor in self.executors:
+            executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
+
+
+# chunk of history shared with forked workers
+class SharedChunk:
+    __slots__ = ('key', 'start', 'end')
+
+    def __init__(self, key, start, end):
+        self.key = key
+        self.start = start
+        self.end = end
+
+    def logs(self):
+        return _shared[self.key][self.start:self.end]
+
+    def cache_key(self):
+        return self.key, self.start, self.end
+
+
+# return distinct values of each component of formatted logs of each command of a chunk of history
+# values are given as a dictionary, key: command, value: dictionary of
+# key: name of component, value: (kind, distinct values, number of occurrences of each)
+# formatted logs of shared chunk are kept in worker for map_candidates()
+def map_values(chunk):
+    if isinstance(chunk, SharedChunk):
+        tables = _tables[chunk.cache_key()] = SelfAutomation.cls_log_table(chunk.logs())
+    else:
+        tables = SelfAutomation.cls_log_table(chunk)
+
+    summary = {}
+    for cmd, table in tables.items():
+        summary[cmd] = {}
+        for key, column in table.columns.items():
+            if column.kind == STRING:
+                counts = np.bincount(column.values, minlength=len(column.categories))
+                summary[cmd][key] = (STRING, list(column.categories), counts.tolist())
+            else:
+                values, counts = np.unique(column.values, return_counts=True)
+                summary[cmd][key] = (TIME if column.kind == TIME else NUMERIC, values, counts)
+    return summary
+
+
+# return candidates of each command of a chunk of history, in order of appearance
+# chunk is formatted again unless this worker formatted it in map_values()
+def map_candidates(automation, dense_regions, chunk):
+    tables = None
+    if isinstance(chunk, SharedChunk):
+        tables = _tables.pop(chunk.cache_key(), None)
+        if tables is None:
+            chunk = chunk.logs()
+    if tables is None:
+        tables = SelfAutomation.cls_log_table(chunk)
+    return {cmd: automation.count_candidates(dense_regions[cmd], table) for cmd, table in tables.items()}
@@ -0,0 +1,84 @@
+import json
+
+
+# rule built by RuleEmitter, keeping its JSON text
+# text is not updated when rule is modified, modify dict(rule) to change JSON of rule
+class Rule(dict):
+    __slots__ = ('text',)
+
+
+# return copy of nested dictionaries and lists of JSON object
+def copy_json(obj):
+    if isinstance(obj, dict):
+        return {k: copy_json(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [copy_json(v) for v in obj]
+    return obj
+
+
+# return JSON text of rule, same as json.dumps(rule)
+def rule_json(rule):
+    if isinstance(rule, Rule):
+        return rule.text
+    return json.dumps(rule)
+
+
+# build rules of a command of device, same as generate_rule() of automation
+# name, result and neighbor attributes are resolved once, and operation of each query is built once
+# each rule holds its own copy of result and operations
+class RuleEmitter:
+    def __init__(self, automation, data, cmd):
+        self.automation = automation
+        self.neighbors = {n['device']: n for n in data['neighbors']}
+        self.name = automation.construct_name(data['device'], self.neighbors.keys(), cmd)
+        self.result = automation.construct_result(data['device'], data['capability'], cmd)
+
+        self.head = '{"name": %s, "actions": [' % json.dumps(self.name)
+        self.then = ', "then": %s}}' % json.dumps(self.result)
+        self.operations = {}  # key: query, value: (operation, JSON text of operation)
+        self.every = {}  # key: time query, value: (EveryAction, JSON text of EveryAction)
+
+    # return rule of cluster
+    def emit(self, cluster):
+        if len(cluster) == 1 and cluster[0][0] == 'time':
+            action, text = self.every_action(cluster[0])
+        else:
+            ops = [self.operation(q) for q in cluster]
+            if len(ops) == 1:
+                op, op_text = ops[0]
+                action = {'if': dict(op, then=self.result)}
+                text = '{"if": ' + op_text[:-1] + self.then
+            else:
+                action = {'if': {'and': [op for op, _ in ops], 'then': self.result}}
+                text = '{"if": {"and": [' + ', '.join([t for _, t in ops]) + ']' + self.then
+
+        rule = Rule(name=self.name, actions=[copy_json(action)])
+        rule.text = self.head + text + ']}'
+        return rule
+
+    # return operation of query and its JSON text
+    def operation(self, query):
+        cached = self.operations.get(query)
+        if cached is not None:
+            return cached
+
+        if self.automation.is_time(query):
+            op = self.automation.time_operation(query)
+        else:
+            info = query[0].split(':')
+            attr = self.neighbors[info[0]]['value'][int(info[1])]['attribute']
+            if self.automation.is_numeric(query):
+                op = self.automation.numeric_operation(query, attr)
+            else:
+                op = self.automation.string_operation(query, attr)
+
+        cached = self.operations[query] = (op, json.dumps(op))
+        return cached
+
+    # return EveryAction of time query and its JSON text
+    def every_action(self, query):
+        cached = self.every.get(query)
+        if cached is None:
+            action = self.automation.construct_EveryAction(query, self.result)
+            cached = self.every[query] = (action, json.dumps(action))
+        return cached
@@ -0,0 +1,105 @@
+import os
+import json
+
+from .rule_emitter import rule_json
+
+
+# destination of generated rules
+# used as a context, sink is closed on success and aborted on exception
+class RuleSink:
+    # start rules of device, every command of the device follows, device may have no command
+    def begin_device(self, device):
+        pass
+
+    # start rules of a command of device, every rule of the command follows
+    def begin_command(self, device, cmd):
+        pass
+
+    # write rule named name and return number of characters written
+    def write(self, name, rule):
+        raise NotImplementedError
+
+    # finish writing rules
+    def close(self):
+        pass
+
+    # discard rules not yet finished
+    def abort(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+# write each rule to its own file in a directory
+class FileSink(RuleSink):
+    def __init__(self, dir_out):
+        self.dir_out = dir_out
+
+    def write(self, name, rule):
+        with open(self.dir_out + name, 'w') as f:
+            return f.write(rule_json(rule))
+
+
+# write every rule to a single NDJSON file, one {"name": name, "rule": rule} per line
+# rules are written to a temporary file renamed to path on close(), abort() removes it
+class NDJSONSink(RuleSink):
+    def __init__(self, path, buffer_size=1 << 20):
+        self.path = path
+        self.tmp = path + '.tmp'
+        self.f = open(self.tmp, 'w', buffering=buffer_size)
+
+    def write(self, name, rule):
+        return self.f.write('{"name": %s, "rule": %s}\n' % (json.dumps(name), rule_json(rule)))
+
+    def close(self):
+        if self.f.closed:
+            return
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        if self.f.closed:
+            return
+        self.f.close()
+        os.remove(self.tmp)
+
+
+# keep rules in memory to write them into another sink later
+class ListSink(RuleSink):
+    def __init__(self):
+        self.commands = []  # list of (device, command, list of (name, rule)), command is None where device begins
+
+    def begin_device(self, device):
+        self.commands.append((device, None, []))
+
+    def begin_command(self, device, cmd):
+        self.commands.append((device, cmd, []))
+
+    def write(self, name, rule):
+        self.commands[-1][2].append((name, rule))
+        return 0
+
+    # return list of (name, rule) of every command
+    @property
+    def rules(self):
+        return [r for _, _, rules in self.commands for r in rules]
+
+    # write kept rules into sink
+    def replay(self, sink):
+        for device, cmd, rules in self.commands:
+            if cmd is None:
+                sink.begin_device(device)
+                continue
+            sink.begin_command(device, cmd)
+            for name, rule in rules:
+                sink.write(name, rule)
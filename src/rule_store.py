@@ -0,0 +1,155 @@
+import os
+import json
+import hashlib
+
+from .rule_sink import RuleSink
+from .rule_emitter import rule_json
+
+VERSION = 2  # version of manifest format, stores of other versions start empty
+
+
+# persistent store of rules writing only new or changed rules
+# rules are saved as files named after sha-256 of their content, manifest.json keeps
+# digest of each rule name for each device and command, changes.json keeps diff of last session
+# a session is every rule written until close(), commands given to begin_command() are replaced by
+# rules written in the session, rules of other commands are kept
+# every command of devices given to begin_device() is replaced, commands without rules in the session are removed
+class RuleStore(RuleSink):
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.rule_dir = os.path.join(store_dir, 'rules')
+        os.makedirs(self.rule_dir, exist_ok=True)
+
+        self.manifest_path = os.path.join(store_dir, 'manifest.json')
+        self.changes_path = os.path.join(store_dir, 'changes.json')
+        self.manifest = self.read_json(self.manifest_path)
+        if self.manifest is None or self.manifest.get('version') != VERSION:
+            self.manifest = {'version': VERSION, 'devices': {}}
+
+        self.session = {}  # key: (device, command), value: dictionary of key: rule name, value: digest
+        self.devices = set()  # devices replaced by session
+        self.current = None
+        self.created = []  # digests of rule files written in session
+        self.changes = None
+
+    def begin_device(self, device):
+        self.devices.add(device)
+
+    # rules of a command given several times in a session are accumulated
+    def begin_command(self, device, cmd):
+        self.current = (device, cmd)
+        self.session.setdefault(self.current, {})
+
+    def write(self, name, rule):
+        digest = self.digest(rule)
+        self.session[self.current][name] = digest
+
+        path = self.rule_path(digest)
+        if os.path.exists(path):   # same rule is already stored
+            return 0
+
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            written = f.write(rule_json(rule))
+        os.replace(tmp, path)
+        self.created.append(digest)
+        return written
+
+    # update manifest with rules of session and return diff of session
+    def close(self):
+        changes = {'added': [], 'changed': [], 'removed': []}
+        devices = self.manifest['devices']
+        replaced = set()  # digests which may not be used anymore
+
+        # stored commands of replaced devices not written in session have no rule anymore
+        for device in self.devices:
+            for cmd in list(devices.get(device, {})):
+                self.session.setdefault((device, cmd), {})
+
+        for (device, cmd), rules in self.session.items():
+            old = devices.get(device, {}).get(cmd, {})
+            for name, digest in rules.items():
+                if name not in old:
+                    changes['added'].append(self.change(device, cmd, name, digest))
+                elif old[name] != digest:
+                    changes['changed'].append(dict(self.change(device, cmd, name, digest), previous=old[name]))
+                    replaced.add(old[name])
+            for name, digest in old.items():
+                if name not in rules:
+                    changes['removed'].append(self.change(device, cmd, name, digest))
+                    replaced.add(digest)
+
+            if len(rules) > 0:
+                devices.setdefault(device, {})[cmd] = rules
+            elif cmd in devices.get(device, {}):
+                del devices[device][cmd]
+                if len(devices[device]) == 0:
+                    del devices[device]
+
+        self.write_json(self.manifest_path, self.manifest)
+        self.write_json(self.changes_path, changes)
+        self.remove_unused(replaced)
+
+        self.session = {}
+        self.devices = set()
+        self.current = None
+        self.created = []
+        self.changes = changes
+        return changes
+
+    # discard rules of session
+    def abort(self):
+        self.remove_unused(self.created)
+        self.session = {}
+        self.devices = set()
+        self.current = None
+        self.created = []
+
+    # return path of stored rule named name of command of device, None if not stored
+    def rule_file(self, device, cmd, name):
+        digest = self.manifest['devices'].get(device, {}).get(cmd, {}).get(name)
+        return None if digest is None else self.rule_path(digest)
+
+    # return diff of last session saved in store
+    def last_changes(self):
+        return self.read_json(self.changes_path)
+
+    # remove rule files of digests not in manifest
+    def remove_unused(self, digests):
+        used = self.used_digests()
+        for digest in set(digests) - used:
+            try:
+                os.remove(self.rule_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def used_digests(self):
+        return {digest for cmds in self.manifest['devices'].values()
+                for rules in cmds.values() for digest in rules.values()}
+
+    def rule_path(self, digest):
+        return os.path.join(self.rule_dir, digest + '.json')
+
+    # return sha-256 of JSON text of rule written to its file
+    @staticmethod
+    def digest(rule):
+        return hashlib.sha256(rule_json(rule).encode()).hexdigest()
+
+    @staticmethod
+    def change(device, cmd, name, digest):
+        return {'device': device, 'command': cmd, 'name': name, 'digest': digest}
+
+    @staticmethod
+    def read_json(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def write_json(path, obj):
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(obj, f)
+        os.replace(tmp, path)
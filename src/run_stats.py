@@ -0,0 +1,139 @@
+import time
+import tracemalloc
+
+
+# statistics of one run() of SelfAutomation
+# hook: function called as hook(stage, seconds, stats) when each stage ends
+# trace_memory: record peak memory allocated in each stage with tracemalloc
+class RunStats:
+    def __init__(self, hook=None, trace_memory=False):
+        self.hook = hook
+        self.trace_memory = trace_memory
+
+        self.times = {}  # key: stage, value: total seconds spent
+        self.memory = {}  # key: stage, value: largest peak of allocated bytes
+        self.records = 0  # number of records read
+        self.command_records = {}  # key: command, value: number of records
+        self.dense_regions = {}  # key: command, value: dictionary of key: component, value: number of dense regions
+        self.candidates = {}  # key: command, value: number of distinct candidate clusters
+        self.clusters = {}  # key: command, value: number of clusters satisfying minimum support
+        self.pruned = {}  # key: command, value: number of pruned 'command', 'columns' and 'logs'
+        self.bytes_written = 0
+
+    # return context measuring a stage
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def record_read(self, num_records):
+        self.records = num_records
+
+    def record_command(self, cmd, num_records):
+        self.command_records[cmd] = num_records
+
+    def record_regions(self, cmd, dense_regions):
+        self.dense_regions[cmd] = {key: len(regions) for key, regions in dense_regions.items()}
+
+    def record_clusters(self, cmd, num_candidates, num_clusters):
+        self.candidates[cmd] = num_candidates
+        self.clusters[cmd] = num_clusters
+
+    def record_pruning(self, cmd, pruned):
+        self.pruned[cmd] = pruned
+
+    def add_bytes(self, num_bytes):
+        self.bytes_written += num_bytes
+
+    # add statistics of another run, such as mining of a command in a worker
+    def merge(self, other):
+        for name, seconds in other.times.items():
+            self.times[name] = self.times.get(name, 0.0) + seconds
+        for name, peak in other.memory.items():
+            self.memory[name] = max(self.memory.get(name, 0), peak)
+        self.command_records.update(other.command_records)
+        self.dense_regions.update(other.dense_regions)
+        self.candidates.update(other.candidates)
+        self.clusters.update(other.clusters)
+        self.pruned.update(other.pruned)
+        self.bytes_written += other.bytes_written
+
+    # return statistics as a dictionary
+    def to_dict(self):
+        return {'times': self.times, 'memory': self.memory, 'records': self.records,
+                'command_records': self.command_records, 'dense_regions': self.dense_regions,
+                'candidates': self.candidates, 'clusters': self.clusters, 'pruned': self.pruned,
+                'bytes_written': self.bytes_written}
+
+
+# measure wall time and peak memory of a stage
+class _Stage:
+    __slots__ = ('stats', 'name', 'start', 'tracing')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        if self.stats.trace_memory:
+            self.tracing = tracemalloc.is_tracing()
+            if self.tracing:
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        stats = self.stats
+        stats.times[self.name] = stats.times.get(self.name, 0.0) + seconds
+
+        if stats.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            if not self.tracing:
+                tracemalloc.stop()
+            stats.memory[self.name] = max(stats.memory.get(self.name, 0), peak)
+
+        if stats.hook is not None:
+            stats.hook(self.name, seconds, stats)
+        return False
+
+
+# statistics ignoring every measurement, used when run() is not instrumented
+class _NullStats:
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def record_read(self, num_records):
+        pass
+
+    def record_command(self, cmd, num_records):
+        pass
+
+    def record_regions(self, cmd, dense_regions):
+        pass
+
+    def record_clusters(self, cmd, num_candidates, num_clusters):
+        pass
+
+    def record_pruning(self, cmd, pruned):
+        pass
+
+    def add_bytes(self, num_bytes):
+        pass
+
+    def merge(self, other):
+        pass
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+NULL_STATS = _NullStats()
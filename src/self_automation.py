@@ -1,160 +1,446 @@
-import json
+import os
 import numpy as np
-from datetime import datetime
+from itertools import islice
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from .automation_base import AutomationBase
+from .log_stream import iter_log
+from .rule_sink import FileSink
+from .rule_emitter import RuleEmitter
+from .run_stats import RunStats, NULL_STATS
+from .fp_tree import maximal_itemsets
+from .dense_region import DenseRegion
+from .log_table import LogTable, TableBuilder, TIME, NUMERIC, STRING
 
 
 # generate rule from logs
-class SelfAutomation:
+class SelfAutomation(AutomationBase):
     INTMAX = 987654321
+    STREAM_SIZE = 64 * 1024 * 1024  # log files larger than this size(bytes) are read as a stream
+    CHUNK_SIZE = 65536  # number of logs formatted at once
+    STREAM_CHUNK_SIZE = 8192  # number of logs of a stream formatted at once, logs of a chunk are kept until formatted
+    DAY_MINUTES = 1440  # number of minutes of a day, angle of each minute is a multiple of 0.25
 
     def __init__(self, input_dir='./logs/', param=None):
-        # set directory and hyperparameters
-        self.input_dir = input_dir
-        if param is None:
-            self.min_sup = 5  # minimum support
-            self.time_err = 3.75  # acceptable error of time component as an angle, equivalent to 15 minutes
-            self.num_err = 5  # acceptable error of integer component
-        else:
-            self.min_sup = param['min_sup']
-            self.time_err = param['time_err']
-            self.num_err = param['int_err']
+        super().__init__(input_dir, param)
+        self.stream_size = SelfAutomation.STREAM_SIZE
+        self.cache = None  # LogCache to keep formatted logs of log files
+        self.executor = None  # Executor mining commands concurrently, commands are mined in turn if not given
+
+    # executor and cache are not sent to workers of executor
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['executor'] = None
+        state['cache'] = None
+        return state
 
     # export self-generated rules and return file names of exported rules as a list
     # file_in: directory to read logs, dir_out: directory to save generated rules
-    def run(self, file_in, dir_out='./output/'):
-        data = self.read_log(self.input_dir + file_in)
+    # stats: RunStats filled with time and counters of each stage, run is not measured if not given
+    # sink: RuleSink receiving rules instead of dir_out, left open to receive rules of other runs
+    def run(self, file_in, dir_out='./output/', stats=None, sink=None):
+        stats = NULL_STATS if stats is None else stats
+        sink = FileSink(dir_out) if sink is None else sink
+        path = self.input_dir + file_in
+
+        # large log file is read as a stream, its formatted logs are neither kept nor cached
+        # size is checked before cache, which would read whole file to hash it
+        if os.path.isfile(path) and os.path.getsize(path) > self.stream_size:
+            return self.run_stream(path, file_in, dir_out, stats, sink)
+
+        cached = None
+        if self.cache is not None and os.path.isfile(path):
+            with stats.stage('load_cache'):
+                cached = self.cache.load(path)
+
+        with stats.stage('read_log'):
+            if cached is not None:
+                data, log_cls_cmd = cached
+                num_logs = sum(table.num_logs() for table in log_cls_cmd.values())
+            else:
+                data = self.read_log(path)
+                log_cls_cmd = None
+                num_logs = len(data['history'])
+        stats.record_read(num_logs)
+        sink.begin_device(data['device'])
+
+        if num_logs < self.min_sup:
+            print("No rule is detected")
+            return []
+
+        if log_cls_cmd is None:
+            with stats.stage('cls_log'):
+                log_cls_cmd = self.cls_log_table(data['history'])
+
+        if self.cache is not None and cached is None:
+            with stats.stage('store_cache'):
+                log_cls_cmd = {cmd: self.to_table(logs) for cmd, logs in log_cls_cmd.items()}
+                self.cache.store(path, {k: v for k, v in data.items() if k != 'history'}, log_cls_cmd)
+
+        return self.write_rules(data, self.generate_rules(data, log_cls_cmd, stats), file_in, stats, sink)
+
+    # export self-generated rules of device data already read and return file names of exported rules as a list
+    # data: dictionary in format of log file, file_in: name of log file that rules are named after
+    def run_data(self, data, file_in, dir_out='./output/', stats=None, sink=None):
+        stats = NULL_STATS if stats is None else stats
+        sink = FileSink(dir_out) if sink is None else sink
+        stats.record_read(len(data['history']))
+        sink.begin_device(data['device'])
 
         if len(data['history']) < self.min_sup:
             print("No rule is detected")
             return []
 
-        log_cls_cmd = self.cls_log(data['history'])
+        with stats.stage('cls_log'):
+            log_cls_cmd = self.cls_log_table(data['history'])
 
-        file_names = []
+        return self.write_rules(data, self.generate_rules(data, log_cls_cmd, stats), file_in, stats, sink)
 
-        # generate rules for each device command
-        for cmd in log_cls_cmd.keys():
-            clusters = self.cluster_log(log_cls_cmd[cmd], info=True)
-            if len(clusters) == 0:
-                print("No rule is detected")
+    # export self-generated rules of log file at path read as a stream and return file names of exported rules
+    def run_stream(self, path, file_in, dir_out='./output/', stats=None, sink=None):
+        stats = NULL_STATS if stats is None else stats
+        sink = FileSink(dir_out) if sink is None else sink
+        data = {}
 
-            # build rule for each cluster
-            for idx, log in enumerate(clusters):
-                rule = self.generate_rule(data, log, cmd)
+        # yield logs of history, keeping other members as device information
+        def history():
+            for key, val in iter_log(path):
+                if key == 'history':
+                    yield val
+                else:
+                    data[key] = val
+
+        rules = self.mine_stream(data, history, stats)
+        sink.begin_device(data['device'])
+        if rules is None:
+            print("No rule is detected")
+            return []
+        return self.write_rules(data, rules, file_in, stats, sink)
+
+    # return rules of each command as generate_rules(), None if history is shorter than minimum support
+    # history: function returning a new iterator of logs of history, history is read twice
+    # first pass counts distinct values of each component for dense 1-regions, second pass counts candidates
+    # memory is proportional to distinct values and candidates instead of logs
+    def mine_stream(self, data, history, stats=NULL_STATS):
+        with stats.stage('read_log'):
+            values, num_logs = self.stream_values(history())
+        stats.record_read(num_logs)
+        if num_logs < self.min_sup:
+            return None
 
-                if len(clusters) == 1:
-                    file_out = file_in.split('.')[0] + '_' + cmd + '_rule.json'
+        dense_regions = {}
+        with stats.stage('get_dense_region'):
+            for cmd, (cmd_logs, columns) in values.items():
+                stats.record_command(cmd, cmd_logs)
+                dense_regions[cmd] = self.stream_regions(columns)
+                stats.record_regions(cmd, dense_regions[cmd])
+
+        with stats.stage('count_candidates'):
+            cand_dicts = self.stream_candidates(history(), dense_regions)
+
+        return {cmd: self.emit_rules(data, cmd, cand_dicts[cmd], dense, stats) for cmd, dense in dense_regions.items()}
+
+    # return distinct values of each component of each command, and number of logs
+    # values are given as a dictionary, key: command, value: (number of logs, dictionary of
+    # key: name of component, value: (kind, dictionary of key: value, value: occurrences))
+    def stream_values(self, history):
+        values = {}
+        num_logs = 0
+        for tables in self.chunk_tables(history):
+            for cmd, table in tables.items():
+                num_logs += table.size
+                cmd_logs, columns = values.get(cmd, (0, {}))
+                values[cmd] = (cmd_logs + table.size, columns)
+
+                for key, column in table.columns.items():
+                    counts = columns.setdefault(key, (column.kind, {}))[1]
+                    if column.kind == STRING:
+                        occurrences = np.bincount(column.values, minlength=len(column.categories))
+                        distinct = column.categories
+                    else:
+                        distinct, occurrences = np.unique(column.values, return_counts=True)
+                        distinct = distinct.tolist()
+                    for v, c in zip(distinct, occurrences.tolist()):
+                        if c > 0:
+                            counts[v] = counts.get(v, 0) + c
+        return values, num_logs
+
+    # return dense 1-regions of distinct values of components of a command
+    def stream_regions(self, columns):
+        dense_regions = {}
+        for key, (kind, counts) in columns.items():
+            if kind == STRING:
+                # categories in order of first appearance as a column of LogTable
+                category, regions = key, [v for v, c in counts.items() if c >= self.min_sup]
+            else:
+                distinct = np.array(sorted(counts.keys()))
+                weights = np.array([counts[v] for v in distinct.tolist()], dtype=np.int64)
+                if kind == TIME:
+                    category, regions = 'time', self.get_time_regions(distinct, weights)
                 else:
-                    file_out = file_in.split('.')[0] + '_' + cmd + str(idx) + '_rule.json'
-                file_names.append(file_out)
+                    category, regions = key, self.get_numeric_regions(distinct, weights)
 
-                with open(dir_out + file_out, 'w') as f:
-                    json.dump(rule, f)
+            if len(regions) > 0:
+                dense_regions[category] = regions
+        return dense_regions
 
-        return file_names
+    # return candidates of each command in order of first appearance
+    def stream_candidates(self, history, dense_regions):
+        cand_dicts = {cmd: {} for cmd in dense_regions}
+        for tables in self.chunk_tables(history):
+            for cmd, table in tables.items():
+                cand_dict = cand_dicts[cmd]
+                for cand, cnt in self.count_candidates(dense_regions[cmd], table).items():
+                    cand_dict[cand] = cand_dict.get(cand, 0) + cnt
+        return cand_dicts
+
+    # yield formatted logs of each chunk of history as a dictionary, key: command, value: LogTable
+    @staticmethod
+    def chunk_tables(history, chunk_size=STREAM_CHUNK_SIZE):
+        formatted = SelfAutomation.format_logs(history, chunk_size)
+        while True:
+            builders = {}
+            for log, new_log in islice(formatted, chunk_size):
+                cmd = log['command']
+                if cmd not in builders:
+                    builders[cmd] = TableBuilder()
+                builders[cmd].add(new_log)
+
+            if len(builders) == 0:
+                return
+            yield {cmd: builder.build() for cmd, builder in builders.items()}
+
+    # return rules of each command as a dictionary
+    # key: command, value: list of rules built from clusters of the command
+    # commands are mined concurrently if executor is set, rules keep order of commands
+    # memory of stages mined by ThreadPoolExecutor is not traced, tracemalloc of a process is shared by its threads
+    # and peaks of a stage would include allocations of other threads
+    def generate_rules(self, data, log_cls_cmd, stats=None):
+        stats = NULL_STATS if stats is None else stats
+        if self.executor is None:
+            return {cmd: self.mine_command(data, cmd, logs, stats) for cmd, logs in log_cls_cmd.items()}
+
+        # workers measure stages in their own RunStats, hook is not called for them
+        trace_memory = stats.trace_memory if isinstance(stats, RunStats) else None
+        if trace_memory and isinstance(self.executor, ThreadPoolExecutor):
+            trace_memory = False
+        info = {k: v for k, v in data.items() if k != 'history'}
+        futures = [(cmd, self.executor.submit(self.mine_command_stats, info, cmd, logs, trace_memory))
+                   for cmd, logs in log_cls_cmd.items()]
+
+        rules = {}
+        for cmd, future in futures:
+            rules[cmd], cmd_stats = future.result()
+            if cmd_stats is not None:
+                stats.merge(cmd_stats)
+        return rules
+
+    # return rules of a command
+    def mine_command(self, data, cmd, logs, stats=NULL_STATS):
+        # same as cluster_log(), measuring each stage
+        table = self.to_table(logs)
+        num_logs = table.num_logs()
+        stats.record_command(cmd, num_logs)
+
+        # command with less logs than minimum support can't have cluster
+        if num_logs < self.min_sup:
+            stats.record_pruning(cmd, {'command': 1, 'columns': len(table.columns), 'logs': num_logs})
+            print("No rule is detected")
+            return []
 
-    # Rule Generating
-    # return rule built from data and cluster
-    def generate_rule(self, data, cluster, cmd):
-        neigh_dict = {n['device']: n for n in data['neighbors']}
+        with stats.stage('prune'):
+            table, sparse_columns = self.prune_columns(table)
 
-        rule_name = self.construct_name(data['device'], neigh_dict.keys(), cmd)
+        with stats.stage('get_dense_region'):
+            dense_one_regions = self.get_dense_region(table)
+        stats.record_regions(cmd, dense_one_regions)
 
-        # create rule
-        result = self.construct_result(data['device'], data['capability'], cmd)
+        with stats.stage('prune'):
+            table, empty_columns = self.prune_columns(table, dense_one_regions)
 
-        if len(cluster) == 1 and cluster[0][0] == 'time':
-            # construct EveryAction if there's only time query
-            action = self.construct_EveryAction(cluster[0], result)
-        else:
-            action = self.construct_IfAction(cluster, neigh_dict, result)
+        with stats.stage('count_candidates'):
+            cand_dict = self.count_candidates(dense_one_regions, table)
 
-        return {'name': rule_name, 'actions': [action]}
+        # logs out of every dense 1-region belong to no candidate
+        stats.record_pruning(cmd, {'command': 0, 'columns': sparse_columns + empty_columns,
+                                   'logs': num_logs - sum(cand_dict.values())})
 
-    # return name of rule
-    @staticmethod
-    def construct_name(device, neighbors, cmd):
-        name = device
-        for n in neighbors:
-            name = name + '-' + n
-        return name + '-' + cmd
+        return self.emit_rules(data, cmd, cand_dict, dense_one_regions, stats)
 
-    # return result of rule ('then' part)
-    @staticmethod
-    def construct_result(device, cap, cmd):
-        action = [{'command': {"devices": [device], 'commands': [{'capability': cap, 'command': cmd}]}}]
-        return action
+    # return rules of candidates of a command
+    def emit_rules(self, data, cmd, cand_dict, dense_one_regions, stats=NULL_STATS):
+        if self.backend == 'fp_tree':
+            with stats.stage('mine_patterns'):
+                cand_dict = self.mine_patterns(cand_dict, dense_one_regions)
 
-    # return time operation with 'between'
-    # query given with form ('time', (mode, (min, max)))
-    @staticmethod
-    def time_operation(query):
-        start = query[1][1][0]
-        end = query[1][1][1]
-        return {'between': {'value': {'time': {'reference': 'Now'}},
-                            'start': {'time': {'hour': int(start[0:2]), 'minute': int(start[3:5])}},
-                            'end': {'time': {'hour': int(end[0:2]), 'minute': int(end[3:5])}}}}
-
-    # return numerical related operation
-    # query given with ({neighbor_device}, (mode, mean))
-    @staticmethod
-    def numeric_operation(query, attr):
-        if query[1][0] < query[1][1]:
-            # use 'greater_than' syntax if center <= mean
-            op = 'greater_than'
-        else:
-            # use 'less_than' syntax if center > mean
-            op = 'less_than'
-        return {op: {"left": {"device": {"devices": [query[0].split(':')[0]], "attribute": attr}},
-                     "right": {"integer": query[1][0]}}}
+        with stats.stage('format_clusters'):
+            clusters = self.format_clusters(cand_dict, dense_one_regions, info=True)
+        stats.record_clusters(cmd, len(cand_dict), len(clusters))
 
-    # return string related operation
-    # query given with ({neighbor_device}, value)
-    @staticmethod
-    def string_operation(query, attr):
-        operation = {"equals": {"left": {"device": {"devices": [query[0].split(':')[0]], "attribute": attr}},
-                                "right": {"string": query[1]}}}
-        return operation
+        if len(clusters) == 0:
+            print("No rule is detected")
 
-    # return condition in EveryAction format
-    @staticmethod
-    def construct_EveryAction(time_query, result):
-        hour = int(time_query[1][0][0:2])
-        minute = int(time_query[1][0][3:5])
-        operation = {'time': {'hour': hour, 'minute': minute}}
-
-        return {'every': {'specific': operation, 'actions': result}}
-
-    # return condition in IfAction format
-    def construct_IfAction(self, queries, devices, result):
-        operations = []
-        for q in queries:
-            if self.is_time(q):
-                operations.append(self.time_operation(q))
-            else:
-                info = q[0].split(':')
-                attr = devices[info[0]]['value'][int(info[1])]['attribute'] # retrieve device information
-                if self.is_numeric(q):
-                    operations.append(self.numeric_operation(q, attr))
-                else:
-                    operations.append(self.string_operation(q, attr))
+        # build rule for each cluster
+        with stats.stage('generate_rule'):
+            emitter = RuleEmitter(self, data, cmd)
+            rules = [emitter.emit(log) for log in clusters]
 
-        # merge operations
-        if len(operations) == 1:
-            operations[0]['then'] = result
-            action = {'if': operations[0]}
-        else:
-            action = {'if': {'and': []}}
-            for op in operations:
-                action['if']['and'].append(op)
-            action['if']['then'] = result
+        return rules
 
-        return action
+    # return rules of a command and RunStats of mining, stats are not measured if trace_memory is None
+    def mine_command_stats(self, data, cmd, logs, trace_memory=None):
+        if trace_memory is None:
+            return self.mine_command(data, cmd, logs), None
+        stats = RunStats(trace_memory=trace_memory)
+        return self.mine_command(data, cmd, logs, stats), stats
 
     # Log Clustering
     # return representative logs based on SLCT algorithm
+    # logs: list of logs, LogTable, or dictionary of key: distinct log, value: number of occurrences
     def cluster_log(self, logs, info=False):
+        table = self.to_table(logs)
+
+        dense_one_regions = self.get_dense_region(table)
+        cand_dict = self.select_candidates(self.count_candidates(dense_one_regions, table), dense_one_regions)
+
+        return self.format_clusters(cand_dict, dense_one_regions, info)
+
+    # return candidates to format as clusters by backend
+    def select_candidates(self, cand_dict, dense_regions):
+        if self.backend == 'fp_tree':
+            return self.mine_patterns(cand_dict, dense_regions)
+        return cand_dict
+
+    # return dictionary of maximal frequent combinations of dense 1-regions
+    # key: combination as a candidate cluster, value: number of logs including combination
+    # cand_dict: candidates of count_candidates(), mined as distinct transactions with counts
+    def mine_patterns(self, cand_dict, dense_regions):
+        itemsets = maximal_itemsets(cand_dict.keys(), cand_dict.values(), self.min_sup)
+
+        # components in order of columns, patterns in order of first candidate including them
+        rank = {key: r for r, key in enumerate(dense_regions.keys())}
+        first = {}
+        for idx, cand in enumerate(cand_dict.keys()):
+            cand = set(cand)
+            for itemset in itemsets.keys():
+                if itemset not in first and itemset <= cand:
+                    first[itemset] = idx
+            if len(first) == len(itemsets):
+                break
+
+        patterns = []
+        for itemset, cnt in itemsets.items():
+            pattern = tuple(sorted(itemset, key=lambda comp: rank[comp[0]]))
+            patterns.append((first[itemset], [rank[comp[0]] for comp in pattern], pattern, cnt))
+        patterns.sort(key=lambda p: p[:2])
+
+        return {pattern: cnt for _, _, pattern, cnt in patterns}
+
+    # return dictionary of candidate clusters
+    # key: candidate cluster, value: number of logs belonging to candidate
+    def count_candidates(self, dense_regions, logs, counts=None):
+        table = self.to_table(logs, counts)
+
+        # region id of each log for every column with dense regions, in order of dense_regions
+        # components of candidates keep the same order for every table, such as chunks of a history
+        # logs outside of dense regions get id equal to number of regions
+        columns = {('time' if column.kind == TIME else key): (key, column) for key, column in table.columns.items()}
+        col_ids = []
+        col_comps = []  # candidate component of each region
+        for category in dense_regions:
+            if category not in columns:
+                continue
+            key, column = columns[category]
+            region_ids = self.get_region_ids(dense_regions, key, column)
+            if region_ids is None:  # column has no dense region
+                continue
+            ids, comps = region_ids
+            if column.rows is not None:
+                full = np.full(table.size, len(comps), dtype=np.int64)
+                full[column.rows] = ids
+                ids = full
+            col_ids.append(ids)
+            col_comps.append(comps)
+
+        if len(col_ids) == 0:
+            return {}
+
+        # remove logs not belonging to any dense region
+        radix = [len(comps) + 1 for comps in col_comps]
+        in_region = np.zeros(table.size, dtype=bool)
+        for ids, r in zip(col_ids, radix):
+            in_region |= ids != r - 1
+        rows = np.flatnonzero(in_region)
+
+        if np.prod(radix, dtype=float) < 2 ** 62:
+            # pack region ids of a log into one integer
+            keys = np.zeros(len(rows), dtype=np.int64)
+            for ids, r in zip(col_ids, radix):
+                keys = keys * r + ids[rows]
+            keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+            cand_ids = np.empty((len(keys), len(radix)), dtype=np.int64)
+            for i in range(len(radix) - 1, -1, -1):
+                keys, cand_ids[:, i] = np.divmod(keys, radix[i])
+        else:
+            # too many regions to pack, compare region ids as rows
+            matrix = np.stack([ids[rows] for ids in col_ids], axis=1)
+            cand_ids, first, inverse = np.unique(matrix, axis=0, return_index=True, return_inverse=True)
+
+        weights = None if table.counts is None else table.counts[rows]
+        cand_counts = np.bincount(inverse.reshape(-1), weights, minlength=len(first)).astype(np.int64)
+
+        # register candidates in order of appearance
+        cand_dict = {}
+        for u in np.argsort(first, kind='stable'):
+            candidate = tuple(comps[i] for comps, i in zip(col_comps, cand_ids[u].tolist()) if i < len(comps))
+            cand_dict[candidate] = int(cand_counts[u])
+
+        return cand_dict
+
+    # return region id of each value of column and candidate component of each region
+    # values outside of dense regions get id equal to number of regions
+    # return None if column has no dense region
+    def get_region_ids(self, dense_regions, key, column):
+        category = 'time' if column.kind == TIME else key
+        if category not in dense_regions:
+            return None
+        regions = dense_regions[category]
+
+        if column.kind == STRING:
+            comps = [(key, val) for val in regions]
+            codes = {cat: code for code, cat in enumerate(column.categories)}
+            lookup = np.full(len(column.categories), len(comps), dtype=np.int64)
+            for idx, val in enumerate(regions):
+                if val in codes:
+                    lookup[codes[val]] = idx
+            return lookup[column.values], comps
+
+        comps = [(category, (r.start, r.end)) for r in regions]
+        values = column.values
+        ids = np.full(len(values), len(regions), dtype=np.int64)
+
+        wrap = None
+        if column.kind == TIME and regions[-1].start > regions[-1].end:   # last interval is date changing interval
+            wrap = (values <= regions[-1].end) | (regions[-1].start <= values)
+            regions = regions[:-1]
+
+        # find interval whose start is the closest one not greater than value
+        starts = np.array([r.start for r in regions])
+        ends = np.array([r.end for r in regions])
+        idx = np.searchsorted(starts, values, side='right') - 1
+        found = idx >= 0
+        found[found] = values[found] <= ends[idx[found]]
+        ids[found] = idx[found]
+
+        if wrap is not None:
+            ids[wrap] = len(comps) - 1
+
+        return ids, comps
+
+    # return clusters from candidates satisfying minimum support
+    def format_clusters(self, cand_dict, dense_one_regions, info=False):
         # return index of val using start of interval
         def find_interval(key, start, end, target):
             if start >= end:  # no interval
@@ -162,24 +448,13 @@ class SelfAutomation:
 
             cur = int((start + end) / 2)
 
-            if dense_one_regions[key][cur][0] == target:
+            if dense_one_regions[key][cur].start == target:
                 return cur
-            elif target < dense_one_regions[key][cur][0]:
+            elif target < dense_one_regions[key][cur].start:
                 return find_interval(key, start, cur, target)
-            else:  # dense_one_regions[k][cur][-1] < target
+            else:  # dense_one_regions[k][cur].end < target
                 return find_interval(key, cur + 1, end, target)
 
-        dense_one_regions = self.get_dense_region(logs)
-
-        cand_dict = {}
-        for log in logs:
-            candidate = tuple(self.get_candidate_cluster(dense_one_regions, log))
-
-            if candidate in cand_dict:
-                cand_dict[candidate] = cand_dict[candidate] + 1
-            elif candidate != ():
-                cand_dict[candidate] = 1
-
         clusters = []
         for candidate in cand_dict.keys():
             if cand_dict[candidate] >= self.min_sup:
@@ -188,120 +463,237 @@ class SelfAutomation:
                 for comp in candidate:
                     if self.is_time(comp):
                         idx = find_interval(comp[0], 0, len(dense_one_regions[comp[0]]), comp[1][0])
-                        intv = dense_one_regions[comp[0]][idx]
-                        common = self.most_frequent(intv, True)
+                        region = dense_one_regions[comp[0]][idx]
                         if not info:
-                            center.append(('time', self.ang_to_time(common)))
+                            center.append(('time', self.ang_to_time(region.mode)))
                         else:
-                            center.append(('time', (self.ang_to_time(common),
-
-
-                                                    (self.ang_to_time(intv[0]), self.ang_to_time(intv[-1])))))
+                            center.append(('time', (self.ang_to_time(region.mode),
+                                                    (self.ang_to_time(region.start), self.ang_to_time(region.end)))))
                     elif self.is_numeric(comp):
                         idx = find_interval(comp[0], 0, len(dense_one_regions[comp[0]]), comp[1][0])
-                        intv = dense_one_regions[comp[0]][idx]
-                        common = self.most_frequent(intv)
+                        region = dense_one_regions[comp[0]][idx]
                         if not info:
-                            center.append((comp[0], common))
+                            center.append((comp[0], region.mode))
                         else:
-                            center.append((comp[0], (common, np.mean(intv))))
+                            center.append((comp[0], (region.mode, region.mean())))
                     else:  # string component
                         center.append(comp)
                 clusters.append(tuple(center))
 
         return clusters
 
+    # return table without columns which can't have dense 1-region, and number of removed columns
+    # columns held by less logs than minimum support are removed before dense 1-regions are found,
+    # columns without dense 1-region are removed if dense_regions is given
+    def prune_columns(self, table, dense_regions=None):
+        columns = {}
+        for key, column in table.columns.items():
+            if dense_regions is None:
+                weights = table.column_counts(column)
+                kept = (len(column.values) if weights is None else weights.sum()) >= self.min_sup
+            else:
+                kept = ('time' if column.kind == TIME else key) in dense_regions
+            if kept:
+                columns[key] = column
+
+        if len(columns) == len(table.columns):
+            return table, 0
+        return LogTable(columns, table.size, table.counts), len(table.columns) - len(columns)
+
     # return dense 1-region dictionary
     # key: name of component, value: list of dense region
-    def get_dense_region(self, logs):
+    # counts: number of occurrences of each log, every log occurs once if not given
+    def get_dense_region(self, logs, counts=None):
         dense_one_dict = {}
 
-        for key, val in self.logs_to_dict(logs).items():
-            category = key
+        table = self.to_table(logs, counts)
 
-            if self.is_time((key, val[0])):
-                category = 'time'
-                dense_regions = self.get_time_regions(val)
-            elif self.is_numeric((key, val[0])):
-                dense_regions = self.get_numeric_regions(val)
-            else:  # string features
-                dense_regions = self.get_string_regions(val)
+        for key, column in table.columns.items():
+            category, dense_regions = self.get_column_regions(key, column, table.column_counts(column))
 
             if len(dense_regions) > 0:
                 dense_one_dict[category] = dense_regions
 
         return dense_one_dict
 
+    # return category and dense 1-regions of a column
+    def get_column_regions(self, key, column, weights=None):
+        if column.kind == TIME:
+            return 'time', self.get_time_regions(column.values, weights)
+        elif column.kind == NUMERIC:
+            return key, self.get_numeric_regions(column.values, weights)
+        else:  # string features
+            return key, self.get_category_regions(column.values, column.categories, weights)
+
+    # return category and dense 1-regions of a component
+    def get_component_regions(self, key, values, weights=None):
+        if self.is_time((key, values[0])):
+            return 'time', self.get_time_regions(values, weights)
+        elif self.is_numeric((key, values[0])):
+            return key, self.get_numeric_regions(values, weights)
+        else:  # string features
+            return key, self.get_string_regions(values, weights)
+
     # return dense 1-regions of time components
-    def get_time_regions(self, components):
+    # components at minute resolution are counted in a histogram of minutes of a day instead of being sorted
+    def get_time_regions(self, components, weights=None):
+        histogram = self.time_histogram(components, weights)
+        if histogram is None:
+            return self.get_angle_regions(*self.sort_components(components, weights))
+
+        minutes, weights = histogram
+        return self.get_angle_regions(minutes / 4, weights)
+
+    # return minutes of a day holding components in order, and number of components at each minute
+    # return None if a component is not an angle of a minute, (hour * 60 + minute) / 4 as time_to_ang()
+    @staticmethod
+    def time_histogram(components, weights=None):
+        scaled = np.asarray(components) * 4
+        if scaled.dtype.kind not in 'iuf' or len(scaled) == 0:
+            return None
+        minutes = scaled.astype(np.int64)
+        if not (minutes == scaled).all() or minutes.min() < 0 or minutes.max() >= SelfAutomation.DAY_MINUTES:
+            return None
+
+        counts = np.bincount(minutes, minlength=SelfAutomation.DAY_MINUTES)
+        occupied = np.flatnonzero(counts)
+        if weights is None:
+            return occupied, counts[occupied]
+
+        # minute is occupied by its components even if their weights are zero
+        weights = np.asarray(weights)
+        counts = np.bincount(minutes, weights, minlength=SelfAutomation.DAY_MINUTES)
+        return occupied, counts[occupied].astype(weights.dtype)
+
+    # return dense 1-regions of sorted angles of time components
+    def get_angle_regions(self, angles, weights=None):
         dense_regions = []
 
-        angles = sorted(components)
-
-        # count frequency of each interval
-        first_intv = None
-        prev = angles[0]
-        intv = []
-        for v in angles:
-            if v <= prev + self.time_err:  # belongs to same interval
-                prev = v
-                intv.append(v)
-            else:  # create new interval
-                if intv[0] == angles[0]:  # keep information of first interval
-                    first_intv = intv
-                elif len(intv) >= self.min_sup:  # add interval to dense region
-                    dense_regions.append(intv)
-                prev = v
-                intv = [v]
+        starts, ends = self.split_intervals(angles, self.time_err)
+        sizes = self.interval_sizes(starts, ends, weights)
+
+        if len(starts) == 1:    # found only one interval in components
+            if sizes[0] >= self.min_sup:
+                dense_regions.append(self.summarize_region(angles, weights, True))
+            return dense_regions
+
+        # add intervals other than the first and the last one
+        for i in range(1, len(starts) - 1):
+            if sizes[i] >= self.min_sup:
+                dense_regions.append(self.summarize_region(angles[starts[i]:ends[i]],
+                                                           self.slice_weights(weights, starts[i], ends[i]), True))
 
         # process first and last interval
-        if first_intv is not None:
-            end = intv[-1] + self.time_err  # end of last interval
-            # first interval and last interval need to be merged
-            if end >= 360 and (end - 360) >= first_intv[0]:
-                if len(first_intv) + len(intv) >= self.min_sup:
-                    dense_regions.append(intv + first_intv)
-            else:
-                if len(first_intv) >= self.min_sup:
-                    dense_regions.insert(0, first_intv)
-                if len(intv) >= self.min_sup:
-                    dense_regions.append(intv)
-        else:   # found only one interval in components
-            if len(intv) >= self.min_sup:
-                dense_regions.append(intv)
+        end = angles[-1] + self.time_err  # end of last interval
+        # first interval and last interval need to be merged
+        if end >= 360 and (end - 360) >= angles[0]:
+            if sizes[0] + sizes[-1] >= self.min_sup:
+                merged = np.concatenate((angles[starts[-1]:], angles[:ends[0]]))
+                if weights is not None:
+                    weights = np.concatenate((weights[starts[-1]:], weights[:ends[0]]))
+                dense_regions.append(self.summarize_region(merged, weights, True))
+        else:
+            if sizes[0] >= self.min_sup:
+                dense_regions.insert(0, self.summarize_region(angles[:ends[0]],
+                                                              self.slice_weights(weights, 0, ends[0]), True))
+            if sizes[-1] >= self.min_sup:
+                dense_regions.append(self.summarize_region(angles[starts[-1]:],
+                                                           self.slice_weights(weights, starts[-1], len(angles)), True))
 
         return dense_regions
 
     # get dense regions of numeric type component
-    def get_numeric_regions(self, components):
+    def get_numeric_regions(self, components, weights=None):
         dense_regions = []
 
-        components = sorted(components)
-        components.append(components[-1] + SelfAutomation.INTMAX)
-
-        # count frequency of each interval
-        prev = components[0]
-        intv = []
-        for v in components:
-            if v <= prev + self.num_err:  # belongs to same interval
-                prev = v
-                intv.append(v)
-            else:  # create new interval
-                if len(intv) >= self.min_sup:  # add interval to dense region
-                    dense_regions.append(intv)
-                prev = v
-                intv = [v]
-
-        if len(intv) >= self.min_sup:
-            dense_regions.append(intv)
+        components, weights = self.sort_components(components, weights)
+        starts, ends = self.split_intervals(components, self.num_err)
+        sizes = self.interval_sizes(starts, ends, weights)
+
+        for s, e, size in zip(starts, ends, sizes):
+            if size >= self.min_sup:
+                dense_regions.append(self.summarize_region(components[s:e], self.slice_weights(weights, s, e)))
 
         return dense_regions
 
+    # return DenseRegion summarizing sorted values of a region
+    # date changing interval of time component continues from the end of a day to the start of next day
+    # mode is the most frequent value, if tie exists, the value closest to mean as most_frequent()
+    @staticmethod
+    def summarize_region(values, weights=None, is_time=False):
+        start = values[0].item()
+        end = values[-1].item()
+
+        if weights is None:
+            weights = np.ones(len(values), dtype=np.int64)
+        count = weights.sum().item()
+        total = (values * weights).sum().item()
+
+        if is_time and start > end:  # date changing interval
+            values = values - start
+            values[values < 0] += 360
+
+        # distinct values and number of occurrences of each
+        firsts = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+        distinct = values[firsts]
+        occurrences = SelfAutomation.interval_sizes(firsts, np.append(firsts[1:], len(values)), weights)
+
+        cands = np.flatnonzero(occurrences == occurrences.max())
+        if len(cands) == 1:
+            mode = distinct[cands[0]].item()
+        else:
+            mean = (values * weights).sum() / count
+            mode = distinct[cands[np.argmin(np.abs(distinct[cands] - mean))]].item()
+
+        if is_time and start > end:
+            mode = (mode + start) % 360
+
+        return DenseRegion(start, end, count, mode, total)
+
+    # return weights of values[start:end]
+    @staticmethod
+    def slice_weights(weights, start, end):
+        return None if weights is None else weights[start:end]
+
+    # return sorted components and weights reordered along with them
+    @staticmethod
+    def sort_components(components, weights=None):
+        if weights is None:
+            return np.sort(np.asarray(components)), None
+
+        components = np.asarray(components)
+        order = np.argsort(components, kind='stable')
+        return components[order], np.asarray(weights)[order]
+
+    # return start and end(exclusive) indices of intervals in sorted values
+    # new interval begins where gap from previous value exceeds err
+    @staticmethod
+    def split_intervals(values, err):
+        # same comparison as 'v <= prev + err' to keep boundaries of floating point values
+        breaks = np.flatnonzero(values[1:] > values[:-1] + err) + 1
+        starts = np.concatenate(([0], breaks))
+        ends = np.append(breaks, len(values))
+        return starts, ends
+
+    # return number of logs belonging to each interval
+    @staticmethod
+    def interval_sizes(starts, ends, weights=None):
+        if weights is None:
+            return ends - starts
+
+        cum_weights = np.concatenate(([0], np.cumsum(weights)))
+        return cum_weights[ends] - cum_weights[starts]
+
     # get dense regions of string type features
-    def get_string_regions(self, values):
+    def get_string_regions(self, values, weights=None):
         dense_regions = []
 
-        c = Counter(values)
+        if weights is None:
+            c = Counter(values)
+        else:
+            c = Counter()
+            for v, w in zip(values, weights):
+                c[v] += w
 
         for k, v in c.items():
             if v >= self.min_sup:
@@ -309,6 +701,12 @@ class SelfAutomation:
 
         return dense_regions
 
+    # get dense regions of string type features encoded as codes of categories
+    def get_category_regions(self, codes, categories, weights=None):
+        c = np.bincount(codes, weights, minlength=len(categories))
+
+        return [categories[k] for k in np.flatnonzero(c >= self.min_sup)]
+
     # return cluster candidate
     # time and numeric component returns dense region as interval
     def get_candidate_cluster(self, dense_regions, log):
@@ -319,9 +717,9 @@ class SelfAutomation:
 
             cur = int((start + end) / 2)
 
-            if regions[cur][0] <= val <= regions[cur][-1]:
+            if regions[cur].start <= val <= regions[cur].end:
                 return cur
-            elif val < regions[cur][0]:
+            elif val < regions[cur].start:
                 return find_intv(start, cur)
             else:
                 return find_intv(cur + 1, end)
@@ -335,9 +733,9 @@ class SelfAutomation:
             if self.is_time(comp):
                 if 'time' in dense_regions:
                     total_regions = dense_regions['time']   # entire regions for time component
-                    if total_regions[-1][0] > total_regions[-1][-1]:    # last interval is date changing interval
-                        if val <= total_regions[-1][-1] or total_regions[-1][0] <= val:
-                            candidate.append(('time', (total_regions[-1][0], total_regions[-1][-1])))
+                    if total_regions[-1].start > total_regions[-1].end:    # last interval is date changing interval
+                        if val <= total_regions[-1].end or total_regions[-1].start <= val:
+                            candidate.append(('time', (total_regions[-1].start, total_regions[-1].end)))
                             continue
                         else:
                             regions = total_regions[0:-1]   # remove date changing interval
@@ -345,14 +743,14 @@ class SelfAutomation:
                         regions = total_regions
                     idx = find_intv(0, len(regions))
                     if idx != -1:
-                        candidate.append(('time', (regions[idx][0], regions[idx][-1])))
+                        candidate.append(('time', (regions[idx].start, regions[idx].end)))
             elif self.is_numeric(comp):
                 if key in dense_regions:
                     regions = dense_regions[key]
                     # find interval
                     idx = find_intv(0, len(regions))
                     if idx != -1:
-                        candidate.append((key, (regions[idx][0], regions[idx][-1])))
+                        candidate.append((key, (regions[idx].start, regions[idx].end)))
             else:  # string type component
                 if (key in dense_regions) and (val in dense_regions[key]):
                     candidate.append((key, val))
@@ -391,38 +789,14 @@ class SelfAutomation:
             return val
 
     # Helper Functions
-    # return device usage logs as a dictionary
-    @staticmethod
-    def read_log(file_name):
-        try:
-            with open(file_name, "r") as f:
-                data = json.load(f)
-            return data
-        except FileNotFoundError as e:
-            print(e)
-            return None
-
     # return a dictionary of formatted logs
     # key: command, 'value': list of corresponding logs
     @staticmethod
     def cls_log(logs):
         log_cmd_dict = {}
-        for log in logs:
+        for log, new_log in SelfAutomation.format_logs(logs):
             cmd = log['command']
 
-            new_log = []
-            for k, v in log.items():
-                # convert time component to angle representation
-                if SelfAutomation.is_time([k, v]):
-                    new_log.append(('time', SelfAutomation.time_to_ang(v)))
-                # split the list and name each component as "device_name:index"
-                elif type(v) is list:
-                    for idx, elem in enumerate(v):
-                        new_log.append((k + ":" + str(idx), elem))
-                # remove command component
-                elif k != 'command':
-                    new_log.append((k, v))
-
             if cmd in log_cmd_dict:
                 log_cmd_dict[cmd].append(new_log)
             else:
@@ -430,6 +804,36 @@ class SelfAutomation:
 
         return log_cmd_dict
 
+    # return a dictionary of formatted logs stored as columns
+    # key: command, value: LogTable of corresponding logs
+    @staticmethod
+    def cls_log_table(logs):
+        builders = {}
+        for log, new_log in SelfAutomation.format_logs(logs):
+            cmd = log['command']
+
+            if cmd not in builders:
+                builders[cmd] = TableBuilder()
+            builders[cmd].add(new_log)
+
+        return {cmd: builder.build() for cmd, builder in builders.items()}
+
+    # yield each log with its formatted log
+    # time components of every chunk of logs are converted to angles at once
+    @staticmethod
+    def format_logs(logs, chunk_size=CHUNK_SIZE):
+        logs = iter(logs)
+        while True:
+            chunk = list(islice(logs, chunk_size))
+            if len(chunk) == 0:
+                return
+
+            angles = SelfAutomation.times_to_ang([v for log in chunk for k, v in log.items()
+                                                  if SelfAutomation.is_time([k, v])])
+            angles = iter(angles.tolist())
+            for log in chunk:
+                yield log, SelfAutomation.format_log(log, angles)
+
     # return a dictionary summarizing entire input logs
     # key: name of a component, value: list of values corresponding to a key
     @staticmethod
@@ -447,28 +851,47 @@ class SelfAutomation:
 
         return log_dict
 
-    # return true if point represents time component
+    # return logs and number of occurrences of each log
+    # occurrences are None if logs are given as a list
     @staticmethod
-    def is_time(point):
-        return (point[0] == 'timestamp') or (point[0] == 'time')
+    def split_counts(logs):
+        if isinstance(logs, dict):
+            return list(logs.keys()), list(logs.values())
+        return logs, None
 
-    # return true if point represents numerical component
+    # return logs as a LogTable
+    # logs: list of logs, LogTable, or dictionary of key: distinct log, value: number of occurrences
     @staticmethod
-    def is_numeric(point):
-        return isinstance(point[1], (int, float, complex)) or isinstance(point[1][0], (int, float, complex))
-
-    # convert string representation of time to angle
+    def to_table(logs, counts=None):
+        if isinstance(logs, LogTable):
+            return logs
+        logs, log_counts = SelfAutomation.split_counts(logs)
+        return LogTable.from_logs(logs, log_counts if counts is None else counts)
+
+    # convert string representations of time to angles at once
+    # time is read from fixed position(hh:mm from 11th character), other forms are converted by time_to_ang()
     @staticmethod
-    def time_to_ang(str_time):
-        frmt = '%H:%M'
-        dt = datetime.strptime(str_time[11:16], frmt)
+    def times_to_ang(str_times):
+        if len(str_times) == 0:
+            return np.zeros(0)
 
-        return (dt.hour * 60 + dt.minute) / 4
+        try:
+            raw = np.array(str_times, dtype='S')
+        except UnicodeEncodeError:  # not a timestamp
+            return np.array([SelfAutomation.time_to_ang(t) for t in str_times])
+        if raw.dtype.itemsize < 16:
+            return np.array([SelfAutomation.time_to_ang(t) for t in str_times])
 
-    # convert angle to string representation of time
-    @staticmethod
-    def ang_to_time(angle):
-        minute = angle * 4
-        if minute >= 1440:
-            minute -= 1440
-        return '%02i:%02i' % divmod(minute, 60)
+        chars = raw.view(np.uint8).reshape(len(raw), raw.dtype.itemsize)[:, 11:16].astype(np.int64)
+        digits = chars - ord('0')
+        hour = digits[:, 0] * 10 + digits[:, 1]
+        minute = digits[:, 3] * 10 + digits[:, 4]
+
+        valid = (chars[:, 2] == ord(':')) & (hour < 24) & (minute < 60)
+        valid &= ((digits[:, [0, 1, 3, 4]] >= 0) & (digits[:, [0, 1, 3, 4]] <= 9)).all(axis=1)
+
+        angles = (hour * 60 + minute) / 4
+        for idx in np.flatnonzero(~valid):
+            angles[idx] = SelfAutomation.time_to_ang(str_times[idx])
+
+        return angles
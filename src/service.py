@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import signal
+import asyncio
+import argparse
+import multiprocessing
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor
+
+from .self_automation import SelfAutomation
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+# return status and body of response to payload, body of 200 is {'rules': list of {'name': file name, 'rule': rule}}
+# payload: bytes of log file, parsed here to keep decoding off event loop and to send bytes instead of objects to
+# worker process, name: file name used to name rules, or None to name them after device
+def mine_rules(payload, name=None, param=None):
+    try:
+        data = json.loads(payload)
+        history = data['history']
+        if name is None:
+            name = data['device'] + '.json'
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return 400, {'error': 'payload is not a log file'}
+    if not isinstance(history, list):
+        return 400, {'error': 'history is not a list'}
+
+    automation = SelfAutomation(param=param)
+    if len(history) < automation.min_sup:
+        return 200, {'rules': []}
+
+    rules = automation.generate_rules(data, automation.cls_log_table(history))
+
+    result = []
+    for cmd, cmd_rules in rules.items():
+        for idx, rule in enumerate(cmd_rules):
+            result.append({'name': automation.rule_file_name(name, cmd, idx, len(cmd_rules)), 'rule': rule})
+    return 200, {'rules': result}
+
+
+# long-running service generating rules of log payloads sent by HTTP over TCP or unix socket
+# POST /rules with log file content as body returns {'rules': list of {'name', 'rule'}}
+# rules are named after query parameter name as a log file, or after device if not given
+# GET /health returns number of requests in progress
+# requests beyond max_in_flight are rejected with 503 instead of waiting
+class RuleService:
+    def __init__(self, param=None, workers=None, max_in_flight=None, max_body=256 * 1024 * 1024, executor=None):
+        self.param = param
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.max_body = max_body
+
+        # clustering runs in executor, process pool is created when service starts if not given
+        self.executor = executor
+        self.own_executor = executor is None
+
+        self.server = None
+        self.in_flight = 0
+        self.closing = False
+        self.drained = None
+
+    # start listening on host and port, or on unix socket if path is given
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        if self.executor is None:
+            # forking a process with running threads of event loop and pool may deadlock in child
+            # forkserver is not available on Windows, where processes are spawned by default
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                self.executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context('forkserver'))
+            else:
+                self.executor = ProcessPoolExecutor(self.workers)
+        self.drained = asyncio.Event()
+        self.drained.set()
+
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self
+
+    # return address the service listens on
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    # stop accepting connections and wait for requests in progress
+    async def stop(self, timeout=None):
+        self.closing = True
+        self.server.close()
+        await self.server.wait_closed()
+        try:
+            await asyncio.wait_for(self.drained.wait(), timeout)
+        finally:
+            if self.own_executor:
+                self.executor.shutdown(wait=True)
+
+    async def handle(self, reader, writer):
+        try:
+            status, body = await self.respond(reader)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            status, body = 400, {'error': 'malformed request'}
+
+        payload = json.dumps(body).encode()
+        head = 'HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: close\r\n' \
+               % (status, REASONS[status], len(payload))
+        if status == 503:
+            head += 'Retry-After: 1\r\n'
+
+        try:
+            writer.write(head.encode() + b'\r\n' + payload)
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    # return status and body of response to request
+    async def respond(self, reader):
+        method, target, _ = (await reader.readuntil(b'\r\n')).decode('latin-1').split(' ', 2)
+        headers = {}
+        while True:
+            line = (await reader.readuntil(b'\r\n')).decode('latin-1')
+            if line == '\r\n':
+                break
+            key, val = line.split(':', 1)
+            headers[key.strip().lower()] = val.strip()
+
+        url = urlsplit(target)
+        path = url.path
+        if path == '/health':
+            return 200, {'status': 'closing' if self.closing else 'ok', 'in_flight': self.in_flight}
+        if path != '/rules':
+            return 404, {'error': 'unknown path'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+
+        length = int(headers.get('content-length', 0))
+        if length > self.max_body:
+            return 413, {'error': 'payload larger than %d bytes' % self.max_body}
+        # backpressure, reject instead of queueing
+        if self.closing or self.in_flight >= self.max_in_flight:
+            return 503, {'error': 'too many requests in progress'}
+
+        self.in_flight += 1
+        self.drained.clear()
+        try:
+            body = await reader.readexactly(length)
+            name = parse_qs(url.query).get('name', [None])[0]
+
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self.executor, mine_rules, body, name, self.param)
+            except Exception as e:
+                return 500, {'error': repr(e)}
+        finally:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self.drained.set()
+
+
+async def serve(args):
+    param = None
+    if args.min_sup is not None:
+        param = {'min_sup': args.min_sup, 'time_err': args.time_err, 'int_err': args.int_err}
+
+    service = RuleService(param, args.workers, args.max_in_flight)
+    await service.start(args.host, args.port, args.unix)
+    print('listening on', service.address(), file=sys.stderr)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    await service.stop(args.shutdown_timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='serve rule generation over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--unix', help='path of unix socket to listen on instead of TCP')
+    parser.add_argument('--workers', type=int, help='number of clustering processes')
+    parser.add_argument('--max-in-flight', type=int, help='number of requests processed at once')
+    parser.add_argument('--shutdown-timeout', type=float, default=30, help='seconds to wait for requests on exit')
+    parser.add_argument('--min-sup', type=int)
+    parser.add_argument('--time-err', type=float, default=3.75)
+    parser.add_argument('--int-err', type=float, default=5)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+import numpy as np
+
+from .self_automation import SelfAutomation
+from .rule_emitter import RuleEmitter
+from .run_stats import NULL_STATS
+from .dense_region import DenseRegion
+from .log_table import TIME, NUMERIC
+
+DEFAULT_BUDGET = {'bins': 256, 'bin_values': 64, 'strings': 1024, 'candidates': 4096}
+
+
+# counter keeping at most capacity items, items are kept in order of first appearance
+# when items exceed capacity, the most frequent ones are kept and count of every item may be underestimated
+# error: upper bound of underestimation of counts, items not kept have at most error occurrences
+class BoundedCounter:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.error = 0
+
+    def add(self, item, count):
+        self.counts[item] = self.counts.get(item, 0) + count
+
+    # add counts and error of other counter
+    def merge(self, other):
+        for item, count in other.counts.items():
+            self.add(item, count)
+        self.error += other.error
+        self.truncate()
+
+    # drop least frequent items beyond capacity
+    def truncate(self):
+        if len(self.counts) <= self.capacity:
+            return
+
+        # most frequent items, items of the same count in order of appearance
+        ranked = sorted(self.counts.items(), key=lambda c: -c[1])
+        kept = {item for item, _ in ranked[:self.capacity]}
+
+        self.error += ranked[self.capacity][1]
+        self.counts = {item: count for item, count in self.counts.items() if item in kept}
+
+    # return items with count of at least threshold, in order of first appearance
+    def frequent(self, threshold):
+        return {item: count for item, count in self.counts.items() if count >= threshold}
+
+
+# values of numeric component summarized as bins of values close to each other
+# values of a bin form one interval of get_numeric_regions() as long as only bins within err are merged
+# when bins exceed capacity, the closest bins are merged and merged_gap keeps the largest gap merged
+class NumericSketch:
+    def __init__(self, err, capacity, bin_values):
+        self.err = err
+        self.capacity = capacity
+        self.bin_values = bin_values
+        self.bins = []  # list of [start, end, count, total, BoundedCounter of values] sorted by start
+        self.merged_gap = 0
+
+    # add values of a chunk of logs
+    def add(self, values):
+        values = np.sort(np.asarray(values))
+        starts, ends = SelfAutomation.split_intervals(values, self.err)
+
+        bins = self.bins
+        for s, e in zip(starts.tolist(), ends.tolist()):
+            distinct, counts = np.unique(values[s:e], return_counts=True)
+            counter = BoundedCounter(self.bin_values)
+            for v, c in zip(distinct.tolist(), counts.tolist()):
+                counter.add(v, c)
+            counter.truncate()
+            bins.append([values[s].item(), values[e - 1].item(), e - s, values[s:e].sum().item(), counter])
+
+        bins.sort(key=lambda b: b[0])
+        self.bins = self.merge_close(bins)
+
+        while len(self.bins) > self.capacity:
+            gaps = [b[0] - a[1] for a, b in zip(self.bins[:-1], self.bins[1:])]
+            i = gaps.index(min(gaps))
+            self.merged_gap = max(self.merged_gap, gaps[i])
+            self.bins[i:i + 2] = [self.merge_bins(self.bins[i], self.bins[i + 1])]
+
+    # merge sorted bins within err of each other
+    def merge_close(self, bins):
+        merged = []
+        for b in bins:
+            # same comparison as split_intervals()
+            if len(merged) > 0 and b[0] <= merged[-1][1] + self.err:
+                merged[-1] = self.merge_bins(merged[-1], b)
+            else:
+                merged.append(b)
+        return merged
+
+    @staticmethod
+    def merge_bins(a, b):
+        a[4].merge(b[4])
+        return [min(a[0], b[0]), max(a[1], b[1]), a[2] + b[2], a[3] + b[3], a[4]]
+
+    # return dense 1-regions of bins with at least min_sup values, as get_numeric_regions()
+    def regions(self, min_sup):
+        dense_regions = []
+        for start, end, count, total, counter in self.bins:
+            if count >= min_sup:
+                dense_regions.append(DenseRegion(start, end, count, self.mode(counter, total / count), total))
+        return dense_regions
+
+    # return largest underestimation of occurrences of values in bins
+    def mode_error(self):
+        return max([b[4].error for b in self.bins], default=0)
+
+    # return most frequent value, if tie exists, the value closest to mean as summarize_region()
+    @staticmethod
+    def mode(counter, mean):
+        top = max(counter.counts.values())
+        cands = sorted(v for v, c in counter.counts.items() if c == top)
+        return min(cands, key=lambda v: abs(v - mean))
+
+
+# SelfAutomation mining history with memory bounded by budget instead of keeping every value
+# history is read twice, once for dense 1-regions and once for candidate clusters
+# - time components are counted for each minute of a day, which is exact in constant memory
+# - numeric components are summarized by NumericSketch, strings and candidates by BoundedCounter
+# rules are the same as SelfAutomation while every sketch stays within budget
+# bounds of last mining are kept in bounds, key: command, value: dictionary of
+# 'merged_gap': largest gap merged beyond int_err, 'mode_error', 'string_error', 'support_error': largest
+# underestimation of occurrences of a value in numeric bins, of a string value and of a candidate cluster
+class SketchAutomation(SelfAutomation):
+    # budget: dictionary of 'bins': number of bins of a numeric component, 'bin_values': number of values
+    # counted in a bin, 'strings': number of values of a string component, 'candidates': number of candidates
+    def __init__(self, input_dir='./logs/', param=None, budget=None):
+        super().__init__(input_dir, param)
+        self.budget = dict(DEFAULT_BUDGET, **(budget or {}))
+        self.bounds = {}
+
+    # export rules of log file read as a stream twice and return file names of exported rules as a list
+    def run(self, file_in, dir_out='./output/', stats=None, sink=None):
+        return self.run_stream(self.input_dir + file_in, file_in, dir_out, stats, sink)
+
+    # return rules of each command as generate_rules(), None if history is shorter than minimum support
+    # history: function returning a new iterator of logs of history
+    def mine_stream(self, data, history, stats=NULL_STATS):
+        sketches, num_logs = self.sketch_values(history())
+        stats.record_read(num_logs)
+        if num_logs < self.min_sup:
+            return None
+
+        dense_regions = {}
+        self.bounds = {}
+        for cmd, columns in sketches.items():
+            dense_regions[cmd], self.bounds[cmd] = self.sketch_regions(columns)
+
+        cand_dicts = self.sketch_candidates(history(), dense_regions)
+
+        rules = {}
+        for cmd, dense in dense_regions.items():
+            counter = cand_dicts[cmd]
+            self.bounds[cmd]['support_error'] = counter.error
+
+            cand_dict = self.select_candidates(counter.counts, dense)
+            clusters = self.format_clusters(cand_dict, dense, info=True)
+
+            emitter = RuleEmitter(self, data, cmd)
+            rules[cmd] = [emitter.emit(log) for log in clusters]
+        return rules
+
+    # return sketch of each component of each command, and number of logs
+    # sketch of time is a dictionary of key: angle, value: occurrences
+    def sketch_values(self, history):
+        sketches = {}  # key: command, value: dictionary of key: name of component, value: (kind, sketch)
+        num_logs = 0
+        for tables in self.chunk_tables(history):
+            for cmd, table in tables.items():
+                num_logs += table.size
+                columns = sketches.setdefault(cmd, {})
+                for key, column in table.columns.items():
+                    if key not in columns:
+                        if column.kind == TIME:
+                            sketch = {}
+                        elif column.kind == NUMERIC:
+                            sketch = NumericSketch(self.num_err, self.budget['bins'], self.budget['bin_values'])
+                        else:
+                            sketch = BoundedCounter(self.budget['strings'])
+                        columns[key] = (column.kind, sketch)
+
+                    kind, sketch = columns[key]
+                    if kind == TIME:
+                        distinct, counts = np.unique(column.values, return_counts=True)
+                        for v, c in zip(distinct.tolist(), counts.tolist()):
+                            sketch[v] = sketch.get(v, 0) + c
+                    elif kind == NUMERIC:
+                        sketch.add(column.values)
+                    else:
+                        counts = np.bincount(column.values, minlength=len(column.categories))
+                        for code in np.flatnonzero(counts).tolist():
+                            sketch.add(column.categories[code], int(counts[code]))
+                        sketch.truncate()
+        return sketches, num_logs
+
+    # return dense 1-regions of sketches of a command and bounds of their errors
+    def sketch_regions(self, columns):
+        dense_regions = {}
+        bounds = {'merged_gap': 0, 'mode_error': 0, 'string_error': 0}
+        for key, (kind, sketch) in columns.items():
+            if kind == TIME:
+                angles = np.array(sorted(sketch.keys()))
+                category, regions = 'time', self.get_time_regions(angles, np.array([sketch[a] for a in angles]))
+            elif kind == NUMERIC:
+                category, regions = key, sketch.regions(self.min_sup)
+                bounds['merged_gap'] = max(bounds['merged_gap'], sketch.merged_gap)
+                bounds['mode_error'] = max(bounds['mode_error'], sketch.mode_error())
+            else:
+                category, regions = key, list(sketch.frequent(self.min_sup).keys())
+                bounds['string_error'] = max(bounds['string_error'], sketch.error)
+
+            if len(regions) > 0:
+                dense_regions[category] = regions
+        return dense_regions, bounds
+
+    # return BoundedCounter of candidates of each command, candidates are kept in order of appearance
+    def sketch_candidates(self, history, dense_regions):
+        cand_dicts = {cmd: BoundedCounter(self.budget['candidates']) for cmd in dense_regions}
+        for tables in self.chunk_tables(history):
+            for cmd, table in tables.items():
+                counter = cand_dicts[cmd]
+                for cand, cnt in self.count_candidates(dense_regions[cmd], table).items():
+                    counter.add(cand, cnt)
+                counter.truncate()
+        return cand_dicts
@@ -0,0 +1,238 @@
+from bisect import bisect_right
+
+from .automation_base import AutomationBase
+from .dense_region import DenseRegion
+from .rule_sink import FileSink
+from .rule_emitter import RuleEmitter
+from .run_stats import NULL_STATS
+
+# kinds of component, same as kinds of column of LogTable
+TIME = 'time'
+NUMERIC = 'numeric'
+STRING = 'string'
+
+
+# SelfAutomation for small histories written in pure python without NumPy
+# rules are the same as SelfAutomation with 'exact' backend, importing this module takes a fraction of the time
+class SmallAutomation(AutomationBase):
+    # export self-generated rules and return file names of exported rules as a list, same as run() of SelfAutomation
+    def run(self, file_in, dir_out='./output/', stats=None, sink=None):
+        stats = NULL_STATS if stats is None else stats
+        sink = FileSink(dir_out) if sink is None else sink
+
+        with stats.stage('read_log'):
+            data = self.read_log(self.input_dir + file_in)
+        stats.record_read(len(data['history']))
+        sink.begin_device(data['device'])
+
+        if len(data['history']) < self.min_sup:
+            print("No rule is detected")
+            return []
+
+        return self.write_rules(data, self.generate_rules(data), file_in, stats, sink)
+
+    # return rules of each command as a dictionary, key: command, value: list of rules
+    def generate_rules(self, data):
+        log_cmd_dict = {}
+        for log in data['history']:
+            log_cmd_dict.setdefault(log['command'], []).append(self.format_log(log))
+
+        return {cmd: self.mine_command(data, cmd, logs) for cmd, logs in log_cmd_dict.items()}
+
+    # return rules of a command
+    def mine_command(self, data, cmd, logs):
+        clusters = self.cluster_log(logs) if len(logs) >= self.min_sup else []
+        if len(clusters) == 0:
+            print("No rule is detected")
+
+        emitter = RuleEmitter(self, data, cmd)
+        return [emitter.emit(cluster) for cluster in clusters]
+
+    # return clusters of formatted logs, same as cluster_log() of SelfAutomation with info
+    def cluster_log(self, logs):
+        columns = self.get_columns(logs)
+
+        # dense 1-regions of each column in order of appearance
+        dense_regions = {}
+        for key, (kind, values, _) in columns.items():
+            if kind == TIME:
+                regions = self.get_time_regions(sorted(values))
+            elif kind == NUMERIC:
+                regions = self.get_numeric_regions(sorted(values))
+            else:
+                regions = self.get_string_regions(values)
+            if len(regions) > 0:
+                dense_regions[key] = (kind, regions)
+
+        # number of logs of each candidate in order of appearance
+        # candidate holds index of dense region of time and numeric components, value of string components
+        cand_dict = {}
+        for log in logs:
+            log = dict(log)
+            candidate = []
+            for key, (kind, regions) in dense_regions.items():
+                if key not in log:
+                    continue
+                val = columns[key][2](log[key])
+                if kind == STRING:
+                    if val in regions:
+                        candidate.append((key, val))
+                else:
+                    idx = self.find_region(regions, val, kind == TIME)
+                    if idx >= 0:
+                        candidate.append((key, idx))
+            if len(candidate) > 0:
+                candidate = tuple(candidate)
+                cand_dict[candidate] = cand_dict.get(candidate, 0) + 1
+
+        clusters = []
+        for candidate, cnt in cand_dict.items():
+            if cnt >= self.min_sup:
+                center = []
+                for key, region in candidate:
+                    kind, regions = dense_regions[key]
+                    if kind != STRING:
+                        region = regions[region]
+
+                    if kind == TIME:
+                        center.append(('time', (self.ang_to_time(region.mode),
+                                                (self.ang_to_time(region.start), self.ang_to_time(region.end)))))
+                    elif kind == NUMERIC:
+                        center.append((key, (region.mode, region.mean())))
+                    else:
+                        center.append((key, region))
+                clusters.append(tuple(center))
+        return clusters
+
+    # return dictionary of key: name of component, value: (kind, values, conversion of a value)
+    # values are converted as values of LogTable, numbers are floats if any of them is not an integer
+    @staticmethod
+    def get_columns(logs):
+        columns = {}
+        for log in logs:
+            for key, val in log:
+                if key not in columns:
+                    if key == 'time' or key == 'timestamp':
+                        kind = TIME
+                    elif isinstance(val, (int, float)):
+                        kind = NUMERIC
+                    else:
+                        kind = STRING
+                    columns[key] = (kind, [])
+                columns[key][1].append(val)
+
+        converted = {}
+        for key, (kind, values) in columns.items():
+            if kind == NUMERIC:
+                convert = int if all(isinstance(v, int) for v in values) else float
+                values = [convert(v) for v in values]
+            else:
+                convert = SmallAutomation.identity
+            converted[key] = (kind, values, convert)
+        return converted
+
+    @staticmethod
+    def identity(val):
+        return val
+
+    # return index of dense region containing val, -1 if val is out of every region
+    @staticmethod
+    def find_region(regions, val, is_time=False):
+        if is_time and regions[-1].start > regions[-1].end:   # last interval is date changing interval
+            if val <= regions[-1].end or regions[-1].start <= val:
+                return len(regions) - 1
+            regions = regions[:-1]
+
+        idx = bisect_right([r.start for r in regions], val) - 1
+        if idx >= 0 and val <= regions[idx].end:
+            return idx
+        return -1
+
+    # return dense 1-regions of sorted angles of time components
+    def get_time_regions(self, angles):
+        dense_regions = []
+        intervals = self.split_intervals(angles, self.time_err)
+
+        if len(intervals) == 1:    # found only one interval in components
+            if len(angles) >= self.min_sup:
+                dense_regions.append(self.summarize_region(angles, True))
+            return dense_regions
+
+        # add intervals other than the first and the last one
+        for s, e in intervals[1:-1]:
+            if e - s >= self.min_sup:
+                dense_regions.append(self.summarize_region(angles[s:e], True))
+
+        # process first and last interval
+        first, last = intervals[0], intervals[-1]
+        end = angles[-1] + self.time_err  # end of last interval
+        # first interval and last interval need to be merged
+        if end >= 360 and (end - 360) >= angles[0]:
+            if (first[1] - first[0]) + (last[1] - last[0]) >= self.min_sup:
+                dense_regions.append(self.summarize_region(angles[last[0]:] + angles[:first[1]], True))
+        else:
+            if first[1] - first[0] >= self.min_sup:
+                dense_regions.insert(0, self.summarize_region(angles[:first[1]], True))
+            if last[1] - last[0] >= self.min_sup:
+                dense_regions.append(self.summarize_region(angles[last[0]:], True))
+
+        return dense_regions
+
+    # return dense 1-regions of sorted values of numeric components
+    def get_numeric_regions(self, values):
+        return [self.summarize_region(values[s:e]) for s, e in self.split_intervals(values, self.num_err)
+                if e - s >= self.min_sup]
+
+    # return values of string components appearing at least minimum support times, in order of appearance
+    def get_string_regions(self, values):
+        counts = {}
+        for v in values:
+            counts[v] = counts.get(v, 0) + 1
+        return [v for v, c in counts.items() if c >= self.min_sup]
+
+    # return start and end(exclusive) indices of intervals in sorted values
+    # new interval begins where gap from previous value exceeds err
+    @staticmethod
+    def split_intervals(values, err):
+        intervals = []
+        start = 0
+        for i in range(1, len(values)):
+            if values[i] > values[i - 1] + err:
+                intervals.append((start, i))
+                start = i
+        intervals.append((start, len(values)))
+        return intervals
+
+    # return DenseRegion summarizing sorted values of a region, same as summarize_region() of SelfAutomation
+    @staticmethod
+    def summarize_region(values, is_time=False):
+        start = values[0]
+        end = values[-1]
+        count = len(values)
+        total = sum(values)
+
+        if is_time and start > end:  # date changing interval
+            values = [v - start + 360 if v - start < 0 else v - start for v in values]
+
+        # distinct values and number of occurrences of each
+        distinct = []
+        occurrences = []
+        for v in values:
+            if len(distinct) > 0 and distinct[-1] == v:
+                occurrences[-1] += 1
+            else:
+                distinct.append(v)
+                occurrences.append(1)
+
+        top = max(occurrences)
+        cands = [v for v, c in zip(distinct, occurrences) if c == top]
+        if len(cands) == 1:
+            mode = cands[0]
+        else:
+            mean = sum(values) / count
+            mode = min(cands, key=lambda v: abs(v - mean))
+
+        if is_time and start > end:
+            mode = (mode + start) % 360
+
+        return DenseRegion(start, end, count, mode, total)
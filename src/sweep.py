@@ -0,0 +1,149 @@
+from itertools import product
+
+import numpy as np
+
+from .self_automation import SelfAutomation
+from .rule_emitter import RuleEmitter
+from .dense_region import DenseRegion
+from .log_table import Column, LogTable, TIME, NUMERIC, STRING
+
+
+# return list of parameters of every combination of values in grid
+# grid: dictionary of key: 'min_sup', 'time_err', 'int_err' or 'backend', value: list of values
+def param_grid(grid):
+    keys = list(grid.keys())
+    return [dict(zip(keys, values)) for values in product(*grid.values())]
+
+
+# evaluate rules of several configurations of hyperparameters over the same history
+# logs are formatted once, values of each column are sorted and counted once, and dense regions and
+# candidates are reused by configurations sharing parameters they depend on
+class ParameterSweep:
+    # data: dictionary in format of log file
+    # log_cls_cmd: formatted logs of each command, formatted from history of data if not given
+    def __init__(self, data, log_cls_cmd=None):
+        if log_cls_cmd is None:
+            log_cls_cmd = SelfAutomation.cls_log_table(data['history'])
+        self.data = {k: v for k, v in data.items() if k != 'history'}
+        self.commands = {cmd: _CommandSweep(SelfAutomation.to_table(logs)) for cmd, logs in log_cls_cmd.items()}
+        self.num_logs = sum(c.table.num_logs() for c in self.commands.values())
+
+    # return result of each configuration as a list of
+    # {'param': parameters, 'rules': dictionary of key: command, value: rules, 'summary': counts}
+    # params: list of parameters as param of SelfAutomation, or grid of values given to param_grid()
+    def run(self, params):
+        if isinstance(params, dict):
+            params = param_grid(params)
+
+        results = []
+        for param in params:
+            automation = SelfAutomation(param=param)
+            summary = {'dense_regions': 0, 'candidates': 0, 'clusters': 0, 'rules': 0}
+            rules = {}
+
+            # same as run(), history shorter than minimum support has no rule
+            if self.num_logs >= automation.min_sup:
+                for cmd, sweep in self.commands.items():
+                    dense_regions = sweep.dense_regions(automation)
+                    cand_dict = sweep.candidates(automation, dense_regions)
+                    clusters = automation.format_clusters(automation.select_candidates(cand_dict, dense_regions),
+                                                          dense_regions, info=True)
+
+                    emitter = RuleEmitter(automation, self.data, cmd)
+                    rules[cmd] = [emitter.emit(cluster) for cluster in clusters]
+
+                    summary['dense_regions'] += sum(len(regions) for regions in dense_regions.values())
+                    summary['candidates'] += len(cand_dict)
+                    summary['clusters'] += len(clusters)
+                    summary['rules'] += len(rules[cmd])
+
+            results.append({'param': param, 'rules': rules, 'summary': summary})
+
+        return results
+
+
+# logs of a command prepared for every configuration
+class _CommandSweep:
+    def __init__(self, table):
+        self.table = table
+
+        # distinct values of each column with number of logs holding each value
+        self.values = {}  # key: name of component, value: (distinct values, counts)
+        codes = []  # index of value of each log in distinct values, 0 if log doesn't hold component
+        for key, column in table.columns.items():
+            distinct, inverse = np.unique(column.values, return_inverse=True)
+            weights = np.bincount(inverse, table.column_counts(column), minlength=len(distinct))
+            self.values[key] = (distinct, weights.astype(np.int64))
+
+            if column.rows is None:
+                codes.append(inverse + 1)
+            else:
+                full = np.zeros(table.size, dtype=np.int64)
+                full[column.rows] = inverse + 1
+                codes.append(full)
+
+        self.distinct_logs = self.distinct_table(codes)
+        self.regions = {}  # key: (name of component, min_sup, err), value: (category, dense 1-regions)
+        self.cand_dicts = {}  # key: boundaries of dense 1-regions, value: candidates
+
+    # return LogTable of distinct logs in order of appearance, with number of occurrences of each
+    def distinct_table(self, codes):
+        table = self.table
+        if len(codes) == 0:
+            return table
+
+        matrix = np.stack(codes, axis=1)
+        _, first, inverse = np.unique(matrix, axis=0, return_index=True, return_inverse=True)
+        counts = np.bincount(inverse.reshape(-1), table.counts, minlength=len(first)).astype(np.int64)
+
+        order = np.argsort(first, kind='stable')
+        matrix = matrix[first[order]]
+
+        columns = {}
+        for j, (key, column) in enumerate(table.columns.items()):
+            col_codes = matrix[:, j]
+            rows = np.flatnonzero(col_codes)
+            values = self.values[key][0][col_codes[rows] - 1]
+            columns[key] = Column(column.kind, values, None if len(rows) == len(col_codes) else rows,
+                                  column.categories)
+
+        return LogTable(columns, len(first), counts[order])
+
+    # return dense 1-regions under parameters of automation
+    def dense_regions(self, automation):
+        dense_regions = {}
+        for key, column in self.table.columns.items():
+            err = automation.time_err if column.kind == TIME else automation.num_err
+            cache_key = (key, automation.min_sup, None if column.kind == STRING else err)
+
+            if cache_key not in self.regions:
+                distinct, weights = self.values[key]
+                if column.kind == TIME:
+                    found = ('time', automation.get_time_regions(distinct, weights))
+                elif column.kind == NUMERIC:
+                    found = (key, automation.get_numeric_regions(distinct, weights))
+                else:
+                    counts = np.zeros(len(column.categories), dtype=np.int64)
+                    counts[distinct] = weights
+                    found = (key, automation.get_category_regions(np.arange(len(counts)), column.categories,
+                                                                  counts))
+                self.regions[cache_key] = found
+
+            category, regions = self.regions[cache_key]
+            if len(regions) > 0:
+                dense_regions[category] = regions
+        return dense_regions
+
+    # return candidates of dense 1-regions, counted once for each set of region boundaries
+    def candidates(self, automation, dense_regions):
+        bounds = []
+        for key, regions in dense_regions.items():
+            if isinstance(regions[0], DenseRegion):
+                bounds.append((key, tuple((r.start, r.end) for r in regions)))
+            else:
+                bounds.append((key, tuple(regions)))
+        bounds = tuple(bounds)
+
+        if bounds not in self.cand_dicts:
+            self.cand_dicts[bounds] = automation.count_candidates(dense_regions, self.distinct_logs)
+        return self.cand_dicts[bounds]
@@ -0,0 +1,176 @@
+import heapq
+from datetime import datetime
+from collections import deque
+
+from .incremental import IncrementalMiner
+
+
+# mine rules from logs in a sliding window of time
+# window: timedelta, logs not later than window before the latest log are expired
+# rules are the same as SelfAutomation on logs in window, in order they were given
+class WindowMiner(IncrementalMiner):
+    def __init__(self, data, window, input_dir='./logs/', param=None):
+        self.window = window
+        self.latest = None  # latest time of logs given so far
+        self.seq = 0  # sequence number of next log
+
+        self.expiry = []  # heap of (time, sequence number, command, log) of logs in window
+        self.first = {}  # key: command, value: dictionary of key: distinct log, value: deque of sequence numbers
+        self.order = {}  # key: command, value: heap of (first sequence number, log), entries outdated are lazily removed
+        self.expired = {}  # key: command, value: logs expired after last clustering
+        self.log_cands = {}  # key: command, value: dictionary of key: distinct log, value: candidate cluster
+        self.cand_first = {}  # key: command, value: dictionary of key: candidate cluster, value: heap like order
+
+        super().__init__(data, input_dir, param)
+
+    # add new logs to window and expire old logs
+    def update(self, new_records):
+        for record, log in self.format_logs(new_records):
+            time = self.parse_time(record['timestamp'])
+            cmd = record['command']
+            log = tuple(log)
+
+            self.add_log(cmd, log)
+            if cmd not in self.first:
+                self.first[cmd] = {}
+                self.expired[cmd] = []
+                self.order[cmd] = []
+            if log not in self.first[cmd]:
+                self.first[cmd][log] = deque()
+                heapq.heappush(self.order[cmd], (self.seq, log))
+            self.first[cmd][log].append(self.seq)
+            heapq.heappush(self.expiry, (time, self.seq, cmd, log))
+
+            self.seq += 1
+            if self.latest is None or self.latest < time:
+                self.latest = time
+
+        self.expire()
+
+    # remove logs not later than window before now, now is the latest time of logs if not given
+    def expire(self, now=None):
+        if now is None:
+            now = self.latest
+        if now is None:
+            return
+        if self.latest is None or self.latest < now:
+            self.latest = now
+
+        limit = now - self.window
+        while len(self.expiry) > 0 and self.expiry[0][0] <= limit:
+            _, seq, cmd, log = heapq.heappop(self.expiry)
+            self.remove_log(cmd, log, seq)
+
+    # remove formatted log of command given as seq-th log from state
+    def remove_log(self, cmd, log, seq):
+        logs = self.logs[cmd]
+        logs[log] -= 1
+        if logs[log] == 0:
+            del logs[log]
+
+        values = self.values[cmd]
+        for key, val in log:
+            values[key][val] -= 1
+            if values[key][val] == 0:
+                del values[key][val]
+                if len(values[key]) == 0:
+                    del values[key]
+
+        # logs usually expire in order they were given
+        seqs = self.first[cmd][log]
+        if seqs[0] == seq:
+            seqs.popleft()
+            if len(seqs) > 0:   # first sequence number of log changed
+                heapq.heappush(self.order[cmd], (seqs[0], log))
+        else:
+            seqs.remove(seq)
+        if len(seqs) == 0:
+            del self.first[cmd][log]
+
+        self.expired[cmd].append(log)
+        self.num_logs -= 1
+
+        if len(logs) == 0:  # every log of command expired
+            for state in (self.logs, self.values, self.new_logs, self.regions, self.candidates, self.clusters,
+                          self.first, self.order, self.expired, self.log_cands, self.cand_first):
+                state.pop(cmd, None)
+
+    # return commands in order of their first log in window
+    def commands(self):
+        return sorted(self.logs.keys(), key=lambda cmd: self.first_seq(self.order[cmd], self.first[cmd]))
+
+    # return the smallest first sequence number of logs in heap of (first sequence number, log)
+    # entries of logs expired or whose first sequence number changed are removed from top of heap
+    @staticmethod
+    def first_seq(heap, first):
+        while heap[0][1] not in first or first[heap[0][1]][0] != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0]
+
+    # return clusters of command, counting candidates only of new and expired logs if dense 1-regions are unchanged
+    def cluster_command(self, cmd):
+        if len(self.new_logs[cmd]) == 0 and len(self.expired[cmd]) == 0:
+            return self.clusters[cmd]
+
+        dense_regions = self.value_regions(cmd)
+        first = self.first[cmd]
+
+        # candidates depend only on boundaries of dense 1-regions
+        if cmd in self.regions and self.region_bounds(self.regions[cmd]) == self.region_bounds(dense_regions):
+            log_cands = self.log_cands[cmd]
+            cand_dict = self.candidates[cmd]
+            cand_first = self.cand_first[cmd]
+
+            # logs added and expired after last clustering have no candidate yet
+            changed = set(self.new_logs[cmd]).union(self.expired[cmd])
+            for log in changed:
+                if log not in log_cands:
+                    log_cands[log] = tuple(self.get_candidate_cluster(dense_regions, log))
+            for log in self.new_logs[cmd]:
+                cand = log_cands[log]
+                if len(cand) > 0:
+                    cand_dict[cand] = cand_dict.get(cand, 0) + 1
+            for log in self.expired[cmd]:
+                cand = log_cands[log]
+                if len(cand) > 0:
+                    cand_dict[cand] -= 1
+                    if cand_dict[cand] == 0:
+                        del cand_dict[cand]
+                        cand_first.pop(cand, None)
+
+            # first sequence numbers changed only for new and expired logs
+            for log in changed:
+                if log not in first:
+                    del log_cands[log]
+                elif len(log_cands[log]) > 0:
+                    heapq.heappush(cand_first.setdefault(log_cands[log], []), (first[log][0], log))
+        else:
+            log_cands = {log: tuple(self.get_candidate_cluster(dense_regions, log)) for log in first.keys()}
+            logs = self.logs[cmd]
+            cand_dict = {}
+            cand_first = {}
+            for log, cand in log_cands.items():
+                if len(cand) > 0:
+                    cand_dict[cand] = cand_dict.get(cand, 0) + logs[log]
+                    cand_first.setdefault(cand, []).append((first[log][0], log))
+            for heap in cand_first.values():
+                heapq.heapify(heap)
+
+        # register candidates in order of appearance in window
+        cand_dict = {cand: cand_dict[cand]
+                     for cand in sorted(cand_dict, key=lambda cand: self.first_seq(cand_first[cand], first))}
+
+        self.regions[cmd] = dense_regions
+        self.log_cands[cmd] = log_cands
+        self.cand_first[cmd] = cand_first
+        self.candidates[cmd] = cand_dict
+        selected = self.select_candidates(cand_dict, dense_regions)
+        self.clusters[cmd] = self.format_clusters(selected, dense_regions, info=True)
+        self.new_logs[cmd] = []
+        self.expired[cmd] = []
+
+        return self.clusters[cmd]
+
+    @staticmethod
+    def parse_time(timestamp):
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
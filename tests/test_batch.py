@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src.self_automation import SelfAutomation
+from src.batch import run_batch, list_log_files
+
+
+# SelfAutomation killing its process on noise.json
+class CrashingAutomation(SelfAutomation):
+    def run(self, file_in, *args, **kwargs):
+        if file_in == 'noise.json':
+            os._exit(1)
+        return super().run(file_in, *args, **kwargs)
+
+
+# tests for parallel batch execution
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.dir_in = tempfile.mkdtemp()
+        self.dir_out = tempfile.mkdtemp() + '/'
+        for file in ['simple.json', 'multiple.json', 'time.json', 'noise.json']:
+            shutil.copy('./logs/' + file, self.dir_in)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_in)
+        shutil.rmtree(self.dir_out)
+
+    def test_list_log_files(self):
+        files = list_log_files(self.dir_in)
+
+        self.assertEqual(4, len(files))
+        self.assertEqual(files, list_log_files(os.path.join(self.dir_in, '*.json')))
+        self.assertEqual([os.path.join(self.dir_in, 'time.json')], list_log_files(os.path.join(self.dir_in, 't*')))
+
+    # output is the same as serial execution
+    def test_run_batch(self):
+        manifest = run_batch(self.dir_in, self.dir_out, workers=2)
+        dir_serial = tempfile.mkdtemp() + '/'
+
+        self.assertEqual(4, len(manifest))
+        for file, entry in manifest.items():
+            expect = SelfAutomation(self.dir_in + '/').run(os.path.basename(file), dir_serial)
+            self.assertEqual(expect, entry['rules'])
+            for name in entry['rules']:
+                with open(dir_serial + name) as f1, open(self.dir_out + name) as f2:
+                    self.assertEqual(f1.read(), f2.read())
+        shutil.rmtree(dir_serial)
+
+    # failure of a file doesn't stop batch
+    def test_run_batch_error(self):
+        with open(os.path.join(self.dir_in, 'broken.json'), 'w') as f:
+            f.write('{"device": ')
+
+        manifest = run_batch(self.dir_in, self.dir_out, workers=2)
+
+        self.assertIn('error', manifest[os.path.join(self.dir_in, 'broken.json')])
+        self.assertEqual(['simple_on_rule.json'], manifest[os.path.join(self.dir_in, 'simple.json')]['rules'])
+
+        # serial execution
+        self.assertEqual(manifest, run_batch(self.dir_in, self.dir_out, workers=1))
+
+    # death of a worker process fails only the file running on it
+    def test_run_batch_crash(self):
+        expect = run_batch(self.dir_in, self.dir_out, workers=1)
+        with mock.patch('src.batch.SelfAutomation', CrashingAutomation):
+            manifest = run_batch(self.dir_in, self.dir_out, workers=2)
+
+        noise = os.path.join(self.dir_in, 'noise.json')
+        self.assertIn('BrokenProcessPool', manifest[noise]['error'])
+        del manifest[noise], expect[noise]
+        self.assertEqual(expect, manifest)
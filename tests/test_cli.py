@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import random
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+from src.self_automation import SelfAutomation
+from src.small import SmallAutomation
+from src.rule_sink import ListSink
+from src.cli import main
+
+
+# tests for command line entry point and mining small histories without NumPy
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.dir_out = tempfile.mkdtemp() + '/'
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_out)
+
+    # rules of pure python mining are the same as SelfAutomation
+    def test_small(self):
+        for file in sorted(os.listdir('./logs/')):
+            for param in [None, {'min_sup': 2, 'time_err': 15, 'int_err': 1}]:
+                expect, sink = ListSink(), ListSink()
+                names = SelfAutomation(param=param).run(file, sink=expect)
+
+                self.assertEqual(names, SmallAutomation(param=param).run(file, sink=sink))
+                self.assertEqual([(n, json.dumps(r)) for n, r in expect.rules],
+                                 [(n, json.dumps(r)) for n, r in sink.rules])
+
+    def test_small_random(self):
+        rnd = random.Random(0)
+        for _ in range(20):
+            history = []
+            for _ in range(200):
+                log = {'timestamp': '2022-01-01T%02d:%02d:00.000Z' % (rnd.choice([0, 12, 23]), rnd.randrange(60)),
+                       'command': rnd.choice(['on', 'off'])}
+                if rnd.random() < 0.8:
+                    log['n'] = [rnd.choice([20, 21, 25.5, 40, True]), rnd.choice(['home', 'away', 'out'])]
+                history.append(log)
+            data = {'device': 'dev', 'capability': 'switch', 'history': history,
+                    'neighbors': [{'device': 'n', 'value': [{'attribute': 'temp'}, {'attribute': 'mode'}]}]}
+            param = {'min_sup': rnd.choice([5, 15, 30]), 'time_err': rnd.choice([1, 3.75, 30]), 'int_err': 2}
+
+            automation = SelfAutomation(param=param)
+            expect = automation.generate_rules(data, automation.cls_log_table(history))
+            rules = SmallAutomation(param=param).generate_rules(data)
+            self.assertEqual(json.dumps(expect), json.dumps(rules))
+
+    def test_main(self):
+        for fast_path_size in ['0', str(1 << 20)]:
+            dir_out = self.dir_out + fast_path_size + '/'
+            os.mkdir(dir_out)
+            main(['./logs/multiple.json', '-o', dir_out, '--fast-path-size', fast_path_size])
+            self.assertEqual(['multiple_on0_rule.json', 'multiple_on1_rule.json'], sorted(os.listdir(dir_out)))
+
+        for name in os.listdir(self.dir_out + '0'):
+            with open(self.dir_out + '0/' + name) as f1, open(self.dir_out + str(1 << 20) + '/' + name) as f2:
+                self.assertEqual(f1.read(), f2.read())
+
+        path = self.dir_out + 'rules.ndjson'
+        main(['./logs/multiple.json', '--ndjson', path, '--min-sup', '3'])
+        with open(path) as f:
+            self.assertEqual(2, len(f.readlines()))
+
+    # NumPy is not imported for small history
+    def test_lazy_import(self):
+        code = ('import sys; from src.cli import main; main(["tests/logs/simple.json", "-o", "%s"]); '
+                'print("numpy" in sys.modules)' % self.dir_out)
+        out = subprocess.run([sys.executable, '-c', code], cwd='..', capture_output=True, text=True, check=True)
+        self.assertEqual(['simple_on_rule.json', 'False'], out.stdout.split())
@@ -1,6 +1,10 @@
 import unittest
 
+import numpy as np
+
 from src.self_automation import SelfAutomation
+from src.log_table import LogTable
+from src.dense_region import DenseRegion
 
 
 # tests for generate_rule in SelfAutomation module
@@ -22,7 +26,7 @@ class TestClustering(unittest.TestCase):
                 [('time', conv('2022-01-07T12:00:00.000Z'))], [('time', conv('2022-01-08T12:00:00.000Z'))]]
         ret = self.automation.get_dense_region(logs)
 
-        self.assertEqual([[270.0, 270.0, 270.0, 270.0, 270.0, 270.0]], ret['time'])
+        self.assertEqual([DenseRegion(270.0, 270.0, 6, 270.0, 1620.0)], ret['time'])
 
         # process time feature
         logs = [[('time', conv('2022-01-01T17:45:00.000Z'))], [('time', conv('2022-01-02T17:50:00.000Z'))],
@@ -31,13 +35,13 @@ class TestClustering(unittest.TestCase):
                 [('time', conv('2022-01-07T18:15:00.000Z'))], [('time', conv('2022-01-08T12:00:00.000Z'))]]
         ret = self.automation.get_dense_region(logs)
 
-        self.assertEqual([[266.25, 267.5, 268.75, 270.0, 271.25, 272.5, 273.75]], ret['time'])
+        self.assertEqual([DenseRegion(266.25, 273.75, 7, 270.0, 1890.0)], ret['time'])
 
         # process numerical feature
         logs = [[('sen', 50)], [('sen', 50)], [('sen', 50)], [('sen', 28)], [('sen', 28)], [('sen', 28)], [('sen', 35)]]
         ret = self.automation.get_dense_region(logs)
 
-        self.assertEqual([[28, 28, 28], [50, 50, 50]], ret['sen'])
+        self.assertEqual([DenseRegion(28, 28, 3, 28, 84), DenseRegion(50, 50, 3, 50, 150)], ret['sen'])
 
         # process string feature
         logs = [[('sen', 'active')], [('sen', 'active')], [('sen', 'active')], [('sen', 'inactive')]]
@@ -51,7 +55,7 @@ class TestClustering(unittest.TestCase):
         ret = self.automation.get_dense_region(logs)
 
         self.assertEqual(['active'], ret['sen'])
-        self.assertEqual([[50, 51, 52, 55]], ret['dev'])
+        self.assertEqual([DenseRegion(50, 55, 4, 52, 208)], ret['dev'])
 
     def test_get_time_regions(self):
         self.automation.time_err = 3.75  # corresponds to 15 minutes
@@ -63,8 +67,8 @@ class TestClustering(unittest.TestCase):
         ret = self.automation.get_time_regions(lst)
 
         self.assertEqual(2, len(ret))
-        self.assertEqual(3, len(ret[0]))    # 17:45, 17:50, 18:00
-        self.assertEqual(2, len(ret[1]))    # 23:45, 23:50
+        self.assertEqual(3, ret[0].count)    # 17:45, 17:50, 18:00
+        self.assertEqual(2, ret[1].count)    # 23:45, 23:50
 
         # merge first and last interval and append to end of list
         time_comps = ['2022-01-01T18:00:00.000Z', '2022-01-02T18:00:00.000Z', '2022-01-01T23:50:00.000Z',
@@ -73,8 +77,9 @@ class TestClustering(unittest.TestCase):
         ret = self.automation.get_time_regions(lst)
 
         self.assertEqual(2, len(ret))
-        self.assertEqual(2, len(ret[0]))    # 18:00, 18:00
-        self.assertEqual(3, len(ret[1]))    # 23:50, 00:00, 00:10
+        self.assertEqual(2, ret[0].count)    # 18:00, 18:00
+        self.assertEqual(3, ret[1].count)    # 23:50, 00:00, 00:10
+        self.assertEqual((357.5, 2.5), (ret[1].start, ret[1].end))
 
         # don't merge first and last interval
         time_comps = ['2022-01-01T00:05:00.000Z', '2022-01-02T00:10:00.000Z', '2022-01-03T00:13:00.000Z',
@@ -83,9 +88,9 @@ class TestClustering(unittest.TestCase):
         ret = self.automation.get_time_regions(lst)
 
         self.assertEqual(2, len(ret))
-        self.assertEqual(3, len(ret[0]))    # 00:05, 00:10, 00:13
-        self.assertEqual(3, len(ret[1]))    # 23:45, 23:44, 23:42
-        self.assertLess(ret[0][0], ret[1][0])
+        self.assertEqual(3, ret[0].count)    # 00:05, 00:10, 00:13
+        self.assertEqual(3, ret[1].count)    # 23:45, 23:44, 23:42
+        self.assertLess(ret[0].start, ret[1].start)
 
         # only one region
         time_comps = ['2022-01-01T18:00:00.000Z', '2022-01-02T18:00:00.000Z', '2022-01-03T18:00:00.000Z'
@@ -93,20 +98,53 @@ class TestClustering(unittest.TestCase):
         lst = [self.automation.time_to_ang(v) for v in time_comps]
         ret = self.automation.get_time_regions(lst)
 
-        self.assertEquals([[270, 270, 270, 270, 270]], ret)
+        self.assertEqual([DenseRegion(270, 270, 5, 270, 1350)], ret)
+
+    # regions from histogram of minutes are the same as regions from sorted angles
+    def test_time_histogram(self):
+        rng = np.random.default_rng(0)
+        for min_sup, time_err in [(2, 3.75), (5, 1), (20, 15), (3, 0.25)]:
+            self.automation.min_sup = min_sup
+            self.automation.time_err = time_err
+            for _ in range(20):
+                hours = rng.choice([0, 6, 12, 23], size=100)
+                angles = (hours * 60 + rng.integers(0, 60, size=100)) / 4
+                weights = rng.integers(1, 4, size=100)
+                for w in [None, weights]:
+                    self.assertIsNotNone(self.automation.time_histogram(angles, w))
+                    expect = self.automation.get_angle_regions(*self.automation.sort_components(angles, w))
+                    self.assertEqual(expect, self.automation.get_time_regions(angles, w))
+
+        # angles of seconds are sorted
+        self.assertIsNone(self.automation.time_histogram([270.1, 270]))
+        self.assertIsNone(self.automation.time_histogram([360, 270]))
+        self.assertEqual(1, len(self.automation.get_time_regions([270.1, 270, 270.2])))
 
     def test_get_numeric_regions(self):
         self.automation.num_err = 3
         self.automation.min_sup = 3
 
         values = [1, 2, 20, 21, 23, 23, 23, 26, 30, 32, 33]
-        self.assertEqual([[20, 21, 23, 23, 23, 26], [30, 32, 33]], self.automation.get_numeric_regions(values))
+        self.assertEqual([DenseRegion(20, 26, 6, 23, 136), DenseRegion(30, 33, 3, 32, 95)],
+                         self.automation.get_numeric_regions(values))
 
         values = [1, 2, 32, 33]
         self.assertEqual([], self.automation.get_numeric_regions(values))
 
         values = [2, 3, 5, 8]
-        self.assertEquals([[2, 3, 5, 8]], self.automation.get_numeric_regions(values))
+        self.assertEqual([DenseRegion(2, 8, 4, 5, 18)], self.automation.get_numeric_regions(values))
+
+    def test_split_intervals(self):
+        func = SelfAutomation.split_intervals
+
+        starts, ends = func(np.array([1, 2, 20, 21, 23, 30]), 3)
+        self.assertEqual([0, 2, 5], starts.tolist())
+        self.assertEqual([2, 5, 6], ends.tolist())
+
+        # single interval
+        starts, ends = func(np.array([266.25, 267.5, 270.0]), 3.75)
+        self.assertEqual([0], starts.tolist())
+        self.assertEqual([3], ends.tolist())
 
     def test_get_string_regions(self):
         self.automation.min_sup = 5
@@ -131,17 +169,17 @@ class TestClustering(unittest.TestCase):
         func = self.automation.get_candidate_cluster
 
         # time component
-        regions = {'time': [[0, 3.75], [266.25, 267.5, 268.75]]}
+        regions = {'time': [DenseRegion(0, 3.75, 2, 0, 3.75), DenseRegion(266.25, 268.75, 3, 267.5, 802.5)]}
         self.assertEqual([('time', (0, 3.75))], func(regions, [('time', convert('2022-01-01T00:05:00.000Z'))]))
         self.assertEqual([('time', (266.25, 268.75))], func(regions, [('time', convert('2022-01-01T17:48:00.000Z'))]))
 
-        regions = {'time': [[266.25, 267.5, 268.75, 270], [355, 358, 0, 2]]}
+        regions = {'time': [DenseRegion(266.25, 270, 4, 267.5, 1072.5), DenseRegion(355, 2, 4, 358, 715)]}
         self.assertEqual([('time', (355, 2))], func(regions, [('time', convert('2022-01-01T23:58:00.000Z'))]))
         self.assertEqual([('time', (266.25, 270))], func(regions, [('time', convert('2022-01-01T18:00:00.000Z'))]))
         self.assertEqual([], func(regions, [('time', convert('2022-01-01T06:00:00.000Z'))]))
 
         # numerical component
-        regions = {'sen': [[1, 1, 2], [20, 23, 24], [25, 25, 28]]}
+        regions = {'sen': [DenseRegion(1, 2, 3, 1, 4), DenseRegion(20, 24, 3, 23, 67), DenseRegion(25, 28, 3, 25, 78)]}
         self.assertEqual([('sen', (20, 24))], func(regions, [('sen', 21)]))
         self.assertEqual([('sen', (1, 2))], func(regions, [('sen', 1)]))
         self.assertEqual([('sen', (25, 28))], func(regions, [('sen', 25)]))
@@ -157,6 +195,61 @@ class TestClustering(unittest.TestCase):
         # get maximal cluster
         self.assertEqual([('dev', 'active'), ('sen', 'on')], func(regions, [('dev', 'active'), ('sen', 'on')]))
 
+    def test_get_region_ids(self):
+        func = self.automation.get_region_ids
+        conv = SelfAutomation.time_to_ang
+
+        # time component with date changing interval
+        regions = {'time': [DenseRegion(266.25, 270, 4, 267.5, 1072.5), DenseRegion(355, 2, 4, 358, 715)]}
+        times = ['2022-01-01T23:58:00.000Z', '2022-01-01T18:00:00.000Z', '2022-01-01T06:00:00.000Z',
+                 '2022-01-01T00:15:00.000Z']
+        table = LogTable.from_logs([[('time', conv(t))] for t in times])
+        ids, comps = func(regions, 'time', table.columns['time'])
+
+        self.assertEqual([1, 0, 2, 2], ids.tolist())
+        self.assertEqual([('time', (266.25, 270)), ('time', (355, 2))], comps)
+
+        # numerical component
+        regions = {'sen': [DenseRegion(1, 2, 3, 1, 4), DenseRegion(20, 24, 3, 23, 67), DenseRegion(25, 28, 3, 25, 78)]}
+        table = LogTable.from_logs([[('sen', 21)], [('sen', 1)], [('sen', 25)], [('sen', 7)], [('sen', 30)]])
+        ids, comps = func(regions, 'sen', table.columns['sen'])
+
+        self.assertEqual([1, 0, 2, 3, 3], ids.tolist())
+
+        # string component
+        regions = {'sen': ['on']}
+        table = LogTable.from_logs([[('sen', 'off')], [('sen', 'on')]])
+        ids, comps = func(regions, 'sen', table.columns['sen'])
+
+        self.assertEqual([1, 0], ids.tolist())
+        self.assertEqual([('sen', 'on')], comps)
+
+        # no dense region
+        self.assertIsNone(func({}, 'sen', table.columns['sen']))
+
+    def test_count_candidates(self):
+        self.automation.min_sup = 2
+        regions = {'dev': ['active'], 'sen': [DenseRegion(20, 23, 2, 20, 43)]}
+        logs = [[('dev', 'active'), ('sen', 21)], [('dev', 'active'), ('sen', 50)], [('dev', 'inactive'), ('sen', 50)],
+                [('dev', 'inactive'), ('sen', 23)], [('dev', 'active'), ('sen', 20)]]
+        ret = self.automation.count_candidates(regions, logs)
+
+        # logs outside of every region are not counted, candidates are kept in order of appearance
+        self.assertEqual([((('dev', 'active'), ('sen', (20, 23))), 2), ((('dev', 'active'), ), 1),
+                          ((('sen', (20, 23)), ), 1)], list(ret.items()))
+
+        # number of occurrences given
+        ret = self.automation.count_candidates(regions, logs, [1, 2, 3, 4, 5])
+        self.assertEqual([6, 2, 4], list(ret.values()))
+
+        # too many components to pack region ids into an integer
+        regions = {'sen%d' % i: ['on'] for i in range(70)}
+        logs = [[('sen%d' % i, 'on') for i in range(70)], [('sen%d' % i, 'off' if i == 0 else 'on') for i in range(70)]]
+        ret = self.automation.count_candidates(regions, logs + logs)
+
+        self.assertEqual([2, 2], list(ret.values()))
+        self.assertEqual(69, len(list(ret.keys())[1]))
+
     def test_most_frequent(self):
         func = self.automation.most_frequent
 
@@ -172,6 +265,22 @@ class TestClustering(unittest.TestCase):
         self.assertEqual(0, func([355, 358, 358, 358, 0, 0, 0, 4, 4]))
         self.assertEqual(358, func([354, 355, 358, 358, 358, 0, 0, 0, 3]))
 
+    def test_summarize_region(self):
+        func = self.automation.summarize_region
+
+        # numeric component
+        self.assertEqual(DenseRegion(15, 22, 7, 20, 136), func(np.array([15, 18, 20, 20, 20, 21, 22])))
+        self.assertEqual(20, func(np.array([15, 15, 15, 20, 20, 20, 21])).mode)
+        self.assertEqual(20, func(np.array([15, 20, 21]), np.array([3, 3, 1])).mode)
+        self.assertEqual(18, func(np.array([15, 20, 21]), np.array([3, 3, 1])).mean())
+
+        # time component
+        self.assertEqual(200, func(np.array([195, 199, 199, 200, 200, 201, 205, 210]), is_time=True).mode)
+        # date changing interval
+        ret = func(np.array([355, 358, 358, 358, 0, 0, 0, 4, 4]), is_time=True)
+        self.assertEqual((355, 4, 9, 0), (ret.start, ret.end, ret.count, ret.mode))
+        self.assertEqual(358, func(np.array([354, 355, 358, 0, 3]), np.array([1, 1, 3, 3, 1]), True).mode)
+
     # test basic utility of cluster_log with string component
     def test_cluster_log_str(self):
         self.automation.min_sup = 3
@@ -207,6 +316,17 @@ class TestClustering(unittest.TestCase):
         # returns two cluster with only first component
         self.assertEqual([(('dev', 'active'), )], ret)
 
+    # logs given with number of occurrences
+    def test_cluster_log_counts(self):
+        self.automation.min_sup = 3
+        self.automation.num_err = 3
+
+        logs = {(('dev', 'active'), ('sen', 50)): 2, (('dev', 'active'), ('sen', 52)): 1,
+                (('dev', 'inactive'), ('sen', 10)): 2}
+        ret = self.automation.cluster_log(logs, info=True)
+
+        self.assertEqual([(('dev', 'active'), ('sen', (50, 50.666666666666664)))], ret)
+
     def test_cluster_log_numeric(self):
         self.automation.num_err = 3
         self.automation.min_sup = 3
@@ -1,6 +1,12 @@
+import os
+import json
+import shutil
+import tempfile
 import unittest
 
 from src.self_automation import SelfAutomation
+from src.rule_sink import ListSink
+from src.run_stats import RunStats
 
 
 # test helper functions of SelfAutomation
@@ -20,6 +26,51 @@ class TestSelfAutomation(unittest.TestCase):
 
         self.assertIsNone(info)
 
+    # large log file read twice as a stream has the same rules as log file read at once
+    def test_run_stream(self):
+        for file in sorted(os.listdir('./logs/')):
+            for param in [None, {'min_sup': 2, 'time_err': 15, 'int_err': 1, 'backend': 'fp_tree'}]:
+                expect, sink = ListSink(), ListSink()
+                names = SelfAutomation(param=param).run(file, sink=expect)
+
+                automation = SelfAutomation(param=param)
+                automation.stream_size = 0
+                stats = RunStats()
+                self.assertEqual(names, automation.run(file, sink=sink, stats=stats))
+                self.assertEqual(expect.rules, sink.rules)
+                self.assertEqual(len(SelfAutomation.read_log('./logs/' + file)['history']), stats.records)
+
+        # first pass counts values of each component
+        data = {}
+        values, num_logs = self.automation.stream_values(SelfAutomation.read_log("./logs/time.json")['history'])
+        self.assertEqual(['on', 'off'], list(values.keys()))
+        self.assertEqual(num_logs, sum(cmd_logs for cmd_logs, _ in values.values()))
+        self.assertEqual(3, values['on'][1]['time'][1][271.25])  # 18:05
+        self.assertIsNone(self.automation.mine_stream(data, lambda: iter([])))
+
+    # chunk of stream starting with a log missing a component
+    def test_run_stream_chunks(self):
+        history = [{'timestamp': '2022-01-01T18:00:00.000Z', 'command': 'on', 'door': ['open'], 'motion': ['active']}
+                   for _ in range(SelfAutomation.STREAM_CHUNK_SIZE + 10)]
+        del history[SelfAutomation.STREAM_CHUNK_SIZE]['door']
+        data = {'device': 'x', 'capability': 'switch', 'history': history,
+                'neighbors': [{'device': 'door', 'value': [{'attribute': 'contact'}]},
+                              {'device': 'motion', 'value': [{'attribute': 'motion'}]}]}
+
+        dir_in = tempfile.mkdtemp() + '/'
+        with open(dir_in + 'x.json', 'w') as f:
+            json.dump(data, f)
+        try:
+            expect, sink = ListSink(), ListSink()
+            self.assertEqual(['x_on_rule.json'], SelfAutomation(dir_in).run('x.json', sink=expect))
+
+            automation = SelfAutomation(dir_in)
+            automation.stream_size = 0
+            self.assertEqual(['x_on_rule.json'], automation.run('x.json', sink=sink))
+            self.assertEqual(expect.rules, sink.rules)
+        finally:
+            shutil.rmtree(dir_in)
+
     def test_cls_log(self):
         # format time component
         logs = [{"timestamp": "2022-01-01T00:00:00.000Z", "command": "on"},
@@ -83,6 +134,18 @@ class TestSelfAutomation(unittest.TestCase):
         self.assertEqual(270, func('2022-01-01T18:00:00.000Z'))
         self.assertEqual(3.75, func('2022-01-01T00:15:00.000Z'))
 
+    def test_times_to_ang(self):
+        func = SelfAutomation.times_to_ang
+        times = ['2022-01-01T00:00:00.000Z', '2022-01-01T06:00:00.000Z', '2022-01-01T18:05:00.000Z',
+                 '2022-01-02T12:00.000Z', '2022-01-01T23:59:59.999Z']
+
+        self.assertEqual([self.automation.time_to_ang(t) for t in times], func(times).tolist())
+        self.assertEqual([], func([]).tolist())
+
+        # invalid time is reported as time_to_ang()
+        with self.assertRaises(ValueError):
+            func(['2022-01-01T18:05:00.000Z', '2022-01-01T25:00:00.000Z'])
+
     def test_ang_to_min(self):
         func = self.automation.ang_to_time
 
@@ -0,0 +1,93 @@
+import json
+import random
+import shutil
+import tempfile
+import unittest
+
+from src.self_automation import SelfAutomation
+from src.fleet import FleetIndex, run_fleet, split_shards
+from src.rule_sink import ListSink
+
+FILES = ['simple.json', 'multiple.json', 'time.json', 'noise.json', 'sensor_complex.json']
+
+
+# tests for mining devices of a newline-delimited export of every device
+class TestFleet(unittest.TestCase):
+    def setUp(self):
+        self.dir_in = tempfile.mkdtemp() + '/'
+        self.dir_out = tempfile.mkdtemp() + '/'
+        self.path = self.dir_in + 'fleet.ndjson'
+
+        # logs of every device are interleaved in export
+        records = []
+        for file in FILES:
+            data = SelfAutomation.read_log('./logs/' + file)
+            device = file.split('.')[0]
+            data['device'] = device
+            with open(self.dir_in + file, 'w') as f:
+                json.dump(data, f)
+
+            records.append([{'device': device, 'capability': data['capability'], 'neighbors': data['neighbors']}] +
+                           [dict({'device': device}, **log) for log in data['history']])
+
+        rnd = random.Random(0)
+        with open(self.path, 'w') as f:
+            while len(records) > 0:
+                device_records = rnd.choice(records)
+                record = device_records.pop(0)
+                if rnd.random() < 0.1:     # device is not the first member
+                    record = dict(sorted(record.items(), reverse=True))
+                f.write(json.dumps(record) + '\n')
+                if len(device_records) == 0:
+                    records.remove(device_records)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_in)
+        shutil.rmtree(self.dir_out)
+
+    def test_index(self):
+        index = FleetIndex.build(self.path)
+        self.assertEqual(sorted(f.split('.')[0] for f in FILES), sorted(index.devices()))
+
+        for file in FILES:
+            data = SelfAutomation.read_log(self.dir_in + file)
+            self.assertEqual(len(data['history']) + 1, index.num_records(data['device']))
+            self.assertEqual(data, index.load(data['device']))
+
+        shards = split_shards(index, 2)
+        self.assertEqual(2, len(shards))
+        self.assertEqual(sorted(index.devices()), sorted(device for shard in shards for device, _ in shard))
+
+    # rules are the same as rules of log file of each device
+    def test_run_fleet(self):
+        for workers in [1, 2]:
+            sink = ListSink()
+            manifest = run_fleet(self.path, workers=workers, sink=sink)
+
+            expect = ListSink()
+            automation = SelfAutomation(self.dir_in)
+            for device, entry in manifest.items():
+                self.assertEqual(automation.run(device + '.json', sink=expect), entry['rules'])
+            self.assertEqual(expect.rules, sink.rules)
+            self.assertEqual(5, len(manifest))
+
+    # malformed lines are skipped, rules of devices are not affected
+    def test_malformed(self):
+        expect = run_fleet(self.path, self.dir_out, workers=1)
+        with open(self.path, 'a') as f:
+            f.write('[1, 2]\n{"timestamp": "2022-01-01T04:00:00.000Z"}\n{"command": "on", "device": \n')
+
+        index = FleetIndex.build(self.path)
+        self.assertEqual(3, index.num_skipped())
+        self.assertEqual(expect, run_fleet(self.path, self.dir_out, workers=1, index=index))
+
+        # truncated record starting with device is skipped when device is read
+        with open(self.path, 'a') as f:
+            f.write('{"device": "simple", "timestamp": "2022-01-01T04:00:00.000Z", "comm\n')
+        manifest = run_fleet(self.path, self.dir_out, workers=1)
+        self.assertEqual(dict(expect['simple'], skipped=1), manifest['simple'])
+        self.assertEqual(expect['time'], manifest['time'])
+
+    def test_empty(self):
+        open(self.path, 'w').close()
+        self.assertEqual({}, run_fleet(self.path, self.dir_out, workers=1))
@@ -0,0 +1,75 @@
+import random
+import unittest
+from itertools import combinations
+
+from src.self_automation import SelfAutomation
+from src.fp_tree import FPTree, maximal_itemsets
+
+
+# tests for frequent pattern mining
+class TestFPTree(unittest.TestCase):
+    def test_tree(self):
+        tree = FPTree([('a', 'b'), ('b', 'c'), ('b',), ('d',)], [1, 2, 1, 1], 2)
+
+        self.assertEqual(['b', 'c'], tree.items)
+        self.assertEqual({'b': 4, 'c': 2}, tree.support)
+        self.assertEqual([4, 2], [node.count for node in tree.single_path()])
+        self.assertEqual(['b'], tree.conditional('c').common)
+        self.assertEqual([], tree.conditional('c').items)
+
+    # same as maximal itemsets found by counting every itemset
+    def test_maximal_itemsets(self):
+        rnd = random.Random(0)
+        for _ in range(20):
+            transactions = [tuple(i for i in range(6) if rnd.random() < 0.5) for _ in range(30)]
+            counts = [rnd.randrange(1, 4) for _ in transactions]
+
+            frequent = {}
+            for size in range(1, 7):
+                for itemset in combinations(range(6), size):
+                    support = sum(c for t, c in zip(transactions, counts) if set(itemset) <= set(t))
+                    if support >= 10:
+                        frequent[frozenset(itemset)] = support
+            expect = {s: c for s, c in frequent.items() if not any(s < other for other in frequent)}
+
+            self.assertEqual(expect, maximal_itemsets(transactions, counts, 10))
+
+    # routine is found even though no two logs agree on every neighbor attribute
+    def test_many_attributes(self):
+        rnd = random.Random(0)
+        neighbors = [{'device': 'n%d' % n, 'capability': 'sensor',
+                      'value': [{'attribute': 'attr', 'type': 'string'}]} for n in range(20)]
+        history = []
+        for day in range(60):
+            log = {'timestamp': '2022-%02d-%02dT07:00:00.000Z' % (1 + day // 28, 1 + day % 28), 'command': 'on'}
+            for n in range(20):
+                log['n%d' % n] = ['home' if n == 0 else rnd.choice(['a', 'b'])]
+            history.append(log)
+        data = {'device': 'dev', 'capability': 'switch', 'history': history, 'neighbors': neighbors}
+
+        exact = SelfAutomation(param={'min_sup': 20, 'time_err': 3.75, 'int_err': 5})
+        self.assertEqual([], exact.cluster_log(exact.cls_log(history)['on']))
+
+        fp = SelfAutomation(param={'min_sup': 20, 'time_err': 3.75, 'int_err': 5, 'backend': 'fp_tree'})
+        clusters = fp.cluster_log(fp.cls_log(history)['on'], info=True)
+        self.assertGreater(len(clusters), 0)
+        for cluster in clusters:
+            self.assertEqual((('time', ('07:00', ('07:00', '07:00'))), ('n0:0', 'home')), cluster[:2])
+            self.assertGreater(len(cluster), 2)
+
+        rules = fp.generate_rules(data, fp.cls_log_table(history))['on']
+        self.assertEqual(len(clusters), len(rules))
+        self.assertEqual(len(clusters[0]), len(rules[0]['actions'][0]['if']['and']))
+
+    # frequent full candidates are found by both backends
+    def test_backend(self):
+        data = SelfAutomation.read_log('./logs/sensor_str.json')
+        exact = SelfAutomation()
+        fp = SelfAutomation(param={'min_sup': 5, 'time_err': 3.75, 'int_err': 5, 'backend': 'fp_tree'})
+
+        for cmd, logs in exact.cls_log(data['history']).items():
+            for cluster in exact.cluster_log(logs):
+                self.assertIn(cluster, fp.cluster_log(logs))
+
+        with self.assertRaises(ValueError):
+            SelfAutomation(param={'min_sup': 5, 'time_err': 3.75, 'int_err': 5, 'backend': 'apriori'})
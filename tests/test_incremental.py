@@ -0,0 +1,61 @@
+import unittest
+
+from src.self_automation import SelfAutomation
+from src.incremental import IncrementalMiner
+
+
+# tests for IncrementalMiner
+class TestIncrementalMiner(unittest.TestCase):
+    def setUp(self):
+        self.data = SelfAutomation.read_log('./logs/sensor_str.json')
+        self.automation = SelfAutomation()
+
+    # rules are the same as rules from entire history
+    def test_update(self):
+        history = self.data['history']
+        expect = self.automation.generate_rules(self.data, self.automation.cls_log(history))
+
+        miner = IncrementalMiner({'device': self.data['device'], 'capability': self.data['capability'],
+                                  'neighbors': self.data['neighbors']})
+        self.assertEqual({}, miner.rules())
+
+        half = int(len(history) / 2)
+        miner.update(history[:half])
+        miner.rules()
+        miner.update(history[half:])
+
+        self.assertEqual(expect, miner.rules())
+
+    # only new logs are clustered when boundaries of dense regions are unchanged
+    def test_update_candidates(self):
+        history = self.data['history']
+        miner = IncrementalMiner(self.data)
+        miner.min_sup = 1   # every value already belongs to a dense region
+        miner.rules()
+        candidates = {cmd: dict(cands) for cmd, cands in miner.candidates.items()}
+
+        miner.update(history)
+        miner.rules()
+
+        for cmd, cands in candidates.items():
+            self.assertEqual({k: 2 * v for k, v in cands.items()}, miner.candidates[cmd])
+
+    # new logs starting with a log missing a component count the same candidates
+    def test_missing_component(self):
+        full = {'timestamp': '2022-01-01T18:00:00.000Z', 'command': 'on', 'door': ['open'], 'motion': ['active']}
+        missing = {'timestamp': '2022-01-01T18:00:00.000Z', 'command': 'on', 'motion': ['active']}
+        data = {'device': 'light', 'capability': 'switch',
+                'neighbors': [{'device': 'door', 'value': [{'attribute': 'contact'}]},
+                              {'device': 'motion', 'value': [{'attribute': 'motion'}]}]}
+        history = [full] * 6 + [missing] + [missing] + [full] * 2
+
+        miner = IncrementalMiner(data)
+        miner.update(history[:7])
+        miner.rules()
+        miner.update(history[7:])
+        rules = miner.rules()
+
+        self.assertEqual(8, miner.candidates['on'][(('time', (270.0, 270.0)), ('door:0', 'open'), ('motion:0', 'active'))])
+        self.assertEqual(2, len(miner.candidates['on']))
+        self.assertEqual(self.automation.generate_rules(dict(data, history=history), self.automation.cls_log(history)),
+                         rules)
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src.self_automation import SelfAutomation
+from src.log_cache import LogCache
+from src.run_stats import RunStats
+
+
+# tests for cache of formatted logs
+class TestLogCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.dir_in = tempfile.mkdtemp() + '/'
+        self.dir_out = tempfile.mkdtemp() + '/'
+        for file in ['sensor_complex.json', 'multiple.json', 'time.json']:
+            shutil.copy('./logs/' + file, self.dir_in)
+
+    def tearDown(self):
+        for d in [self.cache_dir, self.dir_in, self.dir_out]:
+            shutil.rmtree(d)
+
+    def run_cached(self, file_in, cache):
+        automation = SelfAutomation(self.dir_in)
+        automation.cache = cache
+        stats = RunStats()
+        file_names = automation.run(file_in, self.dir_out, stats)
+        return file_names, stats
+
+    # rules from cached logs are the same as rules from log file
+    def test_load(self):
+        cache = LogCache(self.cache_dir)
+        for file in ['sensor_complex.json', 'multiple.json', 'time.json']:
+            expect = SelfAutomation(self.dir_in).run(file, self.dir_out)
+            rules = [SelfAutomation.read_log(self.dir_out + name) for name in expect]
+
+            file_names, stats = self.run_cached(file, cache)
+            self.assertIn('store_cache', stats.times)
+
+            file_names, stats = self.run_cached(file, LogCache(self.cache_dir))
+            self.assertIn('load_cache', stats.times)
+            self.assertNotIn('cls_log', stats.times)
+            self.assertEqual(expect, file_names)
+            self.assertEqual(rules, [SelfAutomation.read_log(self.dir_out + name) for name in file_names])
+
+    # log file read as a stream is neither loaded from cache nor hashed
+    def test_stream(self):
+        cache = LogCache(self.cache_dir)
+        expect, _ = self.run_cached('time.json', cache)
+
+        automation = SelfAutomation(self.dir_in)
+        automation.cache = cache
+        automation.stream_size = 0
+        stats = RunStats()
+        with mock.patch.object(cache, 'load', side_effect=AssertionError('cache loaded')):
+            self.assertEqual(expect, automation.run('time.json', self.dir_out, stats))
+        self.assertNotIn('load_cache', stats.times)
+
+    # modified log file is not read from cache
+    def test_modified(self):
+        cache = LogCache(self.cache_dir)
+        self.run_cached('time.json', cache)
+
+        with open(self.dir_in + 'time.json') as f:
+            text = f.read()
+        with open(self.dir_in + 'time.json', 'w') as f:
+            f.write(text.replace('"off"', '"on"'))
+
+        self.assertIsNone(cache.load(self.dir_in + 'time.json'))
+        file_names, stats = self.run_cached('time.json', cache)
+        self.assertIn('cls_log', stats.times)
+        self.assertEqual(SelfAutomation(self.dir_in).run('time.json', self.dir_out), file_names)
+
+    # least recently used entry is removed
+    def test_evict(self):
+        cache = LogCache(self.cache_dir)
+        for file in ['time.json', 'multiple.json', 'sensor_complex.json']:
+            self.run_cached(file, cache)
+        size = sum(e['size'] for e in cache.index['entries'].values())
+
+        cache = LogCache(self.cache_dir, max_bytes=size - 1)
+        cache.load(self.dir_in + 'time.json')
+        cache.load(self.dir_in + 'sensor_complex.json')
+        cache.evict()
+
+        self.assertIsNotNone(cache.load(self.dir_in + 'time.json'))
+        self.assertIsNone(cache.load(self.dir_in + 'multiple.json'))
+        self.assertEqual(2, len([f for f in os.listdir(self.cache_dir) if f.endswith('.npz')]))
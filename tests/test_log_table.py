@@ -0,0 +1,86 @@
+import unittest
+
+from src.self_automation import SelfAutomation
+from src.small import SmallAutomation
+from src.incremental import IncrementalMiner
+from src.log_table import LogTable, TIME, NUMERIC, STRING
+
+
+# tests for column representation of logs
+class TestLogTable(unittest.TestCase):
+    def test_from_logs(self):
+        logs = [[('time', 0), ('sen:0', 50), ('sen:1', 'active')],
+                [('time', 180), ('sen:0', 52), ('sen:1', 'inactive')],
+                [('time', 270), ('sen:0', 50), ('sen:1', 'active')]]
+        table = LogTable.from_logs(logs)
+
+        self.assertEqual(3, table.size)
+        self.assertEqual(['time', 'sen:0', 'sen:1'], list(table.columns.keys()))
+        self.assertEqual(TIME, table.columns['time'].kind)
+        self.assertEqual(NUMERIC, table.columns['sen:0'].kind)
+        self.assertEqual(STRING, table.columns['sen:1'].kind)
+
+        # strings are encoded in order of appearance
+        self.assertEqual([0, 1, 0], table.columns['sen:1'].values.tolist())
+        self.assertEqual(['active', 'inactive'], table.columns['sen:1'].categories)
+        self.assertEqual(['active', 'inactive', 'active'], table.columns['sen:1'].decode())
+
+        # integers are kept as integers
+        self.assertEqual([50, 52, 50], table.columns['sen:0'].decode())
+        self.assertIsInstance(table.columns['sen:0'].decode()[0], int)
+
+    def test_from_logs_float(self):
+        table = LogTable.from_logs([[('sen', 50)], [('sen', 50.5)]])
+
+        self.assertEqual([50.0, 50.5], table.columns['sen'].decode())
+
+    # rules of a column mixing integers and floats hold floats, the same for every path of mining
+    def test_mixed_numeric(self):
+        neighbors = [{'device': 'sensor', 'capability': 'sensor', 'value': [{'attribute': 'level', 'type': 'integer'}]}]
+        data = {'device': 'dev', 'capability': 'switch', 'neighbors': neighbors}
+        for values, expect in [([1, 1, 1.5, 2, 1, 1.5, 1, 2.0, 1], 1.0), ([1, 1, 2, 1, 1, 2, 1], 1)]:
+            history = [{'timestamp': '2022-01-%02dT18:00:00.000Z' % (day + 1), 'command': 'on', 'sensor': [val]}
+                       for day, val in enumerate(values)]
+            data['history'] = history
+
+            rules = SelfAutomation().generate_rules(data, SelfAutomation.cls_log_table(history))
+            self.assertEqual(rules, SmallAutomation().generate_rules(data))
+            self.assertEqual(rules, IncrementalMiner(data).rules())
+
+            right = rules['on'][0]['actions'][0]['if']['and'][1]['greater_than']['right']['integer']
+            self.assertEqual(expect, right)
+            self.assertIs(type(expect), type(right))
+
+    # component is missing in some logs
+    def test_from_logs_missing(self):
+        logs = [[('time', 0), ('sen:0', 50)], [('time', 90), ('sen:0', 50), ('sen:1', 70)], [('time', 90)]]
+        table = LogTable.from_logs(logs, [1, 2, 3])
+
+        self.assertIsNone(table.columns['time'].rows)
+        self.assertEqual([0, 1], table.columns['sen:0'].rows.tolist())
+        self.assertEqual([1], table.columns['sen:1'].rows.tolist())
+        self.assertEqual([1, 2], table.column_counts(table.columns['sen:0']).tolist())
+        self.assertEqual(6, table.num_logs())
+
+    def test_cls_log_table(self):
+        logs = [{"timestamp": "2022-01-01T00:00:00.000Z", "my-sensor": [70], "command": "cmd1"},
+                {"timestamp": "2022-01-02T12:00.000Z", "my-sensor": [70, 50], "command": "cmd2"},
+                {"timestamp": "2022-01-03T18:00:00.000Z", "my-sensor": [72], "command": "cmd1"}]
+        ret = SelfAutomation.cls_log_table(logs)
+
+        self.assertEqual(['cmd1', 'cmd2'], list(ret.keys()))
+        self.assertEqual([0, 270], ret['cmd1'].columns['time'].decode())
+        self.assertEqual([70, 72], ret['cmd1'].columns['my-sensor:0'].decode())
+        self.assertEqual([50], ret['cmd2'].columns['my-sensor:1'].decode())
+
+    # clustering results are the same for lists of logs and tables
+    def test_cluster_log_table(self):
+        automation = SelfAutomation()
+        data = SelfAutomation.read_log('./logs/sensor_int.json')
+
+        logs = SelfAutomation.cls_log(data['history'])
+        tables = SelfAutomation.cls_log_table(data['history'])
+
+        for cmd in logs.keys():
+            self.assertEqual(automation.cluster_log(logs[cmd], info=True),
+                             automation.cluster_log(tables[cmd], info=True))
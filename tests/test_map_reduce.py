@@ -0,0 +1,77 @@
+import os
+import random
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.self_automation import SelfAutomation
+from src.map_reduce import MapReduceAutomation, SharedChunk, map_values, map_candidates, _shared, _tables
+from src.rule_sink import ListSink
+
+
+# tests for clustering chunks of history in map and reduce phases
+class TestMapReduce(unittest.TestCase):
+    # rules are the same as clustering whole history
+    def test_same_rules(self):
+        with ThreadPoolExecutor(2) as pool:
+            for file in sorted(os.listdir('./logs/')):
+                for chunk_size in [1, 7, 1000]:
+                    expect, sink = ListSink(), ListSink()
+                    names = SelfAutomation().run(file, sink=expect)
+
+                    automation = MapReduceAutomation(pool=pool, chunk_size=chunk_size)
+                    self.assertEqual(names, automation.run(file, sink=sink))
+                    self.assertEqual(expect.rules, sink.rules)
+
+    def test_process_pool(self):
+        rnd = random.Random(0)
+        history = []
+        for _ in range(500):
+            log = {'timestamp': '2022-01-01T%02d:%02d:00.000Z' % (rnd.choice([0, 7, 23]), rnd.randrange(60)),
+                   'command': rnd.choice(['on', 'off'])}
+            if rnd.random() < 0.7:
+                log['n'] = [rnd.choice([20, 21, 22.5, 40]), rnd.choice(['home', 'away'])]
+            history.append(log)
+        data = {'device': 'dev', 'capability': 'switch', 'history': history,
+                'neighbors': [{'device': 'n', 'value': [{'attribute': 'temp'}, {'attribute': 'mode'}]}]}
+        param = {'min_sup': 20, 'time_err': 3.75, 'int_err': 1}
+
+        automation = SelfAutomation(param=param)
+        expect = automation.generate_rules(data, automation.cls_log_table(history))
+        self.assertGreater(sum(len(rules) for rules in expect.values()), 0)
+        self.assertEqual(expect, MapReduceAutomation(param=param, workers=2, chunk_size=64).mine_history(data))
+
+    # chunk starting with a log missing a component counts the same candidates
+    def test_missing_component(self):
+        history = [{'timestamp': '2022-01-0%dT18:00:00.000Z' % (i + 1), 'command': 'on', 'door': ['open'],
+                    'motion': ['active']} for i in range(6)]
+        del history[3]['door']
+        data = {'device': 'light', 'capability': 'switch', 'history': history,
+                'neighbors': [{'device': 'door', 'value': [{'attribute': 'contact'}]},
+                              {'device': 'motion', 'value': [{'attribute': 'motion'}]}]}
+        param = {'min_sup': 4, 'time_err': 3.75, 'int_err': 5}
+
+        automation = SelfAutomation(param=param)
+        expect = automation.generate_rules(data, automation.cls_log_table(history))
+        self.assertEqual(1, len(expect['on']))
+        with ThreadPoolExecutor(2) as pool:
+            self.assertEqual(expect, MapReduceAutomation(param=param, pool=pool, chunk_size=3).mine_history(data))
+
+    # formatted logs of shared chunk stay in worker between phases
+    def test_shared_chunk(self):
+        data = SelfAutomation.read_log('./logs/sensor_int.json')
+        automation = MapReduceAutomation(param={'min_sup': 2, 'time_err': 3.75, 'int_err': 5})
+        history = data['history']
+        _shared[id(history)] = history
+        try:
+            chunk = SharedChunk(id(history), 0, len(history))
+            summary = map_values(chunk)
+            self.assertEqual(summary.keys(), automation.cls_log(history).keys())
+            self.assertEqual(1, len(_tables))
+
+            dense_regions = automation.reduce_values([summary])
+            cand_dicts = map_candidates(automation, dense_regions, chunk)
+            self.assertEqual(0, len(_tables))
+            self.assertEqual(map_candidates(automation, dense_regions, history), cand_dicts)
+            self.assertEqual(cand_dicts, map_candidates(automation, dense_regions, chunk))
+        finally:
+            del _shared[id(history)]
@@ -0,0 +1,65 @@
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from src.self_automation import SelfAutomation
+from src.run_stats import RunStats
+
+
+# tests for mining commands concurrently in run()
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        self.dir_serial = tempfile.mkdtemp() + '/'
+        self.dir_out = tempfile.mkdtemp() + '/'
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_serial)
+        shutil.rmtree(self.dir_out)
+
+    # same file names and rules as serial run
+    def check_run(self, executor):
+        for file in ['multiple.json', 'time.json', 'sensor_int.json', 'noise.json']:
+            expect = SelfAutomation().run(file, self.dir_serial)
+
+            automation = SelfAutomation()
+            automation.executor = executor
+            self.assertEqual(expect, automation.run(file, self.dir_out))
+            for name in expect:
+                with open(self.dir_serial + name) as f1, open(self.dir_out + name) as f2:
+                    self.assertEqual(f1.read(), f2.read())
+
+    def test_thread(self):
+        with ThreadPoolExecutor(4) as executor:
+            self.check_run(executor)
+
+    def test_process(self):
+        with ProcessPoolExecutor(2) as executor:
+            self.check_run(executor)
+
+    # statistics of workers are merged
+    def test_stats(self):
+        serial = RunStats()
+        SelfAutomation().run('sensor_int.json', self.dir_serial, stats=serial)
+
+        stats = RunStats()
+        automation = SelfAutomation()
+        with ProcessPoolExecutor(2) as executor:
+            automation.executor = executor
+            automation.run('sensor_int.json', self.dir_out, stats=stats)
+
+        self.assertEqual(serial.times.keys(), stats.times.keys())
+        for counter in ['records', 'command_records', 'dense_regions', 'candidates', 'clusters', 'bytes_written']:
+            self.assertEqual(getattr(serial, counter), getattr(stats, counter))
+
+    # memory is not traced in threads sharing tracemalloc
+    def test_thread_memory(self):
+        stats = RunStats(trace_memory=True)
+        automation = SelfAutomation()
+        with ThreadPoolExecutor(2) as executor:
+            automation.executor = executor
+            automation.run('sensor_int.json', self.dir_out, stats=stats)
+
+        self.assertIn('count_candidates', stats.times)
+        self.assertIn('cls_log', stats.memory)
+        self.assertNotIn('count_candidates', stats.memory)
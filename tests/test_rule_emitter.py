@@ -0,0 +1,58 @@
+import json
+import pickle
+import unittest
+
+from src.self_automation import SelfAutomation
+from src.rule_emitter import RuleEmitter, rule_json
+
+
+# tests for RuleEmitter
+class TestRuleEmitter(unittest.TestCase):
+    def setUp(self):
+        self.automation = SelfAutomation(param={'min_sup': 2, 'time_err': 3.75, 'int_err': 5})
+
+    # same rules and JSON text as generate_rule()
+    def test_emit(self):
+        num_rules = 0
+        for file in ['sensor_complex.json', 'sensor_int.json', 'sensor_str.json', 'multiple_neighbor.json',
+                     'time.json', 'simple.json']:
+            data = SelfAutomation.read_log('./logs/' + file)
+            for cmd, logs in self.automation.cls_log(data['history']).items():
+                emitter = RuleEmitter(self.automation, data, cmd)
+                for cluster in self.automation.cluster_log(logs, info=True) * 2:
+                    expect = self.automation.generate_rule(data, cluster, cmd)
+                    rule = emitter.emit(cluster)
+                    self.assertEqual(expect, rule)
+                    self.assertEqual(json.dumps(expect), rule_json(rule))
+                    num_rules += 1
+        self.assertGreater(num_rules, 20)
+
+    # single operation and every action
+    def test_single(self):
+        data = SelfAutomation.read_log('./logs/sensor_str.json')
+        emitter = RuleEmitter(self.automation, data, 'on')
+        for cluster in [(('time', ('18:00', ('17:45', '18:15'))),), (('my-sensor:0', 'active'),),
+                        (('time', ('18:00', ('17:45', '18:15'))), ('my-sensor:0', 'active'))]:
+            expect = self.automation.generate_rule(data, cluster, 'on')
+            rule = emitter.emit(cluster)
+            self.assertEqual(expect, rule)
+            self.assertEqual(json.dumps(expect), rule_json(rule))
+
+            # rule is sent to worker processes with its text
+            copy = pickle.loads(pickle.dumps(rule))
+            self.assertEqual(rule, copy)
+            self.assertEqual(rule.text, copy.text)
+
+        self.assertEqual(json.dumps({'a': [1]}), rule_json({'a': [1]}))
+
+    # rules don't share nested dictionaries
+    def test_copy(self):
+        data = SelfAutomation.read_log('./logs/sensor_str.json')
+        emitter = RuleEmitter(self.automation, data, 'on')
+        cluster = (('time', ('18:00', ('17:45', '18:15'))), ('my-sensor:0', 'active'))
+        rule, other = emitter.emit(cluster), emitter.emit(cluster)
+
+        rule['actions'][0]['if']['then'][0]['command']['devices'].append('other')
+        rule['actions'][0]['if']['and'][1]['equals']['right']['string'] = 'inactive'
+        self.assertEqual(self.automation.generate_rule(data, cluster, 'on'), other)
+        self.assertEqual(json.dumps(other), rule_json(other))
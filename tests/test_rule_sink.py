@@ -0,0 +1,72 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from src.self_automation import SelfAutomation
+from src.rule_sink import NDJSONSink, ListSink
+from src.batch import run_batch
+
+
+# tests for destinations of generated rules
+class TestRuleSink(unittest.TestCase):
+    def setUp(self):
+        self.dir_out = tempfile.mkdtemp() + '/'
+        self.automation = SelfAutomation()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_out)
+
+    # return list of (name, rule) in NDJSON file
+    @staticmethod
+    def read_ndjson(path):
+        with open(path) as f:
+            return [(line['name'], line['rule']) for line in map(json.loads, f)]
+
+    # rules of several runs are written to one file
+    def test_ndjson(self):
+        path = self.dir_out + 'rules.ndjson'
+        names = []
+        with NDJSONSink(path) as sink:
+            for file in ['multiple.json', 'time.json']:
+                names += self.automation.run(file, sink=sink)
+            self.assertFalse(os.path.exists(path))  # renamed when closed
+
+        self.assertEqual(names, [name for name, _ in self.read_ndjson(path)])
+        self.assertEqual(['rules.ndjson'], os.listdir(self.dir_out))
+
+        # same rules as files of each rule
+        for file in ['multiple.json', 'time.json']:
+            self.automation.run(file, self.dir_out)
+        for name, rule in self.read_ndjson(path):
+            with open(self.dir_out + name) as f:
+                self.assertEqual(json.load(f), rule)
+
+    # nothing is left when run fails
+    def test_abort(self):
+        path = self.dir_out + 'rules.ndjson'
+        with self.assertRaises(TypeError):
+            with NDJSONSink(path) as sink:
+                self.automation.run('multiple.json', sink=sink)
+                self.automation.run(None, sink=sink)
+
+        self.assertEqual([], os.listdir(self.dir_out))
+
+    def test_list(self):
+        sink = ListSink()
+        names = self.automation.run('simple.json', sink=sink)
+
+        self.assertEqual(names, [name for name, _ in sink.rules])
+        self.assertEqual([], os.listdir(self.dir_out))
+
+    # rules of batch are written in order of files
+    def test_batch(self):
+        path = self.dir_out + 'rules.ndjson'
+        with NDJSONSink(path) as sink:
+            manifest = run_batch('./logs/', workers=2, sink=sink)
+
+        names = [name for entry in manifest.values() for name in entry.get('rules', [])]
+        self.assertEqual(names, [name for name, _ in self.read_ndjson(path)])
+        self.assertNotIn('collected', manifest['./logs/simple.json'])
+        self.assertEqual(['simple_on_rule.json'], manifest['./logs/simple.json']['rules'])
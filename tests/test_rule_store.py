@@ -0,0 +1,144 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+from src.self_automation import SelfAutomation
+from src.rule_store import RuleStore
+from src.batch import run_batch
+
+
+# tests for content-addressed store of rules
+class TestRuleStore(unittest.TestCase):
+    def setUp(self):
+        self.dir_in = tempfile.mkdtemp() + '/'
+        self.store_dir = tempfile.mkdtemp()
+        for file in ['multiple.json', 'time.json']:
+            self.copy_log(file, file)
+        self.automation = SelfAutomation(self.dir_in)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_in)
+        shutil.rmtree(self.store_dir)
+
+    # copy log file as a log of device named after file name
+    def copy_log(self, file, name):
+        data = SelfAutomation.read_log('./logs/' + file)
+        data['device'] = name.split('.')[0]
+        with open(self.dir_in + name, 'w') as f:
+            json.dump(data, f)
+
+    # run every log file into store and return diff
+    def run_store(self, files=('multiple.json', 'time.json')):
+        with RuleStore(self.store_dir) as store:
+            for file in files:
+                self.automation.run(file, sink=store)
+        return store.changes
+
+    def test_unchanged(self):
+        changes = self.run_store()
+        self.assertEqual(4, len(changes['added']))
+        self.assertEqual([], changes['changed'] + changes['removed'])
+
+        # stored rule is the same as rule file of run()
+        store = RuleStore(self.store_dir)
+        dir_out = tempfile.mkdtemp() + '/'
+        self.automation.run('multiple.json', dir_out)
+        with open(store.rule_file('multiple', 'on', 'multiple_on0_rule.json')) as f1, \
+                open(dir_out + 'multiple_on0_rule.json') as f2:
+            self.assertEqual(f1.read(), f2.read())
+        shutil.rmtree(dir_out)
+
+        # rule files are named after digest of their content
+        for digest in store.used_digests():
+            with open(store.rule_path(digest)) as f:
+                self.assertEqual(digest, hashlib.sha256(f.read().encode()).hexdigest())
+
+        mtimes = {f: os.stat(os.path.join(store.rule_dir, f)).st_mtime_ns for f in os.listdir(store.rule_dir)}
+        changes = self.run_store()
+        self.assertEqual({'added': [], 'changed': [], 'removed': []}, changes)
+        self.assertEqual(changes, RuleStore(self.store_dir).last_changes())
+        self.assertEqual(mtimes, {f: os.stat(os.path.join(store.rule_dir, f)).st_mtime_ns
+                                  for f in os.listdir(store.rule_dir)})
+
+    def test_changed(self):
+        self.run_store()
+        old = RuleStore(self.store_dir).rule_file('time', 'on', 'time_on_rule.json')
+
+        # routine of on command moves to 09:00
+        with open(self.dir_in + 'time.json') as f:
+            data = json.load(f)
+        for log in data['history']:
+            if log['command'] == 'on':
+                log['timestamp'] = log['timestamp'][:11] + '09' + log['timestamp'][13:]
+        with open(self.dir_in + 'time.json', 'w') as f:
+            json.dump(data, f)
+
+        changes = self.run_store(['time.json'])
+        self.assertEqual([], changes['added'] + changes['removed'])
+        self.assertEqual(['time_on_rule.json'], [c['name'] for c in changes['changed']])
+        self.assertEqual(os.path.basename(old)[:-5], changes['changed'][0]['previous'])
+        self.assertFalse(os.path.exists(old))
+
+        # rules of other files are kept
+        self.assertEqual(4, len(os.listdir(os.path.join(self.store_dir, 'rules'))))
+
+    def test_removed(self):
+        self.run_store()
+        self.copy_log('noise.json', 'time.json')   # on command has no cluster
+
+        changes = self.run_store(['time.json'])
+        self.assertIn(('on', 'time_on_rule.json'), [(c['command'], c['name']) for c in changes['removed']])
+        self.assertIsNone(RuleStore(self.store_dir).rule_file('time', 'on', 'time_on_rule.json'))
+
+    # rules of command no longer in history are removed
+    def test_removed_command(self):
+        self.run_store()
+        with open(self.dir_in + 'time.json') as f:
+            data = json.load(f)
+        data['history'] = [log for log in data['history'] if log['command'] == 'on']
+        with open(self.dir_in + 'time.json', 'w') as f:
+            json.dump(data, f)
+
+        changes = self.run_store(['time.json'])
+        self.assertEqual([('off', 'time_off_rule.json')], [(c['command'], c['name']) for c in changes['removed']])
+        self.assertIsNone(RuleStore(self.store_dir).rule_file('time', 'off', 'time_off_rule.json'))
+        self.assertIsNotNone(RuleStore(self.store_dir).rule_file('time', 'on', 'time_on_rule.json'))
+
+    # every rule of device with history shorter than minimum support is removed
+    def test_removed_device(self):
+        for run_store in [self.run_store, self.run_batch_store]:
+            self.copy_log('time.json', 'time.json')
+            run_store()
+            self.copy_log('not_enough.json', 'time.json')
+
+            changes = run_store()
+            self.assertEqual([], changes['added'] + changes['changed'])
+            self.assertEqual(2, len(changes['removed']))
+            self.assertEqual({'time'}, {c['device'] for c in changes['removed']})
+            self.assertEqual(['multiple'], list(RuleStore(self.store_dir).manifest['devices']))
+
+    # run every log file into store by run_batch() and return diff
+    def run_batch_store(self):
+        with RuleStore(self.store_dir) as store:
+            run_batch(self.dir_in, workers=2, sink=store)
+        return store.changes
+
+    # rules written before failure are discarded
+    def test_abort(self):
+        with self.assertRaises(TypeError):
+            with RuleStore(self.store_dir) as store:
+                self.automation.run('multiple.json', sink=store)
+                self.automation.run(None, sink=store)
+
+        self.assertEqual([], os.listdir(os.path.join(self.store_dir, 'rules')))
+        self.assertIsNone(RuleStore(self.store_dir).last_changes())
+
+    def test_batch(self):
+        with RuleStore(self.store_dir) as store:
+            run_batch(self.dir_in, workers=2, sink=store)
+        self.assertEqual(4, len(store.changes['added']))
+
+        self.assertEqual({'added': [], 'changed': [], 'removed': []}, self.run_store())
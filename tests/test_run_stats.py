@@ -0,0 +1,69 @@
+import os
+import unittest
+
+from src.self_automation import SelfAutomation
+from src.run_stats import RunStats
+from src.rule_sink import ListSink
+
+
+# tests for statistics of run()
+class TestRunStats(unittest.TestCase):
+    def setUp(self):
+        self.automation = SelfAutomation()
+
+    def test_run_stats(self):
+        stats = RunStats()
+        file_names = self.automation.run('sensor_int.json', stats=stats)
+
+        self.assertEqual(['read_log', 'cls_log', 'prune', 'get_dense_region', 'count_candidates', 'format_clusters',
+                          'generate_rule', 'write_rules'], list(stats.times.keys()))
+        self.assertEqual(len(SelfAutomation.read_log('./logs/sensor_int.json')['history']), stats.records)
+        self.assertEqual(stats.records, sum(stats.command_records.values()))
+        self.assertEqual({'on': 1, 'off': 1}, stats.clusters)
+        self.assertEqual(sum(os.path.getsize('./output/' + name) for name in file_names), stats.bytes_written)
+        self.assertEqual({}, stats.memory)
+
+    def test_hook(self):
+        called = []
+        stats = RunStats(hook=lambda stage, seconds, s: called.append(stage), trace_memory=True)
+        self.automation.run('time.json', stats=stats)
+
+        self.assertEqual(['read_log', 'cls_log'], called[:2])
+        self.assertEqual(2, called.count('get_dense_region'))  # once for each command
+        self.assertEqual(set(called), set(stats.memory.keys()))
+        self.assertEqual({'time': 1}, stats.dense_regions['off'])
+
+    # not enough history
+    def test_not_enough(self):
+        stats = RunStats()
+        self.automation.run('not_enough.json', stats=stats)
+
+        self.assertEqual(['read_log'], list(stats.times.keys()))
+        self.assertEqual({}, stats.to_dict()['command_records'])
+
+    # commands, columns and logs which can't belong to cluster are pruned
+    def test_pruning(self):
+        history = [{'timestamp': '2022-01-01T18:00:00.000Z', 'command': 'on', 'sensor': ['active', 20]}
+                   for _ in range(5)]
+        history += [{'timestamp': '2022-01-01T18:00:00.000Z', 'command': 'on', 'rare': [i]} for i in range(3)]
+        history += [{'timestamp': '2022-01-01T%02d:00:00.000Z' % i, 'command': 'on', 'sensor': ['x%d' % i, 100 + 50 * i]}
+                    for i in range(6)]
+        history += [{'timestamp': '2022-01-01T07:00:00.000Z', 'command': 'off'}]
+        data = {'device': 'dev', 'capability': 'switch', 'history': history,
+                'neighbors': [{'device': 'sensor', 'value': [{'attribute': 'motion'}, {'attribute': 'temp'}]},
+                              {'device': 'rare', 'value': [{'attribute': 'temp'}]}]}
+
+        stats = RunStats()
+        sink = ListSink()
+        self.automation.min_sup = 4
+        self.automation.run_data(data, 'dev.json', stats=stats, sink=sink)
+
+        self.assertEqual({'command': 1, 'columns': 1, 'logs': 1}, stats.pruned['off'])
+        # 'rare:0' is held by 3 logs, 'sensor:0' and 'sensor:1' have dense 1-regions
+        self.assertEqual({'command': 0, 'columns': 1, 'logs': 6}, stats.pruned['on'])
+
+        # same rules as clusters without pruning
+        table = self.automation.cls_log_table(history)['on']
+        clusters = self.automation.cluster_log(table, info=True)
+        self.assertEqual(1, len(clusters))
+        self.assertEqual([self.automation.generate_rule(data, c, 'on') for c in clusters], [r for _, r in sink.rules])
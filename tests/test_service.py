@@ -0,0 +1,138 @@
+import os
+import json
+import shutil
+import asyncio
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.self_automation import SelfAutomation
+from src.service import RuleService
+
+
+# send request and return status and decoded body of response
+async def request(address, method, path, body=b'', unix=False):
+    if unix:
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address[:2])
+    writer.write(b'%s %s HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % (method.encode(), path.encode(), len(body)) + body)
+    await writer.drain()
+    return await read_response(reader, writer)
+
+
+async def read_response(reader, writer):
+    response = await reader.read()
+    writer.close()
+    head, payload = response.split(b'\r\n\r\n', 1)
+    return int(head.split(b' ')[1]), json.loads(payload)
+
+
+# tests for rule generation service
+class TestService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.executor = ThreadPoolExecutor(2)
+        self.service = await RuleService(max_in_flight=1, executor=self.executor).start()
+        self.address = self.service.address()
+
+    async def asyncTearDown(self):
+        if not self.service.closing:
+            await self.service.stop()
+        self.executor.shutdown()
+
+    # rules are the same as rule files of run()
+    async def test_rules(self):
+        dir_out = tempfile.mkdtemp() + '/'
+        for file in ['simple.json', 'multiple.json', 'not_enough.json']:
+            with open('./logs/' + file, 'rb') as f:
+                status, body = await request(self.address, 'POST', '/rules?name=' + file, f.read())
+
+            self.assertEqual(200, status)
+            names = SelfAutomation().run(file, dir_out)
+            self.assertEqual(len(names), len(body['rules']))
+            for name, rule in zip(names, body['rules']):
+                with open(dir_out + name) as f:
+                    self.assertEqual(json.load(f), rule['rule'])
+        shutil.rmtree(dir_out)
+
+    async def test_bad_request(self):
+        self.assertEqual(400, (await request(self.address, 'POST', '/rules', b'{"device": '))[0])
+        self.assertEqual(400, (await request(self.address, 'POST', '/rules', b'[]'))[0])
+        status, body = await request(self.address, 'POST', '/rules', b'{"device": "x", "history": {}}')
+        self.assertEqual((400, {'error': 'history is not a list'}), (status, body))
+        self.assertEqual(405, (await request(self.address, 'GET', '/rules'))[0])
+        self.assertEqual(404, (await request(self.address, 'GET', '/'))[0])
+        self.assertEqual((200, {'status': 'ok', 'in_flight': 0}), await request(self.address, 'GET', '/health'))
+
+    # request beyond max_in_flight is rejected while another is in progress
+    async def test_backpressure(self):
+        with open('./logs/simple.json', 'rb') as f:
+            body = f.read()
+
+        # first request waits for the rest of its body
+        reader, writer = await asyncio.open_connection(*self.address[:2])
+        writer.write(b'POST /rules HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % len(body) + body[:10])
+        await writer.drain()
+        while self.service.in_flight == 0:
+            await asyncio.sleep(0.01)
+
+        status, _ = await request(self.address, 'POST', '/rules', body)
+        self.assertEqual(503, status)
+
+        writer.write(body[10:])
+        status, result = await read_response(reader, writer)
+        self.assertEqual(200, status)
+        self.assertEqual('dev_on_rule.json', result['rules'][0]['name'])
+
+        self.assertEqual(200, (await request(self.address, 'POST', '/rules', body))[0])
+
+    # request in progress is answered before service stops
+    async def test_graceful_shutdown(self):
+        with open('./logs/simple.json', 'rb') as f:
+            body = f.read()
+
+        reader, writer = await asyncio.open_connection(*self.address[:2])
+        writer.write(b'POST /rules HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % len(body) + body[:10])
+        await writer.drain()
+        while self.service.in_flight == 0:
+            await asyncio.sleep(0.01)
+
+        stopping = asyncio.ensure_future(self.service.stop(timeout=10))
+        await asyncio.sleep(0.05)
+        self.assertFalse(stopping.done())
+        with self.assertRaises(OSError):
+            await asyncio.open_connection(*self.address[:2])
+
+        writer.write(body[10:])
+        self.assertEqual(200, (await read_response(reader, writer))[0])
+        await stopping
+
+    async def test_unix_socket(self):
+        path = os.path.join(tempfile.mkdtemp(), 'service.sock')
+        service = await RuleService(executor=self.executor).start(path=path)
+
+        with open('./logs/simple.json', 'rb') as f:
+            status, body = await request(path, 'POST', '/rules?name=simple.json', f.read(), unix=True)
+        self.assertEqual(200, status)
+        self.assertEqual(['simple_on_rule.json'], [rule['name'] for rule in body['rules']])
+
+        await service.stop()
+        shutil.rmtree(os.path.dirname(path))
+
+    # clustering in default process pool
+    async def test_process_pool(self):
+        service = await RuleService(workers=1).start()
+
+        with open('./logs/simple.json', 'rb') as f:
+            status, body = await request(service.address(), 'POST', '/rules?name=simple.json', f.read())
+        self.assertEqual(200, status)
+        self.assertEqual(['simple_on_rule.json'], [rule['name'] for rule in body['rules']])
+
+        # payload is parsed and validated in worker process
+        with open('./logs/simple.json', 'rb') as f:
+            status, body = await request(service.address(), 'POST', '/rules', f.read())
+        self.assertEqual(200, status)
+        self.assertEqual(['dev_on_rule.json'], [rule['name'] for rule in body['rules']])
+        self.assertEqual(400, (await request(service.address(), 'POST', '/rules', b'{"device": '))[0])
+
+        await service.stop()
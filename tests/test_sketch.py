@@ -0,0 +1,93 @@
+import os
+import json
+import random
+import shutil
+import tempfile
+import unittest
+
+from src.self_automation import SelfAutomation
+from src.sketch import SketchAutomation, BoundedCounter, NumericSketch
+from src.rule_sink import ListSink
+
+
+# tests for mining with bounded memory
+class TestSketch(unittest.TestCase):
+    # rules are the same as exact mining
+    def test_same_rules(self):
+        for file in sorted(os.listdir('./logs/')):
+            for param in [None, {'min_sup': 3, 'time_err': 15, 'int_err': 2}]:
+                expect, sink = ListSink(), ListSink()
+                names = SelfAutomation(param=param).run(file, sink=expect)
+
+                automation = SketchAutomation(param=param)
+                self.assertEqual(names, automation.run(file, sink=sink))
+                self.assertEqual(expect.rules, sink.rules)
+                for bounds in automation.bounds.values():
+                    self.assertEqual({'merged_gap': 0, 'mode_error': 0, 'string_error': 0, 'support_error': 0},
+                                     bounds)
+
+    # chunk starting with a log missing a component
+    def test_missing_component(self):
+        history = [{'timestamp': '2022-01-01T18:00:00.000Z', 'command': 'on', 'door': ['open'], 'motion': ['active']}
+                   for _ in range(SelfAutomation.STREAM_CHUNK_SIZE + 10)]
+        del history[SelfAutomation.STREAM_CHUNK_SIZE]['door']
+        data = {'device': 'x', 'capability': 'switch', 'history': history,
+                'neighbors': [{'device': 'door', 'value': [{'attribute': 'contact'}]},
+                              {'device': 'motion', 'value': [{'attribute': 'motion'}]}]}
+
+        dir_in = tempfile.mkdtemp() + '/'
+        with open(dir_in + 'x.json', 'w') as f:
+            json.dump(data, f)
+        try:
+            expect, sink = ListSink(), ListSink()
+            names = SelfAutomation(dir_in).run('x.json', sink=expect)
+            self.assertEqual(['x_on_rule.json'], names)
+
+            automation = SketchAutomation(dir_in)
+            self.assertEqual(names, automation.run('x.json', sink=sink))
+            self.assertEqual(expect.rules, sink.rules)
+            self.assertEqual(0, automation.bounds['on']['support_error'])
+        finally:
+            shutil.rmtree(dir_in)
+
+    def test_bounded_counter(self):
+        counter = BoundedCounter(2)
+        for item, count in [('a', 5), ('b', 1), ('c', 3), ('b', 1)]:
+            counter.add(item, count)
+            counter.truncate()
+
+        self.assertEqual({'a': 5, 'c': 3}, counter.counts)
+        self.assertEqual(2, counter.error)   # b was dropped twice with 1 occurrence
+        self.assertEqual({'a': 5}, counter.frequent(4))
+
+    def test_numeric_sketch(self):
+        sketch = NumericSketch(2, 3, 2)
+        sketch.add([1, 2, 2, 10, 25, 40])   # closest bins are merged beyond err
+        self.assertEqual([(1, 10), (25, 25), (40, 40)], [(b[0], b[1]) for b in sketch.bins])
+        self.assertEqual(8, sketch.merged_gap)
+
+        sketch.add([4, 4, 4, 11, 26])   # values within err of bins
+        self.assertEqual([(1, 11), (25, 26), (40, 40)], [(b[0], b[1]) for b in sketch.bins])
+        self.assertEqual([4], [r.mode for r in sketch.regions(5)])
+        self.assertEqual(3, sketch.mode_error())   # values counted once are dropped three times
+
+    # memory is bounded and errors are reported when values exceed budget
+    def test_budget(self):
+        rnd = random.Random(0)
+        history = [{'timestamp': '2022-01-01T%02d:00:00.000Z' % rnd.choice([7, 19]), 'command': 'on',
+                    'n': [rnd.randrange(0, 1000, 7), 'v%d' % rnd.randrange(100)]} for _ in range(3000)]
+        data = {'device': 'dev', 'capability': 'switch', 'history': history,
+                'neighbors': [{'device': 'n', 'value': [{'attribute': 'temp'}, {'attribute': 'mode'}]}]}
+        dir_in = tempfile.mkdtemp() + '/'
+        with open(dir_in + 'dev.json', 'w') as f:
+            json.dump(data, f)
+
+        automation = SketchAutomation(dir_in, {'min_sup': 20, 'time_err': 3.75, 'int_err': 3},
+                                      {'bins': 16, 'bin_values': 4, 'strings': 10, 'candidates': 50})
+        automation.run('dev.json', sink=ListSink())
+        shutil.rmtree(dir_in)
+
+        bounds = automation.bounds['on']
+        self.assertGreater(bounds['merged_gap'], 3)
+        self.assertGreater(bounds['string_error'], 0)
+        self.assertGreater(bounds['support_error'], 0)
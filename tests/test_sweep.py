@@ -0,0 +1,56 @@
+import random
+import unittest
+
+from src.self_automation import SelfAutomation
+from src.sweep import ParameterSweep, param_grid
+
+GRID = {'min_sup': [2, 3, 5, 8], 'time_err': [1, 3.75, 15], 'int_err': [0, 2, 5]}
+
+
+# tests for hyperparameter sweep
+class TestSweep(unittest.TestCase):
+    def test_param_grid(self):
+        params = param_grid({'min_sup': [2, 5], 'time_err': [3.75], 'int_err': [1, 5]})
+
+        self.assertEqual([{'min_sup': 2, 'time_err': 3.75, 'int_err': 1}, {'min_sup': 2, 'time_err': 3.75, 'int_err': 5},
+                          {'min_sup': 5, 'time_err': 3.75, 'int_err': 1}, {'min_sup': 5, 'time_err': 3.75, 'int_err': 5}],
+                         params)
+
+    # return rules of independent run with param
+    @staticmethod
+    def independent_rules(data, param):
+        automation = SelfAutomation(param=param)
+        if len(data['history']) < automation.min_sup:
+            return {}
+        return automation.generate_rules(data, automation.cls_log_table(data['history']))
+
+    # rules of every configuration are the same as independent runs
+    def test_run(self):
+        for file in ['sensor_complex.json', 'sensor_int.json', 'sensor_str.json', 'multiple_neighbor.json',
+                     'time.json', 'noise.json', 'not_enough.json']:
+            data = SelfAutomation.read_log('./logs/' + file)
+            results = ParameterSweep(data).run(GRID)
+
+            self.assertEqual(param_grid(GRID), [r['param'] for r in results])
+            for result in results:
+                rules = self.independent_rules(data, result['param'])
+                self.assertEqual(rules, result['rules'])
+                self.assertEqual(sum(len(r) for r in rules.values()), result['summary']['rules'])
+
+    # logs with missing components and repeated logs
+    def test_random(self):
+        rnd = random.Random(0)
+        history = []
+        for i in range(300):
+            log = {'timestamp': '2022-01-01T%02d:%02d:00.000Z' % (rnd.choice([0, 7, 18, 23]), rnd.randrange(0, 60, 5)),
+                   'command': rnd.choice(['on', 'off'])}
+            if rnd.random() < 0.8:
+                log['n'] = [rnd.choice([20, 21, 30, 45]), rnd.choice(['home', 'away'])]
+            history.append(log)
+        data = {'device': 'dev', 'capability': 'switch', 'history': history,
+                'neighbors': [{'device': 'n', 'value': [{'attribute': 'temp'}, {'attribute': 'mode'}]}]}
+
+        grid = {'min_sup': [10, 30, 60], 'time_err': [1.25, 3.75, 10], 'int_err': [0, 1, 10],
+                'backend': ['exact', 'fp_tree']}
+        for result in ParameterSweep(data).run(grid):
+            self.assertEqual(self.independent_rules(data, result['param']), result['rules'])
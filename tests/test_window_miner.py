@@ -0,0 +1,94 @@
+import random
+import unittest
+from datetime import timedelta
+
+from src.self_automation import SelfAutomation
+from src.window_miner import WindowMiner
+
+
+# tests for WindowMiner
+class TestWindowMiner(unittest.TestCase):
+    def setUp(self):
+        self.automation = SelfAutomation()
+        self.data = {'device': 'dev', 'capability': 'switch',
+                     'neighbors': [{'device': 'sensor', 'capability': 'sensor',
+                                    'value': [{'attribute': 'temp', 'type': 'integer'},
+                                              {'attribute': 'mode', 'type': 'string'}]}]}
+
+        rnd = random.Random(0)
+        self.history = []
+        for day in range(60):
+            for _ in range(rnd.randrange(4)):
+                hour = 18 if rnd.random() < 0.8 else rnd.randrange(24)
+                self.history.append({'timestamp': '2022-%02d-%02dT%02d:%02d:00.000Z'
+                                                  % (1 + day // 28, 1 + day % 28, hour, rnd.choice([0, 5, 30])),
+                                     'command': rnd.choice(['on', 'on', 'off']),
+                                     'sensor': [rnd.choice([20, 22, 40]), rnd.choice(['home', 'away'])]})
+
+    # return rules of batch run over records
+    def batch_rules(self, records):
+        if len(records) < self.automation.min_sup:
+            return {}
+        return self.automation.generate_rules(self.data, self.automation.cls_log(records))
+
+    # rules are the same as rules from logs in window after each update
+    def test_slide(self):
+        window = timedelta(days=10)
+        miner = WindowMiner(self.data, window)
+
+        for start in range(0, len(self.history), 7):
+            miner.update(self.history[start:start + 7])
+
+            limit = miner.latest - window
+            records = [r for r in self.history[:start + 7] if miner.parse_time(r['timestamp']) > limit]
+            self.assertEqual(self.batch_rules(records), miner.rules())
+
+        self.assertGreater(len(miner.rules()), 0)
+
+    # logs given out of time order expire by time
+    def test_unordered(self):
+        history = list(self.history)
+        random.Random(1).shuffle(history)
+        window = timedelta(days=30)
+        miner = WindowMiner(self.data, window)
+
+        for start in range(0, len(history), 20):
+            miner.update(history[start:start + 20])
+
+            limit = miner.latest - window
+            records = [r for r in history[:start + 20] if miner.parse_time(r['timestamp']) > limit]
+            self.assertEqual(self.batch_rules(records), miner.rules())
+
+    # every log expires when window slides without new logs
+    def test_expire(self):
+        miner = WindowMiner(dict(self.data, history=self.history), timedelta(days=10))
+        self.assertNotEqual({}, miner.rules())
+
+        miner.expire(miner.latest + timedelta(days=10))
+
+        self.assertEqual(0, miner.num_logs)
+        self.assertEqual({}, miner.logs)
+        self.assertEqual([], miner.expiry)
+        self.assertEqual({}, miner.rules())
+
+    # candidates counted from new and expired logs are the same as candidates of logs in window, in the same order
+    def test_candidates(self):
+        history = list(self.history)
+        random.Random(2).shuffle(history)
+        window = timedelta(days=20)
+        miner = WindowMiner(self.data, window)
+        miner.min_sup = 1   # boundaries of dense regions change rarely
+
+        for start in range(0, len(history), 5):
+            miner.update(history[start:start + 5])
+            if start % 10 != 0:     # logs are added and expired between clusterings
+                continue
+
+            limit = miner.latest - window
+            records = [r for r in history[:start + 5] if miner.parse_time(r['timestamp']) > limit]
+            expect = WindowMiner(dict(self.data, history=records), window)
+            expect.min_sup = 1
+            self.assertEqual(expect.rules(), miner.rules())
+            for cmd in expect.commands():
+                self.assertEqual(list(expect.candidates[cmd].items()), list(miner.candidates[cmd].items()))
+            self.assertEqual(expect.commands(), miner.commands())